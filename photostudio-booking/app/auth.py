@@ -6,6 +6,8 @@ from jose import JWTError, jwt
 import os
 from dotenv import load_dotenv
 
+from .token_cache import token_cache
+
 load_dotenv()
 
 # Налаштування JWT
@@ -33,21 +35,29 @@ def verify_password(plain_password: str) -> bool:
     return plain_password == admin_password
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
-    """Перевірити JWT токен"""
+    """Перевірити JWT токен (повторні запити - з кешу перевірених токенів)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Не авторизовано",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    token = credentials.credentials
+    cached = token_cache.get(token)
+    if cached is not None:
+        # У тому ж кеші лежать і токени користувачів (security.get_current_user)
+        if cached.claims.get("role") != "admin":
+            raise credentials_exception
+        return cached.claims
+    
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         role: str = payload.get("role")
         
         if role != "admin":
             raise credentials_exception
         
+        token_cache.put(token, payload)
         return payload
     except JWTError:
         raise credentials_exception
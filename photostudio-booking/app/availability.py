@@ -0,0 +1,215 @@
+"""
+In-memory кеш доступності місяців для календаря
+
+Зайнятість дня зберігається як 24-бітна маска (біт N = година N), місяць -
+як array масок по днях. Перевірки вільно/зайнято і рендер місяця зводяться
+до бітових операцій.
+"""
+import hashlib
+import os
+import threading
+import time
+import calendar
+from array import array
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .models import ACTIVE_STATUSES
+
+# Робочі години студії (з 9 до 21)
+WORK_HOURS = list(range(9, 21))
+
+# Маска робочих годин
+WORK_MASK = 0
+for _hour in WORK_HOURS:
+    WORK_MASK |= 1 << _hour
+
+# Години, що відповідають кожному значенню байта маски (для 3 байтів доби)
+_BYTE_HOURS = [
+    [tuple(offset + bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+    for offset in (0, 8, 16)
+]
+
+# Скільки секунд тримати місяць у кеші. Зміни з цього процесу оновлюють кеш
+# одразу, TTL обмежує застарілість для змін з інших процесів (бот у режимі polling)
+CALENDAR_CACHE_TTL = float(os.getenv("CALENDAR_CACHE_TTL", "30"))
+
+
+def hours_to_mask(hours: Iterable[int]) -> int:
+    """Список годин -> бітова маска"""
+    mask = 0
+    for hour in hours:
+        mask |= 1 << hour
+    return mask
+
+
+def mask_to_hours(mask: int) -> List[int]:
+    """Бітова маска -> відсортований список годин"""
+    return list(
+        _BYTE_HOURS[0][mask & 0xFF]
+        + _BYTE_HOURS[1][mask >> 8 & 0xFF]
+        + _BYTE_HOURS[2][mask >> 16 & 0xFF]
+    )
+
+
+def available_mask(booked_mask: int) -> int:
+    """Маска вільних робочих годин"""
+    return WORK_MASK & ~booked_mask
+
+
+def is_free(booked_mask: int, hour: int) -> bool:
+    """Чи вільна година"""
+    return not booked_mask >> hour & 1
+
+
+class _MonthEntry:
+    """Закешований місяць: маски зайнятості по днях + готова відповідь"""
+    __slots__ = ("masks", "rendered", "body", "version", "expires_at")
+
+    def __init__(self, masks: array, expires_at: float):
+        self.masks = masks
+        self.rendered = None
+        self.body = None  # rendered, закодований у JSON (FAST_JSON)
+        self.version = None
+        self.expires_at = expires_at
+
+    def day_mask(self, day: date) -> int:
+        return self.masks[day.day - 1]
+
+    def data_version(self) -> str:
+        """
+        Версія даних місяця - хеш масок зайнятості.
+
+        Залежить тільки від вмісту, тому однакова в усіх воркерах і після
+        рестарту (на відміну від generation).
+        """
+        if self.version is None:
+            self.version = hashlib.blake2b(self.masks.tobytes(), digest_size=8).hexdigest()
+        return self.version
+
+
+class MonthAvailabilityCache:
+    """Кеш доступності по (year, month) з write-through інвалідацією"""
+
+    def __init__(self, ttl: float = CALENDAR_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[int, int], _MonthEntry] = {}
+        self._generations: Dict[Tuple[int, int], int] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[date, int, bool], None]] = []
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def generation(self, year: int, month: int) -> int:
+        """Поточне покоління місяця (змінюється при кожному записі)"""
+        return self._generations.get((year, month), 0)
+
+    def get(self, year: int, month: int) -> Optional[_MonthEntry]:
+        """Повернути закешований місяць або None"""
+        key = (year, month)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(
+        self,
+        year: int,
+        month: int,
+        slots: Iterable[Tuple[date, int]],
+        generation: int
+    ) -> _MonthEntry:
+        """
+        Зберегти місяць, прочитаний з БД, як пари (дата, година).
+
+        generation - значення generation() на момент читання: якщо між читанням
+        і збереженням місяць змінився, дані застарілі і в кеш не потрапляють.
+        """
+        key = (year, month)
+        _, _, num_days = month_bounds(year, month)
+        masks = array("L", [0]) * num_days
+        for booking_date, booking_hour in slots:
+            masks[booking_date.day - 1] |= 1 << booking_hour
+        entry = _MonthEntry(masks, time.monotonic() + self.ttl)
+        with self._lock:
+            if self._generations.get(key, 0) == generation:
+                self._entries[key] = entry
+        return entry
+
+    def _touch(self, key: Tuple[int, int]) -> Optional[_MonthEntry]:
+        self._generations[key] = self._generations.get(key, 0) + 1
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.rendered = None
+            entry.body = None
+            entry.version = None
+        return entry
+
+    def add_listener(self, listener: Callable[[date, int, bool], None]) -> None:
+        """Викликати listener(дата, година, зайнята) при кожній зміні слота"""
+        self._listeners.append(listener)
+
+    def _notify(self, booking_date: date, booking_hour: int, booked: bool) -> None:
+        for listener in self._listeners:
+            listener(booking_date, booking_hour, booked)
+
+    def add_booking(self, booking_date: date, booking_hour: int) -> None:
+        """Позначити годину зайнятою (після створення бронювання)"""
+        with self._lock:
+            entry = self._touch((booking_date.year, booking_date.month))
+            if entry is not None:
+                entry.masks[booking_date.day - 1] |= 1 << booking_hour
+        self._notify(booking_date, booking_hour, True)
+
+    def remove_booking(self, booking_date: date, booking_hour: int) -> None:
+        """Звільнити годину (після видалення/скасування бронювання)"""
+        with self._lock:
+            entry = self._touch((booking_date.year, booking_date.month))
+            if entry is not None:
+                entry.masks[booking_date.day - 1] &= ~(1 << booking_hour)
+        self._notify(booking_date, booking_hour, False)
+
+    def invalidate(self, year: int, month: int) -> None:
+        """Видалити місяць з кешу"""
+        key = (year, month)
+        with self._lock:
+            self._touch(key)
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Очистити весь кеш"""
+        with self._lock:
+            for key in list(self._entries):
+                self._touch(key)
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Лічильники влучань/промахів"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations,
+            "cached_months": len(self._entries),
+            "ttl_seconds": self.ttl,
+        }
+
+
+def month_bounds(year: int, month: int) -> Tuple[date, date, int]:
+    """Перший і останній день місяця та кількість днів"""
+    _, num_days = calendar.monthrange(year, month)
+    return date(year, month, 1), date(year, month, num_days), num_days
+
+
+# Глобальний екземпляр
+availability_cache = MonthAvailabilityCache()
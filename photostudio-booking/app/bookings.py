@@ -0,0 +1,103 @@
+"""
+Запис бронювань: upsert клієнта і вставка бронювань з RETURNING
+"""
+from datetime import date
+from typing import List, Sequence, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+
+
+def dialect_insert(db: AsyncSession, model):
+    """INSERT з підтримкою ON CONFLICT для поточного діалекту"""
+    if db.bind.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+async def upsert_client(db: AsyncSession, name: str, phone: str) -> Row:
+    """
+    Знайти або створити клієнта за телефоном одним запитом.
+
+    Ім'я існуючого клієнта не змінюється. Повертає (id, name, phone, created_at).
+    """
+    stmt = dialect_insert(db, models.Client).values(name=name, phone=phone)
+    # DO UPDATE без фактичних змін - щоб RETURNING повернув і існуючий рядок
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.Client.phone],
+        set_={"phone": stmt.excluded.phone}
+    ).returning(
+        models.Client.id,
+        models.Client.name,
+        models.Client.phone,
+        models.Client.created_at
+    )
+    return (await db.execute(stmt)).one()
+
+
+async def insert_booking(
+    db: AsyncSession,
+    client_id: int,
+    booking_date: date,
+    booking_hour: int,
+    status: str = "pending"
+) -> Row:
+    """
+    Вставити бронювання, повертає (id, created_at).
+
+    Зайнятий слот - IntegrityError від uq_bookings_active_slot.
+    """
+    stmt = dialect_insert(db, models.Booking).values(
+        client_id=client_id,
+        booking_date=booking_date,
+        booking_hour=booking_hour,
+        status=status
+    ).returning(models.Booking.id, models.Booking.created_at)
+    return (await db.execute(stmt)).one()
+
+
+async def insert_bookings(
+    db: AsyncSession,
+    client_id: int,
+    slots: Sequence[Tuple[date, int]],
+    status: str = "pending"
+) -> List[Row]:
+    """
+    Вставити кілька бронювань одним INSERT, повертає (id, booking_date,
+    booking_hour, created_at) у порядку slots.
+
+    Хоч один зайнятий слот - IntegrityError, не вставляється жоден.
+    """
+    stmt = dialect_insert(db, models.Booking).values([
+        {
+            "client_id": client_id,
+            "booking_date": booking_date,
+            "booking_hour": booking_hour,
+            "status": status,
+        }
+        for booking_date, booking_hour in slots
+    ]).returning(
+        models.Booking.id,
+        models.Booking.booking_date,
+        models.Booking.booking_hour,
+        models.Booking.created_at
+    )
+    rows = {(row.booking_date, row.booking_hour): row for row in (await db.execute(stmt)).all()}
+    return [rows[slot] for slot in slots]
+
+
+async def taken_slots(db: AsyncSession, slots: Sequence[Tuple[date, int]]) -> List[Tuple[date, int]]:
+    """Які з slots вже зайняті активними бронюваннями"""
+    # Окремий IN по датах - пошук по індексу, а не повний перебір
+    result = await db.execute(
+        select(models.Booking.booking_date, models.Booking.booking_hour).where(
+            models.Booking.booking_date.in_(sorted({booking_date for booking_date, _ in slots})),
+            tuple_(models.Booking.booking_date, models.Booking.booking_hour).in_(list(slots)),
+            models.active_status_filter()
+        ).order_by(models.Booking.booking_date, models.Booking.booking_hour)
+    )
+    return [tuple(row) for row in result.all()]
@@ -0,0 +1,217 @@
+"""
+Стан діалогу вибору послуг у боті (start_services -> ... -> finalize)
+
+Один компактний типізований запис на користувача в таблиці bot_flow_states.
+Зміни накопичуються в пам'яті і записуються пачкою раз на
+BOT_STATE_FLUSH_INTERVAL секунд, тож рестарт посеред діалогу не змушує
+починати спочатку, а кожен апдейт не коштує окремого запису в БД.
+"""
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Awaitable, Dict, Optional
+
+from sqlalchemy import delete, select
+from telegram.ext import BaseUpdateProcessor
+
+from . import models
+from .bookings import dialect_insert
+from .database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+BOT_STATE_FLUSH_INTERVAL = float(os.getenv("BOT_STATE_FLUSH_INTERVAL", "2"))
+# Скільки користувачів тримати в пам'яті (LRU); решта читається з БД
+BOT_STATE_CACHE_SIZE = int(os.getenv("BOT_STATE_CACHE_SIZE", "10000"))
+
+
+class Step:
+    """Кроки діалогу"""
+    PEOPLE = 1          # 1/4: кнопки кількості людей
+    PEOPLE_INPUT = 2    # чекаємо число людей текстом
+    ZONE = 3            # 2/4: фотозона
+    ANIMALS = 4         # 3/4: тварини
+    ANIMALS_INPUT = 5   # чекаємо число тварин текстом
+    BG = 6              # 4/4: фон
+
+    TEXT_INPUT = (PEOPLE_INPUT, ANIMALS_INPUT)
+
+
+@dataclass(slots=True)
+class FlowState:
+    """Вибір послуг для одного бронювання"""
+    booking_id: int
+    step: int = Step.PEOPLE
+    people: int = 4
+    zone: Optional[str] = None
+    animals: int = 0
+    bg: Optional[str] = None
+
+
+class FlowStateStore:
+    """Обмежений LRU-кеш станів у пам'яті з пакетним записом у БД"""
+
+    def __init__(
+        self,
+        flush_interval: float = BOT_STATE_FLUSH_INTERVAL,
+        max_size: int = BOT_STATE_CACHE_SIZE,
+        session_factory=AsyncSessionLocal
+    ):
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.session_factory = session_factory
+        # None - користувач не в діалозі (теж кешується, щоб не читати БД)
+        self._states: "OrderedDict[int, Optional[FlowState]]" = OrderedDict()
+        self._dirty: set = set()
+        self._task: Optional[asyncio.Task] = None
+
+    async def get(self, user_id: int) -> Optional[FlowState]:
+        """Стан користувача (з БД при першому зверненні)"""
+        if user_id in self._states:
+            self._states.move_to_end(user_id)
+            return self._states[user_id]
+        async with self.session_factory() as db:
+            row = await db.scalar(
+                select(models.BotFlowState).where(models.BotFlowState.user_id == user_id)
+            )
+        state = None
+        if row is not None:
+            state = FlowState(
+                booking_id=row.booking_id,
+                step=row.step,
+                people=row.people,
+                zone=row.zone,
+                animals=row.animals,
+                bg=row.bg
+            )
+        # Якщо поки читали, стан вже змінили - не перезаписувати
+        if user_id in self._states:
+            return self._states[user_id]
+        self._remember(user_id, state)
+        return state
+
+    def save(self, user_id: int, state: FlowState) -> None:
+        """Позначити стан зміненим (запишеться з наступним flush)"""
+        self._mark_dirty(user_id)
+        self._remember(user_id, state)
+
+    def clear(self, user_id: int) -> None:
+        """Завершити діалог користувача"""
+        self._mark_dirty(user_id)
+        self._remember(user_id, None)
+
+    def _remember(self, user_id: int, state: Optional[FlowState]) -> None:
+        self._states[user_id] = state
+        self._states.move_to_end(user_id)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Витіснити найдавніші записані стани понад max_size (незаписані чекають flush)"""
+        while len(self._states) > self.max_size:
+            for user_id in self._states:
+                if user_id not in self._dirty:
+                    del self._states[user_id]
+                    break
+            else:
+                return
+
+    def _mark_dirty(self, user_id: int) -> None:
+        self._dirty.add(user_id)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while self._dirty:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Записати всі змінені стани одним upsert + одним delete"""
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        now = datetime.utcnow()
+        upserts = [
+            {"user_id": user_id, "updated_at": now, **asdict(self._states[user_id])}
+            for user_id in dirty if self._states.get(user_id) is not None
+        ]
+        deletes = [user_id for user_id in dirty if self._states.get(user_id) is None]
+        try:
+            async with self.session_factory() as db:
+                if upserts:
+                    stmt = dialect_insert(db, models.BotFlowState).values(upserts)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[models.BotFlowState.user_id],
+                        set_={
+                            column: stmt.excluded[column]
+                            for column in upserts[0] if column != "user_id"
+                        }
+                    )
+                    await db.execute(stmt)
+                if deletes:
+                    await db.execute(
+                        delete(models.BotFlowState).where(models.BotFlowState.user_id.in_(deletes))
+                    )
+                await db.commit()
+        except Exception as e:
+            # Повторимо з наступним flush
+            self._dirty |= dirty
+            logger.error(f"❌ Не вдалося зберегти стан діалогів: {e}")
+            return
+        self._evict()
+
+    async def close(self) -> None:
+        """Зупинити фоновий flush і записати залишок"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Апдейти різних користувачів - паралельно, одного користувача - по черзі.
+
+    Хендлери читають, змінюють і зберігають FlowState; два швидкі натискання
+    одного користувача не повинні перемежовуватись.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._pending: Dict[int, int] = {}  # апдейти користувача в обробці/черзі
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        user = getattr(update, "effective_user", None)
+        if user is None:
+            await coroutine
+            return
+        lock = self._locks.get(user.id)
+        if lock is None:
+            lock = self._locks[user.id] = asyncio.Lock()
+        self._pending[user.id] = self._pending.get(user.id, 0) + 1
+        try:
+            async with lock:
+                await coroutine
+        finally:
+            self._pending[user.id] -= 1
+            if not self._pending[user.id]:
+                del self._pending[user.id]
+                del self._locks[user.id]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+
+# Глобальний екземпляр
+flow_states = FlowStateStore()
@@ -1,280 +1,265 @@
+"""
+Email: шаблони jinja2 і відправка через пул постійних SMTP-з'єднань
+
+Шаблони (app/templates/email) компілюються один раз при імпорті. Листи
+стають у чергу; кожен воркер пулу тримає своє з'єднання і відправляє по
+ньому пачки листів, тому тисяча листів - це кілька TLS-рукостискань, а не
+тисяча. Повна черга змушує відправника чекати (backpressure).
+
+Локальний SMTP-приймач для перевірки (листи друкуються в консоль):
+    python -m aiosmtpd -n -l localhost:1025
+    MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_STARTTLS=false
+"""
+import asyncio
+import logging
 import os
+import time
+from email.message import EmailMessage
+from email.utils import formataddr
 from pathlib import Path
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
+from typing import Iterable, List, Optional
+
+import aiosmtplib
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 from pydantic import EmailStr
-from jinja2 import Environment, FileSystemLoader
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Email configuration
-conf = ConnectionConfig(
-    MAIL_USERNAME=os.getenv("MAIL_USERNAME", ""),
-    MAIL_PASSWORD=os.getenv("MAIL_PASSWORD", ""),
-    MAIL_FROM=os.getenv("MAIL_FROM", "noreply@photostudio.com"),
-    MAIL_PORT=int(os.getenv("MAIL_PORT", "587")),
-    MAIL_SERVER=os.getenv("MAIL_SERVER", "smtp.gmail.com"),
-    MAIL_FROM_NAME=os.getenv("MAIL_FROM_NAME", "Photo Studio Booking"),
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=Path(__file__).parent / "templates"
+MAIL_USERNAME = os.getenv("MAIL_USERNAME", "")
+MAIL_PASSWORD = os.getenv("MAIL_PASSWORD", "")
+MAIL_FROM = os.getenv("MAIL_FROM", "noreply@photostudio.com")
+MAIL_FROM_NAME = os.getenv("MAIL_FROM_NAME", "Photo Studio Booking")
+MAIL_SERVER = os.getenv("MAIL_SERVER", "smtp.gmail.com")
+MAIL_PORT = int(os.getenv("MAIL_PORT", "587"))
+MAIL_STARTTLS = os.getenv("MAIL_STARTTLS", "true").lower() in ("1", "true", "yes")
+MAIL_SSL_TLS = os.getenv("MAIL_SSL_TLS", "false").lower() in ("1", "true", "yes")
+MAIL_VALIDATE_CERTS = os.getenv("MAIL_VALIDATE_CERTS", "true").lower() in ("1", "true", "yes")
+MAIL_TIMEOUT = float(os.getenv("MAIL_TIMEOUT", "30"))
+
+# Пул з'єднань
+MAIL_POOL_SIZE = int(os.getenv("MAIL_POOL_SIZE", "2"))
+MAIL_QUEUE_SIZE = int(os.getenv("MAIL_QUEUE_SIZE", "500"))
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", "50"))
+# Після стількох листів з'єднання відкривається заново (ліміти провайдерів)
+MAIL_MAX_PER_CONNECTION = int(os.getenv("MAIL_MAX_PER_CONNECTION", "100"))
+# Простій, після якого з'єднання закривається
+MAIL_IDLE_TIMEOUT = float(os.getenv("MAIL_IDLE_TIMEOUT", "30"))
+
+FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:8000")
+
+# Шаблони компілюються один раз; auto_reload вимкнено - без stat() на кожен лист
+TEMPLATE_DIR = Path(__file__).parent / "templates" / "email"
+_jinja = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
 )
+TEMPLATES = {
+    name: _jinja.get_template(name)
+    for name in ("verification.html", "password_reset.html", "booking_confirmation.html")
+}
+
+
+def render(template: str, **context) -> str:
+    """HTML листа з попередньо скомпільованого шаблону"""
+    return TEMPLATES[template].render(**context)
+
+
+def build_message(recipient: str, subject: str, html: str) -> EmailMessage:
+    """HTML-лист одному отримувачу"""
+    message = EmailMessage()
+    message["From"] = formataddr((MAIL_FROM_NAME, MAIL_FROM))
+    message["To"] = recipient
+    message["Subject"] = subject
+    message.set_content(html, subtype="html")
+    return message
+
+
+class SmtpPool:
+    """Черга листів і воркери, кожен з постійним SMTP-з'єднанням"""
+
+    def __init__(
+        self,
+        size: int = MAIL_POOL_SIZE,
+        queue_size: int = MAIL_QUEUE_SIZE,
+        batch_size: int = MAIL_BATCH_SIZE,
+        max_per_connection: int = MAIL_MAX_PER_CONNECTION,
+        idle_timeout: float = MAIL_IDLE_TIMEOUT
+    ):
+        self.size = size
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.max_per_connection = max_per_connection
+        self.idle_timeout = idle_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.sent = 0
+        self.failed = 0
+        self.connections = 0
+        self.batches = 0
+        self.max_queued = 0
+        self.send_seconds = 0.0
+
+    def _ensure_started(self) -> None:
+        """Запустити воркери в поточному event loop (ліниво, при першому листі)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(self.queue_size)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.size)]
+
+    async def submit(self, message: EmailMessage) -> asyncio.Future:
+        """Поставити лист у чергу (чекає, поки є місце); future - результат відправки"""
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((message, future))
+        self.max_queued = max(self.max_queued, self._queue.qsize())
+        return future
+
+    async def send(self, message: EmailMessage) -> None:
+        """Відправити лист і дочекатися результату"""
+        await (await self.submit(message))
+
+    async def send_many(self, messages: Iterable[EmailMessage]) -> List[Optional[Exception]]:
+        """Відправити багато листів; для кожного None або помилка"""
+        futures = [await self.submit(message) for message in messages]
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=MAIL_SERVER,
+            port=MAIL_PORT,
+            use_tls=MAIL_SSL_TLS,
+            start_tls=MAIL_STARTTLS,
+            validate_certs=MAIL_VALIDATE_CERTS,
+            timeout=MAIL_TIMEOUT,
+        )
+        await smtp.connect()
+        if MAIL_USERNAME:
+            await smtp.login(MAIL_USERNAME, MAIL_PASSWORD)
+        self.connections += 1
+        return smtp
+
+    @staticmethod
+    async def _quit(smtp: Optional[aiosmtplib.SMTP]) -> None:
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            smtp.close()
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        smtp: Optional[aiosmtplib.SMTP] = None
+        sent_on_connection = 0
+        try:
+            while True:
+                try:
+                    job = await asyncio.wait_for(
+                        queue.get(), timeout=self.idle_timeout if smtp is not None else None
+                    )
+                except asyncio.TimeoutError:
+                    await self._quit(smtp)
+                    smtp = None
+                    continue
+                if job is None:
+                    return
+
+                # Пачка: все, що вже чекає в черзі, по тому ж з'єднанню
+                batch = [job]
+                while len(batch) < self.batch_size and not queue.empty():
+                    job = queue.get_nowait()
+                    if job is None:
+                        queue.put_nowait(None)
+                        break
+                    batch.append(job)
+                self.batches += 1
+
+                started = time.perf_counter()
+                for message, future in batch:
+                    # Друга спроба - лише якщо сервер закрив з'єднання
+                    for attempt in (1, 2):
+                        try:
+                            if smtp is None or not smtp.is_connected or sent_on_connection >= self.max_per_connection:
+                                await self._quit(smtp)
+                                smtp = await self._connect()
+                                sent_on_connection = 0
+                            await smtp.send_message(message)
+                            sent_on_connection += 1
+                            self.sent += 1
+                            if not future.done():
+                                future.set_result(None)
+                            break
+                        except (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, ConnectionError) as e:
+                            smtp = None
+                            if attempt == 2:
+                                self._fail(future, e)
+                        except Exception as e:
+                            self._fail(future, e)
+                            break
+                    queue.task_done()
+                self.send_seconds += time.perf_counter() - started
+        finally:
+            await self._quit(smtp)
+
+    def _fail(self, future: asyncio.Future, error: Exception) -> None:
+        self.failed += 1
+        if not future.done():
+            future.set_exception(error)
+
+    async def close(self) -> None:
+        """Дочекатися відправки черги і закрити з'єднання"""
+        if not self._workers:
+            return
+        for _ in self._workers:
+            await self._queue.put(None)
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> dict:
+        """Лічильники відправки і стан черги"""
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queued": self.max_queued,
+            "queue_size": self.queue_size,
+            "sent": self.sent,
+            "failed": self.failed,
+            "connections": self.connections,
+            "batches": self.batches,
+            "avg_send_ms": round(self.send_seconds / self.sent * 1000, 2) if self.sent else 0.0,
+        }
+
+
+# Глобальний екземпляр
+mail_pool = SmtpPool()
+
+
+async def _send(message: EmailMessage) -> None:
+    """Відправити лист; помилка SMTP логується (лист шлеться у фоні після відповіді)"""
+    try:
+        await mail_pool.send(message)
+    except Exception as e:
+        logger.error(f"❌ Не вдалося відправити email {message['To']}: {e}")
 
 async def send_verification_email(email: EmailStr, token: str, username: str):
     """Відправити email для верифікації"""
-    frontend_url = os.getenv("FRONTEND_URL", "http://localhost:8000")
-    verification_url = f"{frontend_url}/verify-email?token={token}"
-    
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <style>
-            body {{
-                font-family: Arial, sans-serif;
-                line-height: 1.6;
-                color: #333;
-            }}
-            .container {{
-                max-width: 600px;
-                margin: 0 auto;
-                padding: 20px;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            }}
-            .content {{
-                background: white;
-                padding: 40px;
-                border-radius: 10px;
-            }}
-            h1 {{
-                color: #667eea;
-            }}
-            .button {{
-                display: inline-block;
-                padding: 15px 30px;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                text-decoration: none;
-                border-radius: 5px;
-                margin: 20px 0;
-            }}
-            .footer {{
-                text-align: center;
-                margin-top: 20px;
-                color: white;
-                font-size: 12px;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="content">
-                <h1>📸 Вітаємо в Фотостудії!</h1>
-                <p>Привіт, {username}!</p>
-                <p>Дякуємо за реєстрацію. Будь ласка, підтвердіть свою електронну адресу, натиснувши кнопку нижче:</p>
-                <a href="{verification_url}" class="button">Підтвердити Email</a>
-                <p>Або скопіюйте посилання:</p>
-                <p style="word-break: break-all; color: #667eea;">{verification_url}</p>
-                <p>Це посилання дійсне протягом 24 годин.</p>
-                <p>Якщо ви не реєструвалися на нашому сайті, просто ігноруйте цей лист.</p>
-            </div>
-            <div class="footer">
-                <p>© 2025 Photo Studio. Всі права захищені.</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    message = MessageSchema(
-        subject="Підтвердження реєстрації - Photo Studio",
-        recipients=[email],
-        body=html_content,
-        subtype=MessageType.html
-    )
-    
-    fm = FastMail(conf)
-    await fm.send_message(message)
+    html = render("verification.html", username=username, url=f"{FRONTEND_URL}/verify-email?token={token}")
+    await _send(build_message(email, "Підтвердження реєстрації - Photo Studio", html))
 
 async def send_password_reset_email(email: EmailStr, token: str, username: str):
     """Відправити email для скидання пароля"""
-    frontend_url = os.getenv("FRONTEND_URL", "http://localhost:8000")
-    reset_url = f"{frontend_url}/reset-password?token={token}"
-    
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <style>
-            body {{
-                font-family: Arial, sans-serif;
-                line-height: 1.6;
-                color: #333;
-            }}
-            .container {{
-                max-width: 600px;
-                margin: 0 auto;
-                padding: 20px;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            }}
-            .content {{
-                background: white;
-                padding: 40px;
-                border-radius: 10px;
-            }}
-            h1 {{
-                color: #667eea;
-            }}
-            .button {{
-                display: inline-block;
-                padding: 15px 30px;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                text-decoration: none;
-                border-radius: 5px;
-                margin: 20px 0;
-            }}
-            .warning {{
-                background: #fff3cd;
-                padding: 15px;
-                border-left: 4px solid #ffc107;
-                margin: 20px 0;
-            }}
-            .footer {{
-                text-align: center;
-                margin-top: 20px;
-                color: white;
-                font-size: 12px;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="content">
-                <h1>🔐 Скидання пароля</h1>
-                <p>Привіт, {username}!</p>
-                <p>Ми отримали запит на скидання пароля для вашого акаунту.</p>
-                <p>Натисніть кнопку нижче, щоб встановити новий пароль:</p>
-                <a href="{reset_url}" class="button">Скинути пароль</a>
-                <p>Або скопіюйте посилання:</p>
-                <p style="word-break: break-all; color: #667eea;">{reset_url}</p>
-                <div class="warning">
-                    <strong>⚠️ Важливо:</strong> Це посилання дійсне лише протягом 1 години.
-                </div>
-                <p>Якщо ви не запитували скидання пароля, просто проігноруйте цей лист. Ваш пароль залишиться без змін.</p>
-            </div>
-            <div class="footer">
-                <p>© 2025 Photo Studio. Всі права захищені.</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    message = MessageSchema(
-        subject="Скидання пароля - Photo Studio",
-        recipients=[email],
-        body=html_content,
-        subtype=MessageType.html
-    )
-    
-    fm = FastMail(conf)
-    await fm.send_message(message)
+    html = render("password_reset.html", username=username, url=f"{FRONTEND_URL}/reset-password?token={token}")
+    await _send(build_message(email, "Скидання пароля - Photo Studio", html))
 
 async def send_booking_confirmation_email(email: EmailStr, booking_details: dict):
     """Відправити підтвердження бронювання"""
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <style>
-            body {{
-                font-family: Arial, sans-serif;
-                line-height: 1.6;
-                color: #333;
-            }}
-            .container {{
-                max-width: 600px;
-                margin: 0 auto;
-                padding: 20px;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            }}
-            .content {{
-                background: white;
-                padding: 40px;
-                border-radius: 10px;
-            }}
-            h1 {{
-                color: #667eea;
-            }}
-            .booking-info {{
-                background: #f8f9fa;
-                padding: 20px;
-                border-radius: 8px;
-                margin: 20px 0;
-            }}
-            .info-row {{
-                display: flex;
-                justify-content: space-between;
-                padding: 10px 0;
-                border-bottom: 1px solid #e0e0e0;
-            }}
-            .info-label {{
-                font-weight: bold;
-                color: #667eea;
-            }}
-            .footer {{
-                text-align: center;
-                margin-top: 20px;
-                color: white;
-                font-size: 12px;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="content">
-                <h1>✅ Бронювання підтверджено!</h1>
-                <p>Привіт, {booking_details['name']}!</p>
-                <p>Ваше бронювання успішно підтверджено.</p>
-                
-                <div class="booking-info">
-                    <h3>Деталі бронювання:</h3>
-                    <div class="info-row">
-                        <span class="info-label">Дата:</span>
-                        <span>{booking_details['date']}</span>
-                    </div>
-                    <div class="info-row">
-                        <span class="info-label">Час:</span>
-                        <span>{booking_details['time']}</span>
-                    </div>
-                    <div class="info-row">
-                        <span class="info-label">Телефон:</span>
-                        <span>{booking_details['phone']}</span>
-                    </div>
-                </div>
-                
-                <p>Очікуємо на вас! У разі потреби змін, зв'яжіться з нами.</p>
-            </div>
-            <div class="footer">
-                <p>© 2025 Photo Studio. Всі права захищені.</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    message = MessageSchema(
-        subject="Підтвердження бронювання - Photo Studio",
-        recipients=[email],
-        body=html_content,
-        subtype=MessageType.html
-    )
-    
-    fm = FastMail(conf)
-    await fm.send_message(message)
+    html = render("booking_confirmation.html", booking=booking_details)
+    await _send(build_message(email, "Підтвердження бронювання - Photo Studio", html))
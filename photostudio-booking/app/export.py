@@ -0,0 +1,129 @@
+"""
+Keyset-пагінація та потоковий експорт бронювань для адміна
+"""
+import base64
+import csv
+import io
+import json
+from datetime import date
+from typing import AsyncIterator, Optional, Tuple
+
+from sqlalchemy import select, tuple_, and_
+
+from . import models
+from .database import AsyncSessionLocal
+
+# Скільки рядків тягнути з серверного курсора за раз
+EXPORT_BATCH_SIZE = 500
+
+EXPORT_FIELDS = [
+    "id",
+    "booking_date",
+    "booking_hour",
+    "status",
+    "created_at",
+    "client_id",
+    "client_name",
+    "client_phone",
+    "people_count",
+    "zone_choice",
+    "animals_count",
+    "background_choice",
+    "total_price",
+]
+
+# Порядок сторінок і експорту: (booking_date, booking_hour, id)
+KEYSET_ORDER = (models.Booking.booking_date, models.Booking.booking_hour, models.Booking.id)
+
+
+def encode_cursor(booking: models.Booking) -> str:
+    """Курсор на бронювання (після якого починається наступна сторінка)"""
+    raw = f"{booking.booking_date.isoformat()}|{booking.booking_hour}|{booking.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int, int]:
+    """Розібрати курсор; ValueError якщо він пошкоджений"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        booking_date, booking_hour, booking_id = raw.split("|")
+        return date.fromisoformat(booking_date), int(booking_hour), int(booking_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Невірний курсор") from e
+
+
+def date_range_filter(start_date: Optional[date], end_date: Optional[date]):
+    """Умова WHERE для діапазону дат"""
+    conditions = []
+    if start_date:
+        conditions.append(models.Booking.booking_date >= start_date)
+    if end_date:
+        conditions.append(models.Booking.booking_date <= end_date)
+    return and_(True, *conditions)
+
+
+def after_cursor_filter(cursor: str):
+    """Умова WHERE для рядків після курсора"""
+    return tuple_(*KEYSET_ORDER) > tuple_(*decode_cursor(cursor))
+
+
+def _export_query(start_date: Optional[date], end_date: Optional[date]):
+    """Плоскі рядки бронювань з клієнтом, без ORM-об'єктів"""
+    return (
+        select(
+            models.Booking.id,
+            models.Booking.booking_date,
+            models.Booking.booking_hour,
+            models.Booking.status,
+            models.Booking.created_at,
+            models.Booking.client_id,
+            models.Client.name.label("client_name"),
+            models.Client.phone.label("client_phone"),
+            models.Booking.people_count,
+            models.Booking.zone_choice,
+            models.Booking.animals_count,
+            models.Booking.background_choice,
+            models.Booking.total_price,
+        )
+        .join(models.Client, models.Client.id == models.Booking.client_id)
+        .where(date_range_filter(start_date, end_date))
+        .order_by(*KEYSET_ORDER)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+
+async def _stream_rows(start_date: Optional[date], end_date: Optional[date]):
+    # Окрема сесія: відповідь стрімиться вже після виходу з ендпоінта
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(_export_query(start_date, end_date))
+        async for partition in result.partitions():
+            yield partition
+
+
+def _json_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+async def stream_ndjson(start_date: Optional[date], end_date: Optional[date]) -> AsyncIterator[str]:
+    """Експорт у форматі NDJSON (один JSON-об'єкт на рядок)"""
+    async for partition in _stream_rows(start_date, end_date):
+        yield "".join(
+            json.dumps(
+                {field: _json_value(value) for field, value in zip(EXPORT_FIELDS, row)},
+                ensure_ascii=False
+            ) + "\n"
+            for row in partition
+        )
+
+
+async def stream_csv(start_date: Optional[date], end_date: Optional[date]) -> AsyncIterator[str]:
+    """Експорт у форматі CSV"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.getvalue()
+    async for partition in _stream_rows(start_date, end_date):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(partition)
+        yield buffer.getvalue()
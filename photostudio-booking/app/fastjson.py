@@ -0,0 +1,99 @@
+"""
+Швидкий JSON для спискових ендпоінтів (опційно, FAST_JSON=true)
+
+Замість ORM-об'єктів -> валідація response_model -> json.dumps рядки
+запиту одразу складаються в dict за фіксованою схемою полів і кодуються
+orjson. Формат відповіді той самий, що у schemas.BookingResponse /
+DayStatusResponse / ClientResponse.
+"""
+import os
+from typing import Iterable, List, Optional
+
+from fastapi import Response
+from sqlalchemy import select
+
+from . import models
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() in ("1", "true", "yes")
+
+
+def enabled() -> bool:
+    """Чи увімкнено швидкий шлях (і чи встановлено orjson)"""
+    return FAST_JSON and orjson is not None
+
+
+# Колонки рядка бронювання; індекси нижче відповідають цьому порядку
+BOOKING_COLUMNS = (
+    models.Booking.id,
+    models.Booking.booking_date,
+    models.Booking.booking_hour,
+    models.Booking.created_at,
+    models.Booking.status,
+    models.Client.id.label("client_id"),
+    models.Client.name.label("client_name"),
+    models.Client.phone.label("client_phone"),
+    models.Client.created_at.label("client_created_at"),
+)
+
+CLIENT_COLUMNS = (
+    models.Client.name,
+    models.Client.phone,
+    models.Client.id,
+    models.Client.created_at,
+)
+
+
+def booking_rows_query():
+    """SELECT плоских рядків бронювання з клієнтом (без ORM-об'єктів)"""
+    return select(*BOOKING_COLUMNS).join(models.Client, models.Client.id == models.Booking.client_id)
+
+
+def client_rows_query():
+    return select(*CLIENT_COLUMNS)
+
+
+def dump_bookings(rows: Iterable[tuple]) -> bytes:
+    """Список BookingResponse з рядків booking_rows_query()"""
+    return orjson.dumps([
+        {
+            "id": row[0],
+            "booking_date": row[1],
+            "booking_hour": row[2],
+            "created_at": row[3],
+            "client": {"name": row[6], "phone": row[7], "id": row[5], "created_at": row[8]},
+            "telegram_link": None,
+            "status": row[4],
+        }
+        for row in rows
+    ])
+
+
+def dump_clients(rows: Iterable[tuple]) -> bytes:
+    """Список ClientResponse з рядків client_rows_query()"""
+    return orjson.dumps([
+        {"name": row[0], "phone": row[1], "id": row[2], "created_at": row[3]}
+        for row in rows
+    ])
+
+
+def dump_day_statuses(days: List[tuple]) -> bytes:
+    """Список DayStatusResponse з кортежів (date, booked_hours, available_hours)"""
+    return orjson.dumps([
+        {
+            "date": day,
+            "has_bookings": bool(booked_hours),
+            "available_hours": available_hours,
+            "booked_hours": booked_hours,
+        }
+        for day, booked_hours, available_hours in days
+    ])
+
+
+def json_response(body: bytes, headers: Optional[dict] = None) -> Response:
+    """Готові байти JSON як відповідь (в обхід response_model)"""
+    return Response(body, media_type="application/json", headers=headers)
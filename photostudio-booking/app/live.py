@@ -0,0 +1,158 @@
+"""
+Live-оновлення доступності через Server-Sent Events
+
+Кожна зміна слота в availability_cache (створення, видалення, скасування в
+боті) розсилається підписникам відповідного місяця. Подія серіалізується
+один раз і кладеться в черги підписників без очікування: повільний клієнт,
+чия черга переповнена, відключається і після переп'єднання отримує resync.
+
+ID подій мають вигляд "<epoch>-<n>": лічильник n живе лише в цьому процесі,
+тож ID з іншого процесу (рестарт, інший воркер) теж означає resync.
+"""
+import asyncio
+import json
+import os
+import secrets
+from collections import deque
+from datetime import date
+from typing import AsyncIterator, Deque, Dict, Optional, Set, Tuple
+
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "64"))
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+# Скільки останніх подій пам'ятати для переп'єднання з Last-Event-ID
+LIVE_REPLAY_SIZE = 256
+
+MonthKey = Tuple[int, int]
+
+_RESYNC = b"event: resync\ndata: {}\n\n"
+_HEARTBEAT = b": ping\n\n"
+
+
+class _Subscriber:
+    __slots__ = ("month", "queue", "dropped")
+
+    def __init__(self, month: Optional[MonthKey], queue_size: int):
+        self.month = month
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.dropped = False
+
+
+class AvailabilityFeed:
+    """Розсилка змін слотів підписникам по місяцях"""
+
+    def __init__(
+        self,
+        queue_size: int = LIVE_QUEUE_SIZE,
+        heartbeat: float = LIVE_HEARTBEAT_SECONDS,
+        replay_size: int = LIVE_REPLAY_SIZE
+    ):
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        # None - підписники на всі місяці (адмінка)
+        self._subscribers: Dict[Optional[MonthKey], Set[_Subscriber]] = {}
+        self._recent: Deque[Tuple[int, MonthKey, bytes]] = deque(maxlen=replay_size)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.epoch = secrets.token_hex(4)
+        self.last_id = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Event loop, в якому живуть черги підписників"""
+        self._loop = loop
+
+    def slot_changed(self, booking_date: date, booking_hour: int, booked: bool) -> None:
+        """Слухач availability_cache; можна викликати з будь-якого потоку"""
+        if self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self.publish(booking_date, booking_hour, booked)
+        else:
+            self._loop.call_soon_threadsafe(self.publish, booking_date, booking_hour, booked)
+
+    def publish(self, booking_date: date, booking_hour: int, booked: bool) -> None:
+        """Розіслати зміну слота підписникам місяця і всіх місяців"""
+        self.last_id += 1
+        month = (booking_date.year, booking_date.month)
+        data = json.dumps({"date": booking_date.isoformat(), "hour": booking_hour, "booked": booked})
+        frame = f"id: {self.epoch}-{self.last_id}\nevent: slot\ndata: {data}\n\n".encode()
+        self._recent.append((self.last_id, month, frame))
+        self.published += 1
+        for key in (month, None):
+            for subscriber in self._subscribers.get(key, ()):
+                if subscriber.dropped:
+                    continue
+                try:
+                    subscriber.queue.put_nowait(frame)
+                    self.delivered += 1
+                except asyncio.QueueFull:
+                    subscriber.dropped = True
+                    self.dropped += 1
+
+    def _replay(self, month: Optional[MonthKey], last_event_id: Optional[str]) -> list:
+        """Пропущені події після last_event_id або [resync], якщо їх вже немає"""
+        if not last_event_id:
+            return []
+        epoch, _, counter = last_event_id.partition("-")
+        try:
+            after = int(counter)
+        except ValueError:
+            return [_RESYNC]
+        # ID іншого процесу або "з майбутнього" - історії для нього тут немає
+        if epoch != self.epoch or after > self.last_id:
+            return [_RESYNC]
+        if after == self.last_id:
+            return []
+        if not self._recent or self._recent[0][0] > after + 1:
+            return [_RESYNC]
+        return [
+            frame for event_id, event_month, frame in self._recent
+            if event_id > after and (month is None or event_month == month)
+        ]
+
+    async def subscribe(
+        self,
+        month: Optional[MonthKey] = None,
+        last_event_id: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """Потік SSE-кадрів для одного клієнта"""
+        subscriber = _Subscriber(month, self.queue_size)
+        self._subscribers.setdefault(month, set()).add(subscriber)
+        try:
+            # Порада браузеру, через скільки переп'єднуватись
+            yield b"retry: 3000\n\n"
+            for frame in self._replay(month, last_event_id):
+                yield frame
+            while not subscriber.dropped:
+                try:
+                    yield await asyncio.wait_for(subscriber.queue.get(), timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield _HEARTBEAT
+            # Відстав - хай переп'єднається і перезавантажить місяць
+            yield _RESYNC
+        finally:
+            subscribers = self._subscribers.get(month)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[month]
+
+    def stats(self) -> dict:
+        """Кількість підписників і лічильники подій"""
+        return {
+            "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "months": len(self._subscribers),
+            "last_event_id": f"{self.epoch}-{self.last_id}",
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+# Глобальний екземпляр
+availability_feed = AvailabilityFeed()
@@ -1,35 +1,133 @@
-from fastapi import FastAPI, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from typing import List
+from typing import List, Optional
 from datetime import date, timedelta, datetime
-import calendar
+import asyncio
+import logging
 import os
 
 from . import models, schemas
-from .database import engine, get_db
+from .routers import telegram as telegram_webhook
+from .routers import auth as user_auth
+from .database import engine, get_db, get_pool_status
 from .auth import verify_password, create_access_token, get_current_admin
+from .token_cache import token_cache
+from .security import password_hasher
+from .email_service import mail_pool
+from .reminders import reminder_scheduler
 from .telegram_service import telegram_notifier
-
-# Створення таблиць
-models.Base.metadata.create_all(bind=engine)
+from .telegram_sender import telegram_sender
+from .bookings import upsert_client, insert_booking, insert_bookings, taken_slots
+from .pricing import quote_batch, price_expression, rules_table
+from .live import availability_feed
+from .messages import format_slot
+from .static_assets import static_assets, PAGES
+from . import fastjson
+from .outbox import outbox_worker, enqueue_notification
+from .export import (
+    KEYSET_ORDER,
+    encode_cursor,
+    after_cursor_filter,
+    date_range_filter,
+    stream_ndjson,
+    stream_csv,
+)
+from .availability import (
+    availability_cache,
+    month_bounds,
+    mask_to_hours,
+    available_mask,
+    ACTIVE_STATUSES,
+    WORK_HOURS,
+)
 
 app = FastAPI(title="Photo Studio Booking System", version="1.0.0")
 
+@app.on_event("startup")
+async def create_tables():
+    """Створення таблиць"""
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+
+@app.on_event("startup")
+def load_static_assets():
+    # Зібрати/прочитати стиснену статику; без неї сторінки віддаються як є
+    try:
+        static_assets.load()
+    except Exception as e:
+        logging.getLogger(__name__).error(f"⚠️ Не вдалося зібрати статику: {e}")
+
+@app.on_event("startup")
+async def start_availability_feed():
+    # Зміни слотів з кешу (сайт і бот у режимі webhook) йдуть у SSE
+    availability_feed.attach(asyncio.get_running_loop())
+    availability_cache.add_listener(availability_feed.slot_changed)
+
+@app.on_event("startup")
+async def start_outbox_worker():
+    """Запустити доставку Telegram сповіщень з outbox"""
+    if telegram_notifier.bot and telegram_notifier.admin_chat_ids:
+        outbox_worker.start()
+
+@app.on_event("shutdown")
+async def stop_outbox_worker():
+    await outbox_worker.stop()
+
+@app.on_event("startup")
+async def start_reminders():
+    """Нагадування клієнтам: черга з БД, далі - зміни слотів з кешу"""
+    if telegram_notifier.bot:
+        await reminder_scheduler.start()
+        availability_cache.add_listener(reminder_scheduler.slot_changed)
+
+@app.on_event("shutdown")
+async def stop_reminders():
+    await reminder_scheduler.stop()
+
+@app.on_event("startup")
+async def start_telegram_webhook():
+    """Режим webhook: бот працює в цьому процесі"""
+    if telegram_webhook.webhook_enabled():
+        await telegram_webhook.start_webhook()
+
+@app.on_event("shutdown")
+async def stop_telegram_webhook():
+    await telegram_webhook.stop_webhook()
+
+@app.on_event("shutdown")
+async def stop_mail_pool():
+    # Дочекатися листів у черзі і закрити SMTP-з'єднання
+    await mail_pool.close()
+
+app.include_router(telegram_webhook.router)
+app.include_router(user_auth.router)
+
 # Статичні файли
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 @app.get("/")
-async def root():
+async def root(request: Request):
     """Головна сторінка з календарем (для користувачів)"""
-    return FileResponse("static/index.html")
+    await static_assets.refresh()
+    return static_assets.response("index.html", request) or FileResponse("static/index.html")
 
 @app.get("/admin")
-async def admin_page():
+async def admin_page(request: Request):
     """Сторінка адміністратора"""
-    return FileResponse("static/admin.html")
+    await static_assets.refresh()
+    return static_assets.response("admin.html", request) or FileResponse("static/admin.html")
+
+@app.get("/assets/{name}")
+async def static_asset(name: str, request: Request):
+    """Зібрані CSS/JS з хешем в імені (кешуються назавжди)"""
+    response = None if name in PAGES else static_assets.response(name, request, immutable=True)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Файл не знайдено")
+    return response
 
 # Admin Authentication
 @app.post("/api/admin/login", response_model=schemas.LoginResponse)
@@ -47,182 +145,265 @@ def admin_login(login_data: schemas.LoginRequest):
 @app.post("/api/bookings/", response_model=schemas.BookingResponse, status_code=201)
 async def create_booking(
     booking: schemas.BookingCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Створити нове бронювання з переадресацією на Telegram"""
     
-    # Перевірити, чи година вже зайнята
-    existing_booking = db.query(models.Booking).filter(
-        models.Booking.booking_date == booking.booking_date,
-        models.Booking.booking_hour == booking.booking_hour,
-        models.Booking.status.in_(['pending', 'confirmed', 'paid'])
-    ).first()
-    
-    if existing_booking:
-        raise HTTPException(status_code=400, detail="Ця година вже зайнята")
-    
+    # Зайнятість години перевіряє сама БД (uq_bookings_active_slot)
     try:
-        # Знайти або створити клієнта
-        client = db.query(models.Client).filter(
-            models.Client.phone == booking.phone
-        ).first()
-        
-        if not client:
-            client = models.Client(name=booking.name, phone=booking.phone)
-            db.add(client)
-            db.flush()
+        # Знайти або створити клієнта і створити бронювання зі статусом pending
+        client = await upsert_client(db, booking.name, booking.phone)
+        db_booking = await insert_booking(db, client.id, booking.booking_date, booking.booking_hour)
         
-        # Створити бронювання зі статусом pending
-        db_booking = models.Booking(
-            client_id=client.id,
-            booking_date=booking.booking_date,
-            booking_hour=booking.booking_hour,
-            status="pending"
+        # 🤖 TELEGRAM СПОВІЩЕННЯ АДМІНАМ - в outbox, в тій самій транзакції
+        await enqueue_notification(
+            db,
+            "new_booking",
+            db_booking.id,
+            client_name=booking.name,
+            client_phone=booking.phone,
+            booking_date=str(booking.booking_date),
+            booking_hour=booking.booking_hour
         )
-        db.add(db_booking)
-        db.commit()
-        db.refresh(db_booking)
+        await db.commit()
+        availability_cache.add_booking(booking.booking_date, booking.booking_hour)
+        outbox_worker.wake()
         
         # 🔗 Створити Telegram deep link
         bot_username = os.getenv("BOT_USERNAME", "your_bot_username")
         telegram_link = f"https://t.me/{bot_username}?start=booking_{db_booking.id}"
         
-        # 🤖 ВІДПРАВИТИ TELEGRAM СПОВІЩЕННЯ АДМІНАМ (в фоновому режимі)
-        background_tasks.add_task(
-            telegram_notifier.send_new_booking_notification,
-            client_name=booking.name,
-            client_phone=booking.phone,
-            booking_date=str(booking.booking_date),
+        return schemas.BookingResponse(
+            id=db_booking.id,
+            booking_date=booking.booking_date,
             booking_hour=booking.booking_hour,
-            booking_id=db_booking.id
+            created_at=db_booking.created_at,
+            client=schemas.ClientResponse.model_validate(client),
+            telegram_link=telegram_link,
+            status="pending"
         )
         
-        # Додати telegram_link до відповіді
-        response = schemas.BookingResponse.from_orm(db_booking)
-        response.telegram_link = telegram_link
-        
-        return response
-        
     except IntegrityError:
-        # ЗАХИСТ: Якщо двоє одночасно намагаються забронювати - база відхилить другого
-        db.rollback()
+        # Година вже зайнята (або двоє бронюють одночасно) - база відхилила INSERT
+        await db.rollback()
         raise HTTPException(
             status_code=400,
-            detail="Ця година щойно була заброньована іншим користувачем. Оберіть іншу годину."
+            detail="Ця година вже зайнята. Оберіть іншу годину."
+        )
+
+@app.post("/api/bookings/bulk", response_model=List[schemas.BookingResponse], status_code=201)
+async def create_bookings_bulk(
+    bulk: schemas.BulkBookingCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Забронювати кілька годин (на одній або кількох датах) однією транзакцією.
+    
+    Все або нічого: якщо хоч одна година зайнята, не створюється жодне
+    бронювання. Адміни отримують одне сповіщення на всі години.
+    """
+    slots = bulk.all_slots()
+    try:
+        client = await upsert_client(db, bulk.name, bulk.phone)
+        rows = await insert_bookings(db, client.id, slots)
+        
+        # Одне сповіщення на всю групу (ключ - перше бронювання; id не перевикористовуються)
+        await enqueue_notification(
+            db,
+            "new_bookings",
+            rows[0].id,
+            client_name=bulk.name,
+            client_phone=bulk.phone,
+            slots=[[str(booking_date), booking_hour] for booking_date, booking_hour in slots],
+            booking_ids=[row.id for row in rows]
+        )
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        taken = await taken_slots(db, slots)
+        detail = "Частина годин вже зайнята. Оберіть інші години."
+        if taken:
+            busy = ", ".join(format_slot(booking_date, hour) for booking_date, hour in taken)
+            detail = f"Вже зайнято: {busy}. Жодну годину не заброньовано."
+        raise HTTPException(status_code=400, detail=detail)
+    
+    for booking_date, booking_hour in slots:
+        availability_cache.add_booking(booking_date, booking_hour)
+    outbox_worker.wake()
+    
+    bot_username = os.getenv("BOT_USERNAME", "your_bot_username")
+    client_response = schemas.ClientResponse.model_validate(client)
+    return [
+        schemas.BookingResponse(
+            id=row.id,
+            booking_date=row.booking_date,
+            booking_hour=row.booking_hour,
+            created_at=row.created_at,
+            client=client_response,
+            telegram_link=f"https://t.me/{bot_username}?start=booking_{row.id}",
+            status="pending"
         )
+        for row in rows
+    ]
 
 @app.get("/api/bookings/", response_model=List[schemas.BookingResponse])
-def get_bookings(
+async def get_bookings(
     start_date: date = Query(None),
     end_date: date = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Отримати всі бронювання з фільтрацією по датах"""
-    query = db.query(models.Booking)
+    fast = fastjson.enabled()
+    query = fastjson.booking_rows_query() if fast else select(models.Booking)
     
     if start_date:
-        query = query.filter(models.Booking.booking_date >= start_date)
+        query = query.where(models.Booking.booking_date >= start_date)
     if end_date:
-        query = query.filter(models.Booking.booking_date <= end_date)
+        query = query.where(models.Booking.booking_date <= end_date)
     
-    bookings = query.order_by(
+    result = await db.execute(query.order_by(
         models.Booking.booking_date,
         models.Booking.booking_hour
-    ).all()
+    ))
     
-    return bookings
+    if fast:
+        return fastjson.json_response(fastjson.dump_bookings(result.all()))
+    return result.scalars().all()
 
 @app.get("/api/calendar/{year}/{month}", response_model=List[schemas.DayStatusResponse])
-def get_month_calendar(
+async def get_month_calendar(
     year: int,
     month: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
-    """Отримати статус всіх днів місяця"""
+    """Отримати статус всіх днів місяця (304, якщо місяць не змінився)"""
     
     if month < 1 or month > 12:
         raise HTTPException(status_code=400, detail="Місяць повинен бути від 1 до 12")
     
-    # Отримати всі дні місяця
-    _, num_days = calendar.monthrange(year, month)
-    first_day = date(year, month, 1)
-    last_day = date(year, month, num_days)
-    
-    # Отримати всі АКТИВНІ бронювання за місяць (pending, confirmed, paid)
-    bookings = db.query(models.Booking).filter(
-        models.Booking.booking_date >= first_day,
-        models.Booking.booking_date <= last_day,
-        models.Booking.status.in_(['pending', 'confirmed', 'paid'])
-    ).all()
-    
-    # Групувати бронювання по датах
-    bookings_by_date = {}
-    for booking in bookings:
-        if booking.booking_date not in bookings_by_date:
-            bookings_by_date[booking.booking_date] = []
-        bookings_by_date[booking.booking_date].append(booking.booking_hour)
-    
-    # Робочі години студії (наприклад, з 9 до 21)
-    WORK_HOURS = list(range(9, 21))
-    
-    # Створити відповідь для кожного дня
-    result = []
-    for day in range(1, num_days + 1):
-        current_date = date(year, month, day)
-        booked_hours = bookings_by_date.get(current_date, [])
-        available_hours = [h for h in WORK_HOURS if h not in booked_hours]
-        
-        result.append(schemas.DayStatusResponse(
-            date=current_date,
-            has_bookings=len(booked_hours) > 0,
-            available_hours=available_hours,
-            booked_hours=booked_hours
-        ))
-    
-    return result
+    entry = await _get_month_entry(year, month, db)
+    not_modified = _check_etag(request, response, f'"m-{entry.data_version()}"')
+    if not_modified:
+        return not_modified
+    if fastjson.enabled():
+        if entry.body is None:
+            entry.body = fastjson.dump_day_statuses([
+                (date(year, month, day + 1), mask_to_hours(mask), mask_to_hours(available_mask(mask)))
+                for day, mask in enumerate(entry.masks)
+            ])
+        return fastjson.json_response(entry.body, headers=dict(response.headers))
+    if entry.rendered is None:
+        entry.rendered = [
+            _day_status(date(year, month, day + 1), mask)
+            for day, mask in enumerate(entry.masks)
+        ]
+    
+    return entry.rendered
 
 @app.get("/api/day/{booking_date}", response_model=schemas.DayStatusResponse)
-def get_day_status(
+async def get_day_status(
     booking_date: date,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
-    """Отримати статус конкретного дня"""
-    
-    # Вибрати тільки активні бронювання (pending, confirmed, paid)
-    bookings = db.query(models.Booking).filter(
-        models.Booking.booking_date == booking_date,
-        models.Booking.status.in_(['pending', 'confirmed', 'paid'])
-    ).all()
-    
-    # Робочі години студії (з 9 до 21)
-    WORK_HOURS = list(range(9, 21))
-    booked_hours = [b.booking_hour for b in bookings]
-    available_hours = [h for h in WORK_HOURS if h not in booked_hours]
-    
+    """Отримати статус конкретного дня (304, якщо місяць не змінився)"""
+    entry = await _get_month_entry(booking_date.year, booking_date.month, db)
+    not_modified = _check_etag(request, response, f'"d{booking_date.day}-{entry.data_version()}"')
+    if not_modified:
+        return not_modified
+    return _day_status(booking_date, entry.day_mask(booking_date))
+
+def _check_etag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Порівняти If-None-Match з ETag поточних даних.
+    
+    Повертає 304-відповідь, якщо у клієнта актуальна версія, інакше ставить
+    ETag і Cache-Control на звичайну відповідь.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in candidates or "*" in candidates:
+            return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+async def _get_month_entry(year: int, month: int, db: AsyncSession):
+    """Маски зайнятості місяця з кешу (або з БД при промаху)"""
+    entry = availability_cache.get(year, month)
+    if entry is None:
+        first_day, last_day, _ = month_bounds(year, month)
+        generation = availability_cache.generation(year, month)
+        
+        # Вибрати тільки активні бронювання (pending, confirmed, paid)
+        slots = await db.execute(select(models.Booking.booking_date, models.Booking.booking_hour).where(
+            models.Booking.booking_date >= first_day,
+            models.Booking.booking_date <= last_day,
+            models.active_status_filter()
+        ))
+        
+        entry = availability_cache.put(year, month, slots, generation)
+    return entry
+
+def _day_status(day: date, booked_mask: int) -> schemas.DayStatusResponse:
+    """Статус дня з маски зайнятості"""
     return schemas.DayStatusResponse(
-        date=booking_date,
-        has_bookings=len(booked_hours) > 0,
-        available_hours=available_hours,
-        booked_hours=booked_hours
+        date=day,
+        has_bookings=booked_mask != 0,
+        available_hours=mask_to_hours(available_mask(booked_mask)),
+        booked_hours=mask_to_hours(booked_mask)
+    )
+
+@app.get("/api/availability/stream")
+async def availability_stream(
+    year: int = Query(None),
+    month: int = Query(None, ge=1, le=12),
+    last_event_id: str = Header(None)
+):
+    """
+    SSE-потік змін слотів: event "slot" з {date, hour, booked}.
+    
+    З year і month - тільки зміни цього місяця, без них - усі. Event
+    "resync" означає, що частину подій пропущено і місяць треба перечитати.
+    """
+    if (year is None) != (month is None):
+        raise HTTPException(status_code=400, detail="Вкажіть year і month разом")
+    key = (year, month) if year is not None else None
+    return StreamingResponse(
+        availability_feed.subscribe(key, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
+# Ціни
+@app.get("/api/prices")
+def get_price_rules():
+    """Базова ціна і доплати за додаткові послуги"""
+    return rules_table()
+
+@app.post("/api/prices/quote", response_model=schemas.QuoteResponse)
+def quote_prices(quote: schemas.QuoteRequest):
+    """Ціни для багатьох комбінацій послуг одним запитом (в тому ж порядку)"""
+    return schemas.QuoteResponse(prices=quote_batch([item.model_dump() for item in quote.items]))
+
 # Admin-only endpoints
 @app.get("/api/admin/day/{booking_date}", response_model=schemas.AdminDayStatusResponse)
-def get_admin_day_status(
+async def get_admin_day_status(
     booking_date: date,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin: dict = Depends(get_current_admin)
 ):
     """Отримати детальний статус дня для адміна (показуємо всі бронювання)"""
     
     # Адмін бачить ВСІ бронювання (включно з cancelled)
-    bookings = db.query(models.Booking).filter(
-        models.Booking.booking_date == booking_date
-    ).all()
-    
-    # Робочі години студії (з 9 до 21)
-    WORK_HOURS = list(range(9, 21))
+    result = await db.execute(
+        select(models.Booking).where(models.Booking.booking_date == booking_date)
+    )
+    bookings = result.scalars().all()
     
     # Створити словник бронювань по годинах
     bookings_dict = {b.booking_hour: b for b in bookings}
@@ -252,64 +433,170 @@ def get_admin_day_status(
     )
 
 @app.get("/api/admin/bookings/", response_model=List[schemas.BookingResponse])
-def get_admin_bookings(
+async def get_admin_bookings(
+    response: Response,
     start_date: date = Query(None),
     end_date: date = Query(None),
-    db: Session = Depends(get_db),
+    limit: int = Query(None, ge=1, le=1000),
+    cursor: str = Query(None),
+    db: AsyncSession = Depends(get_db),
     admin: dict = Depends(get_current_admin)
 ):
-    """Отримати всі бронювання для адміна (з деталями)"""
-    query = db.query(models.Booking)
-    
-    if start_date:
-        query = query.filter(models.Booking.booking_date >= start_date)
-    if end_date:
-        query = query.filter(models.Booking.booking_date <= end_date)
-    
-    bookings = query.order_by(
-        models.Booking.booking_date,
-        models.Booking.booking_hour
-    ).all()
-    
+    """
+    Отримати бронювання для адміна (з деталями).
+    
+    З limit - keyset-пагінація по (booking_date, booking_hour, id): курсор
+    наступної сторінки повертається в заголовку X-Next-Cursor.
+    """
+    fast = fastjson.enabled()
+    query = fastjson.booking_rows_query() if fast else select(models.Booking)
+    query = query.where(date_range_filter(start_date, end_date))
+    
+    if cursor:
+        try:
+            query = query.where(after_cursor_filter(cursor))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if limit:
+        query = query.limit(limit)
+    
+    result = await db.execute(query.order_by(*KEYSET_ORDER))
+    bookings = result.all() if fast else result.scalars().all()
+    
+    if limit and len(bookings) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(bookings[-1])
+    
+    if fast:
+        return fastjson.json_response(fastjson.dump_bookings(bookings), headers=dict(response.headers))
     return bookings
 
+@app.get("/api/admin/bookings/export")
+async def export_admin_bookings(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    start_date: date = Query(None),
+    end_date: date = Query(None),
+    admin: dict = Depends(get_current_admin)
+):
+    """Потоковий експорт бронювань (NDJSON або CSV) з серверного курсора"""
+    if format == "csv":
+        return StreamingResponse(
+            stream_csv(start_date, end_date),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": 'attachment; filename="bookings.csv"'}
+        )
+    return StreamingResponse(
+        stream_ndjson(start_date, end_date),
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/api/admin/bookings/recompute-prices", response_model=schemas.PriceRecomputeResponse)
+async def recompute_booking_prices(
+    start_date: date = Query(None),
+    end_date: date = Query(None),
+    db: AsyncSession = Depends(get_db),
+    admin: dict = Depends(get_current_admin)
+):
+    """Перерахувати total_price за поточними правилами одним UPDATE"""
+    new_price = price_expression(models.Booking)
+    result = await db.execute(
+        update(models.Booking)
+        .where(
+            date_range_filter(start_date, end_date),
+            models.Booking.total_price.is_distinct_from(new_price)
+        )
+        .values(total_price=new_price)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return schemas.PriceRecomputeResponse(updated=result.rowcount)
+
+@app.get("/api/admin/calendar-cache")
+def get_calendar_cache_stats(admin: dict = Depends(get_current_admin)):
+    """Статистика кешу календаря (тільки для адміна)"""
+    return availability_cache.stats()
+
+@app.get("/api/admin/db-pool")
+def get_db_pool_stats(admin: dict = Depends(get_current_admin)):
+    """Статистика пулу з'єднань з БД (тільки для адміна)"""
+    return get_pool_status()
+
+@app.get("/api/admin/outbox")
+async def get_outbox_stats(admin: dict = Depends(get_current_admin)):
+    """Стан черги Telegram сповіщень і затримки доставки (тільки для адміна)"""
+    stats = await outbox_worker.stats()
+    stats["sender"] = telegram_sender.stats()
+    return stats
+
+@app.get("/api/admin/token-cache")
+def get_token_cache_stats(admin: dict = Depends(get_current_admin)):
+    """Статистика кешу перевірених токенів (тільки для адміна)"""
+    return token_cache.stats()
+
+@app.get("/api/admin/password-hasher")
+def get_password_hasher_stats(admin: dict = Depends(get_current_admin)):
+    """Черга і час роботи bcrypt (тільки для адміна)"""
+    return password_hasher.stats()
+
+@app.get("/api/admin/reminders")
+def get_reminder_stats(admin: dict = Depends(get_current_admin)):
+    """Черга нагадувань клієнтам (тільки для адміна)"""
+    return reminder_scheduler.stats()
+
+@app.get("/api/admin/mail")
+def get_mail_stats(admin: dict = Depends(get_current_admin)):
+    """Черга листів і SMTP-з'єднання (тільки для адміна)"""
+    return mail_pool.stats()
+
+@app.get("/api/admin/live")
+def get_live_feed_stats(admin: dict = Depends(get_current_admin)):
+    """Підписники і лічильники live-потоку доступності (тільки для адміна)"""
+    return availability_feed.stats()
+
 @app.delete("/api/bookings/{booking_id}", status_code=204)
 async def delete_booking(
     booking_id: int,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin: dict = Depends(get_current_admin)
 ):
     """Видалити бронювання (тільки для адміна)"""
-    booking = db.query(models.Booking).filter(models.Booking.id == booking_id).first()
+    booking = await db.get(models.Booking, booking_id)
     
     if not booking:
         raise HTTPException(status_code=404, detail="Бронювання не знайдено")
     
     # Зберегти дані для сповіщення перед видаленням
     client_name = booking.client.name
-    booking_date = str(booking.booking_date)
+    slot_date = booking.booking_date
+    booking_date = str(slot_date)
     booking_hour = booking.booking_hour
+    frees_slot = booking.status in ACTIVE_STATUSES
     
-    db.delete(booking)
-    db.commit()
+    await db.delete(booking)
     
-    # 🤖 ВІДПРАВИТИ TELEGRAM СПОВІЩЕННЯ про скасування
-    background_tasks.add_task(
-        telegram_notifier.send_booking_cancelled_notification,
+    # 🤖 TELEGRAM СПОВІЩЕННЯ про скасування - в outbox, в тій самій транзакції
+    await enqueue_notification(
+        db,
+        "booking_cancelled",
+        booking_id,
         client_name=client_name,
         booking_date=booking_date,
-        booking_hour=booking_hour,
-        booking_id=booking_id
+        booking_hour=booking_hour
     )
+    await db.commit()
+    if frees_slot:
+        availability_cache.remove_booking(slot_date, booking_hour)
+    outbox_worker.wake()
     
     return None
 
 @app.get("/api/clients/", response_model=List[schemas.ClientResponse])
-def get_clients(db: Session = Depends(get_db)):
+async def get_clients(db: AsyncSession = Depends(get_db)):
     """Отримати всіх клієнтів"""
-    clients = db.query(models.Client).all()
-    return clients
+    if fastjson.enabled():
+        result = await db.execute(fastjson.client_rows_query())
+        return fastjson.json_response(fastjson.dump_clients(result.all()))
+    result = await db.execute(select(models.Client))
+    return result.scalars().all()
 
 @app.post("/api/admin/test-telegram")
 async def test_telegram(admin: dict = Depends(get_current_admin)):
@@ -334,12 +621,12 @@ async def test_telegram(admin: dict = Depends(get_current_admin)):
         raise HTTPException(status_code=500, detail="Помилка відправки повідомлення")
 
 @app.get("/api/clients/{client_id}", response_model=schemas.ClientResponse)
-def get_client(
+async def get_client(
     client_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Отримати клієнта по ID"""
-    client = db.query(models.Client).filter(models.Client.id == client_id).first()
+    client = await db.get(models.Client, client_id)
     
     if not client:
         raise HTTPException(status_code=404, detail="Клієнт не знайдений")
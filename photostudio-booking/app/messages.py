@@ -0,0 +1,297 @@
+"""
+Рендеринг повідомлень для адмінів і клієнтів (спільний для веб-сервісу і бота)
+
+Дати форматуються один раз на значення (lru_cache), шаблони - готові
+str.format без повторного розбору f-рядків і заміни назв місяців.
+"""
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, Tuple, Union
+
+from . import pricing
+
+MONTHS_GENITIVE = (
+    "січня", "лютого", "березня", "квітня", "травня", "червня",
+    "липня", "серпня", "вересня", "жовтня", "листопада", "грудня",
+)
+
+# "10:00 - 11:00" для кожної години доби
+TIME_RANGES = tuple(f"{hour:02d}:00 - {hour + 1:02d}:00" for hour in range(24))
+
+DateLike = Union[date, str]
+
+
+@lru_cache(maxsize=1024)
+def _to_date(value: DateLike) -> date:
+    """date з date або рядка YYYY-MM-DD / YYYYMMDD"""
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+@lru_cache(maxsize=1024)
+def format_date_long(value: DateLike) -> str:
+    """Формат 17 жовтня 2026; нерозпізнаний рядок повертається як є"""
+    try:
+        d = _to_date(value)
+    except (TypeError, ValueError):
+        return str(value)
+    return f"{d.day:02d} {MONTHS_GENITIVE[d.month - 1]} {d.year}"
+
+
+@lru_cache(maxsize=1024)
+def format_date_short(value: DateLike) -> str:
+    """Формат 17.10.2026"""
+    d = _to_date(value)
+    return f"{d.day:02d}.{d.month:02d}.{d.year}"
+
+
+def format_time_range(hour: int) -> str:
+    """Формат 10:00 - 11:00"""
+    if 0 <= hour < len(TIME_RANGES):
+        return TIME_RANGES[hour]
+    return f"{hour:02d}:00 - {hour + 1:02d}:00"
+
+
+def format_slot(value: DateLike, hour: int) -> str:
+    """Формат 17.10.2026 10:00"""
+    return f"{format_date_short(value)} {hour}:00"
+
+
+def telegram_contact(user_id: int, username: str = None) -> str:
+    """@username або ID користувача"""
+    return f"@{username}" if username else f"ID: {user_id}"
+
+
+# Шаблони сповіщень веб-сервісу
+_NEW_BOOKING = """
+🎉 <b>Нове бронювання!</b>
+
+📅 <b>Дата:</b> {date}
+🕐 <b>Час:</b> {time_range}
+
+👤 <b>Клієнт:</b> {client_name}
+📞 <b>Телефон:</b> <code>{client_phone}</code>
+
+🆔 Бронювання #{booking_id}
+
+💼 <b>CLIQUE Photostudio</b>
+""".format
+
+_BOOKING_CANCELLED = """
+❌ <b>Бронювання скасовано</b>
+
+📅 <b>Дата:</b> {date}
+🕐 <b>Час:</b> {time_range}
+
+👤 <b>Клієнт:</b> {client_name}
+
+🆔 Бронювання #{booking_id}
+
+💼 <b>CLIQUE Photostudio</b>
+""".format
+
+_NEW_BOOKINGS = """
+🎉 <b>Нове бронювання: {count} год.</b>
+
+{schedule}
+
+👤 <b>Клієнт:</b> {client_name}
+📞 <b>Телефон:</b> <code>{client_phone}</code>
+
+🆔 Бронювання {ids}
+
+💼 <b>CLIQUE Photostudio</b>
+""".format
+
+_REMINDER = """
+⏰ <b>Нагадування про зйомку</b>
+
+{schedule}
+
+Чекаємо на вас! Якщо плани змінились - скасуйте бронювання кнопкою ❌ Скасувати.
+
+💼 <b>CLIQUE Photostudio</b>
+""".format
+
+_REMINDERS_DIGEST = """
+⏰ <b>Найближчі зйомки: {count}</b>
+
+{rows}
+
+💼 <b>CLIQUE Photostudio</b>
+""".format
+
+# Картка бронювання для адмінів у боті
+_ADMIN_CARD = "{title}\n\nID: #{booking_id}\n👤 {client_name}\n📞 {client_phone}\n💬 {contact}\n📅 {slot}{footer}".format
+
+
+def render_new_booking(client_name: str, client_phone: str, booking_date: DateLike, booking_hour: int, booking_id: int) -> str:
+    """Сповіщення про нове бронювання з сайту"""
+    return _NEW_BOOKING(
+        date=format_date_long(booking_date),
+        time_range=format_time_range(booking_hour),
+        client_name=client_name,
+        client_phone=client_phone,
+        booking_id=booking_id
+    )
+
+
+def render_booking_cancelled(client_name: str, booking_date: DateLike, booking_hour: int, booking_id: int) -> str:
+    """Сповіщення про скасування бронювання"""
+    return _BOOKING_CANCELLED(
+        date=format_date_long(booking_date),
+        time_range=format_time_range(booking_hour),
+        client_name=client_name,
+        booking_id=booking_id
+    )
+
+
+def hour_ranges(hours: List[int]) -> List[str]:
+    """Суміжні години одним проміжком: [10, 11, 12, 15] -> 10:00 - 13:00, 15:00 - 16:00"""
+    ranges = []
+    for hour in sorted(hours):
+        if ranges and ranges[-1][1] == hour:
+            ranges[-1][1] = hour + 1
+        else:
+            ranges.append([hour, hour + 1])
+    return [f"{start:02d}:00 - {end:02d}:00" for start, end in ranges]
+
+
+def render_new_bookings(
+    client_name: str,
+    client_phone: str,
+    slots: List[Tuple[DateLike, int]],
+    booking_ids: List[int]
+) -> str:
+    """Одне сповіщення про кілька годин, згруповані по датах"""
+    return _NEW_BOOKINGS(
+        count=len(slots),
+        schedule=_schedule(slots),
+        client_name=client_name,
+        client_phone=client_phone,
+        ids=", ".join(f"#{booking_id}" for booking_id in booking_ids)
+    )
+
+
+def _schedule(slots: List[Tuple[DateLike, int]]) -> str:
+    """Години, згруповані по датах: 📅 17 жовтня 2026: 10:00 - 12:00"""
+    by_date: Dict[DateLike, List[int]] = {}
+    for booking_date, booking_hour in slots:
+        by_date.setdefault(booking_date, []).append(booking_hour)
+    return "\n".join(
+        f"📅 <b>{format_date_long(booking_date)}:</b> {', '.join(hour_ranges(hours))}"
+        for booking_date, hours in by_date.items()
+    )
+
+
+def render_reminder(slots: List[Tuple[DateLike, int]]) -> str:
+    """Нагадування клієнту про його найближчі години"""
+    return _REMINDER(schedule=_schedule(slots))
+
+
+def render_reminders_digest(reminders: List[dict]) -> str:
+    """Зведення для адмінів: кому відправлено нагадування (і кого немає в Telegram)"""
+    rows = "\n".join(
+        f"📅 {format_slot(item['booking_date'], item['booking_hour'])} - {item['client_name']}, "
+        f"<code>{item['client_phone']}</code> #{item['booking_id']}"
+        + ("" if item["chat_id"] else " (без Telegram)")
+        for item in reminders
+    )
+    return _REMINDERS_DIGEST(count=len(reminders), rows=rows)
+
+
+def render_admin_card(
+    title: str,
+    booking_id: int,
+    client_name: str,
+    client_phone: str,
+    contact: str,
+    booking_date: DateLike,
+    booking_hour: int,
+    footer: str = ""
+) -> str:
+    """Повідомлення адмінам з бота: заголовок, клієнт, слот і довільний хвіст"""
+    return _ADMIN_CARD(
+        title=title,
+        booking_id=booking_id,
+        client_name=client_name,
+        client_phone=client_phone,
+        contact=contact,
+        slot=format_slot(booking_date, booking_hour),
+        footer=footer
+    )
+
+
+# Назви варіантів послуг (доплата дописується з правил app.pricing)
+ZONE_NAMES = {"light": "Світла", "dark": "Темна", "both": "Обидві"}
+BG_NAMES = {"none": "Без фону", "white": "Білий", "black": "Чорний", "red": "Червоний"}
+OPTION_NAMES = {"zone": ZONE_NAMES, "bg": BG_NAMES}
+
+_SERVICES = """📋 <b>Обрані послуги:</b>
+
+👥 Людей: {people}
+📸 Зона: {zone}
+🐾 Тварини: {animals}
+🎨 Фон: {bg}
+
+💰 <b>Сума: {price} грн</b>""".format
+
+
+def _with_fee(name: str, fee: int) -> str:
+    return f"{name} (+{fee}₴)" if fee else name
+
+
+def option_label(field: str, choice: str) -> str:
+    """Назва варіанта з доплатою для кнопки: Обидві (+500₴)"""
+    return _with_fee(OPTION_NAMES[field].get(choice, choice), pricing.option_fee(field, choice))
+
+
+def render_people_prompt() -> str:
+    """Крок 1/4 у боті: скільки людей входить у базову ціну"""
+    rule = pricing.unit_rule("people")
+    return f"<b>1/4: Кількість людей</b>\n\nДо {rule.included} - без доплат\nБільше - {rule.unit_price}₴/особа"
+
+
+def render_zone_prompt() -> str:
+    """Крок 2/4: доплати за фотозони"""
+    fees = "\n".join(
+        f"{ZONE_NAMES.get(choice, choice)} - доплата {fee}₴" for choice, fee in pricing.option_fees("zone").items()
+    )
+    return f"<b>2/4: Фотозона</b>\n\n{fees}"
+
+
+def render_animals_prompt() -> str:
+    """Крок 3/4: скільки тварин без доплати"""
+    rule = pricing.unit_rule("animals")
+    return f"<b>3/4: Тварини</b>\n\n{rule.included} - безкоштовно\nБільше - {rule.unit_price}₴/тварина"
+
+
+def render_bg_prompt() -> str:
+    """Крок 4/4: доплати за фон (однакова доплата - одним рядком)"""
+    fees = pricing.option_fees("bg")
+    if len(set(fees.values())) == 1:
+        text = f"Будь-який - {next(iter(fees.values()))}₴"
+    else:
+        text = "\n".join(f"{BG_NAMES.get(choice, choice)} - {fee}₴" for choice, fee in fees.items())
+    return f"<b>4/4: Фон</b>\n\n{text}"
+
+
+def render_services(people: int, zone: str, animals: int, bg: str, price: int) -> str:
+    """Підсумок обраних послуг з доплатами"""
+    people_rule, animals_rule = pricing.unit_rule("people"), pricing.unit_rule("animals")
+    if people <= people_rule.included:
+        people_text = f"До {people_rule.included} осіб"
+    else:
+        people_text = f"{people} осіб (+{pricing.unit_surcharge(people_rule, people)}₴)"
+    if animals == 0:
+        animals_text = "Немає"
+    elif animals <= animals_rule.included:
+        animals_text = f"{animals} тварина"
+    else:
+        animals_text = f"{animals} (+{pricing.unit_surcharge(animals_rule, animals)}₴)"
+    return _SERVICES(
+        people=people_text,
+        zone=_with_fee(ZONE_NAMES.get(zone, zone), pricing.option_fee("zone", zone)),
+        animals=animals_text,
+        bg=_with_fee(BG_NAMES.get(bg, bg), pricing.option_fee("bg", bg)),
+        price=price
+    )
@@ -1,9 +1,15 @@
 """
 Database models for photostudio booking system
 """
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, DateTime, func, UniqueConstraint, BigInteger
+import enum
+from sqlalchemy import bindparam, Column, Integer, String, Date, ForeignKey, DateTime, func, Index, BigInteger, SmallInteger, Text, UniqueConstraint, Boolean, Enum
 from sqlalchemy.orm import relationship
+from datetime import datetime
 from .database import Base
+from .pricing import BASE_PRICE
+
+# Statuses that occupy a slot
+ACTIVE_STATUSES = ('pending', 'confirmed', 'paid')
 
 
 class Client(Base):
@@ -17,6 +23,9 @@ class Client(Base):
     
     # Relationships
     bookings = relationship("Booking", back_populates="client")
+    
+    # Fetch server defaults (created_at) on INSERT, async sessions can't lazy-load them
+    __mapper_args__ = {"eager_defaults": True}
 
 
 class Booking(Base):
@@ -44,12 +53,105 @@ class Booking(Base):
     zone_choice = Column(String(20), nullable=True)  # light, dark, both
     animals_count = Column(Integer, nullable=True)  # Кількість тварин
     background_choice = Column(String(20), nullable=True)  # none, white, black, red
-    total_price = Column(Integer, nullable=True, default=1000)  # Загальна ціна
+    total_price = Column(Integer, nullable=True, default=BASE_PRICE)  # Загальна ціна
+    reminded_at = Column(DateTime, nullable=True)  # UTC, when the reminder was claimed for sending
     
     # Relationships
-    client = relationship("Client", back_populates="bookings")
+    # Client is loaded in the same query (JOIN) - admin views and the bot always need it
+    client = relationship("Client", back_populates="bookings", lazy="joined", innerjoin=True)
+    
+    # One ACTIVE booking per slot (cancelled rows don't block the hour).
+    # Calendar/day lookups search it by date; status is not in the key, so
+    # matching rows are still read from the table (not a covering index).
+    # AUTOINCREMENT: SQLite would otherwise reuse the id of a deleted newest
+    # booking, and its outbox row (kind, booking_id) would swallow the new one.
+    __table_args__ = (
+        Index(
+            'uq_bookings_active_slot',
+            'booking_date',
+            'booking_hour',
+            unique=True,
+            postgresql_where=status.in_(ACTIVE_STATUSES),
+            sqlite_where=status.in_(ACTIVE_STATUSES),
+        ),
+        {"sqlite_autoincrement": True},
+    )
+    __mapper_args__ = {"eager_defaults": True}
+
+
+def active_status_filter():
+    """
+    Booking.status IN ACTIVE_STATUSES with the values inlined into the SQL.
+
+    The planner only uses the partial index uq_bookings_active_slot when it can
+    prove the query implies the index's WHERE, which it can't for bound parameters.
+    """
+    return Booking.status.in_(
+        bindparam("active_statuses", ACTIVE_STATUSES, expanding=True, literal_execute=True)
+    )
+
+
+class NotificationOutbox(Base):
+    """Outgoing Telegram notification, written in the same transaction as the booking change"""
+    __tablename__ = "notification_outbox"
+    
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(30), nullable=False)  # new_booking, new_bookings, booking_cancelled
+    booking_id = Column(Integer, nullable=False)
+    payload = Column(Text, nullable=False)  # JSON kwargs for the notifier
+    status = Column(String(20), nullable=False, default="pending")
+    # pending - waiting for delivery (or retry)
+    # sent - delivered
+    # failed - gave up after max attempts
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # UTC
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    sent_at = Column(DateTime, nullable=True)
     
-    # Unique constraint
     __table_args__ = (
-        UniqueConstraint('booking_date', 'booking_hour', name='unique_booking_slot'),
+        # One notification of each kind per booking
+        UniqueConstraint('kind', 'booking_id', name='uq_outbox_kind_booking'),
+        Index('idx_outbox_due', 'status', 'next_attempt_at'),
     )
+
+
+class BotFlowState(Base):
+    """Bot service-selection dialog state, one compact row per Telegram user"""
+    __tablename__ = "bot_flow_states"
+    
+    user_id = Column(BigInteger, primary_key=True)  # Telegram user id
+    booking_id = Column(Integer, nullable=False)
+    step = Column(SmallInteger, nullable=False)  # app.bot_state.Step
+    people = Column(SmallInteger, nullable=False, default=4)
+    zone = Column(String(10), nullable=True)  # light, dark, both
+    animals = Column(SmallInteger, nullable=False, default=0)
+    bg = Column(String(10), nullable=True)  # none, white, black, red
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # UTC
+
+
+class UserRole(str, enum.Enum):
+    """Account role"""
+    CLIENT = "client"
+    ADMIN = "admin"
+
+
+class User(Base):
+    """Site user account (email + password login)"""
+    __tablename__ = "users"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    # Unique indexes: login, refresh and token checks look users up by email
+    email = Column(String(255), nullable=False, unique=True, index=True)
+    username = Column(String(50), nullable=False, unique=True, index=True)
+    password_hash = Column(String(255), nullable=False)
+    role = Column(
+        Enum(UserRole, name="user_role", values_callable=lambda roles: [role.value for role in roles]),
+        nullable=False,
+        default=UserRole.CLIENT
+    )
+    is_active = Column(Boolean, nullable=False, default=True)
+    is_verified = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime, server_default=func.now())
+    
+    __mapper_args__ = {"eager_defaults": True}
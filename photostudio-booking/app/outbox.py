@@ -0,0 +1,211 @@
+"""
+Надійна черга Telegram сповіщень (transactional outbox)
+
+Сповіщення записується в notification_outbox в тій самій транзакції, що й
+зміна бронювання, тому рестарт процесу його не губить. Окремий async worker
+забирає due-рядки, відправляє їх з обмеженням паралельності та повторює
+невдалі спроби з експоненційною затримкою.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .bookings import dialect_insert
+from .database import AsyncSessionLocal
+from .telegram_service import telegram_notifier
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", "4"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+
+# Затримка повтору: 2, 4, 8 ... секунд, не більше 10 хвилин
+RETRY_BASE_SECONDS = 2
+RETRY_MAX_SECONDS = 600
+
+# Скільки секунд рядок "належить" worker'у, який його забрав. Якщо процес
+# впаде посеред відправки, після цього часу рядок забере інший worker
+LEASE_SECONDS = 60
+SEND_TIMEOUT_SECONDS = 30
+
+
+async def enqueue_notification(db: AsyncSession, kind: str, booking_id: int, **payload) -> None:
+    """
+    Додати сповіщення в outbox поточної транзакції (commit робить викликач).
+
+    Повторне сповіщення того ж типу для того ж бронювання ігнорується.
+    """
+    stmt = dialect_insert(db, models.NotificationOutbox).values(
+        kind=kind,
+        booking_id=booking_id,
+        payload=json.dumps({"booking_id": booking_id, **payload}, ensure_ascii=False),
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.utcnow()
+    ).on_conflict_do_nothing(index_elements=["kind", "booking_id"])
+    await db.execute(stmt)
+
+
+def retry_delay(attempts: int) -> float:
+    """Затримка перед наступною спробою (з jitter)"""
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class OutboxWorker:
+    """Async worker, що доставляє сповіщення з outbox"""
+
+    def __init__(
+        self,
+        handlers: Dict[str, Callable[..., Awaitable[bool]]],
+        concurrency: int = OUTBOX_CONCURRENCY,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        poll_interval: float = OUTBOX_POLL_INTERVAL,
+        session_factory=AsyncSessionLocal
+    ):
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.session_factory = session_factory
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        """Запустити worker в поточному event loop"""
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Зупинити worker (незавершені рядки доставить наступний запуск)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self) -> None:
+        """Розбудити worker після commit нового сповіщення"""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        while True:
+            self._wake.clear()
+            try:
+                batch = await self._claim()
+            except Exception as e:
+                logger.error(f"❌ Outbox: помилка читання черги: {e}")
+                batch = []
+
+            if batch:
+                await asyncio.gather(*(self._deliver(semaphore, *row) for row in batch))
+                continue
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _due_query(self, now: datetime):
+        """Due-рядки; паралельні worker'и (PostgreSQL) пропускають чужі заблоковані"""
+        return (
+            select(models.NotificationOutbox)
+            .where(
+                models.NotificationOutbox.status == "pending",
+                models.NotificationOutbox.next_attempt_at <= now
+            )
+            .order_by(models.NotificationOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+
+    async def _claim(self) -> list:
+        """Забрати due-рядки, продовживши їм lease"""
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            result = await db.execute(self._due_query(now))
+            rows = result.scalars().all()
+            for row in rows:
+                row.next_attempt_at = now + timedelta(seconds=LEASE_SECONDS)
+            await db.commit()
+            return [(row.id, row.kind, row.payload, row.attempts) for row in rows]
+
+    async def _deliver(self, semaphore: asyncio.Semaphore, row_id: int, kind: str, payload: str, attempts: int) -> None:
+        async with semaphore:
+            error = None
+            try:
+                handler = self.handlers[kind]
+                delivered = await asyncio.wait_for(
+                    handler(**json.loads(payload)), timeout=SEND_TIMEOUT_SECONDS
+                )
+                if not delivered:
+                    error = "жодному адміну не доставлено"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+
+            attempts += 1
+            if error is None:
+                values = {"status": "sent", "attempts": attempts, "sent_at": datetime.utcnow(), "last_error": None}
+                self.sent += 1
+            elif attempts >= self.max_attempts:
+                values = {"status": "failed", "attempts": attempts, "last_error": error}
+                self.failed += 1
+                logger.error(f"❌ Outbox #{row_id} ({kind}): здаємось після {attempts} спроб: {error}")
+            else:
+                next_attempt_at = datetime.utcnow() + timedelta(seconds=retry_delay(attempts))
+                values = {"attempts": attempts, "next_attempt_at": next_attempt_at, "last_error": error}
+                self.retried += 1
+                logger.warning(f"⚠️ Outbox #{row_id} ({kind}): спроба {attempts} невдала: {error}")
+
+            async with self.session_factory() as db:
+                await db.execute(
+                    update(models.NotificationOutbox)
+                    .where(models.NotificationOutbox.id == row_id)
+                    .values(**values)
+                )
+                await db.commit()
+
+    async def stats(self) -> dict:
+        """Лічильники worker'а та кількість рядків по статусах"""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(models.NotificationOutbox.status, func.count())
+                .group_by(models.NotificationOutbox.status)
+            )
+            by_status = dict(result.all())
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "concurrency": self.concurrency,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "queue": by_status,
+        }
+
+
+# Глобальний екземпляр
+outbox_worker = OutboxWorker({
+    "new_booking": telegram_notifier.send_new_booking_notification,
+    "new_bookings": telegram_notifier.send_new_bookings_notification,
+    "booking_cancelled": telegram_notifier.send_booking_cancelled_notification,
+})
@@ -0,0 +1,132 @@
+"""
+Ціни на додаткові послуги: правила в таблицях, а не в коді
+
+Ті самі таблиці рахують ціну одного бронювання (бот), пачки комбінацій
+(ендпоінт для сайту) і SQL-вираз для масового перерахунку total_price.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+from sqlalchemy import case, func
+
+BASE_PRICE = 1000
+
+
+@dataclass(frozen=True, slots=True)
+class UnitRule:
+    """Доплата за кожну одиницю понад включені в базову ціну"""
+    field: str
+    included: int
+    unit_price: int
+
+
+@dataclass(frozen=True, slots=True)
+class OptionRule:
+    """Доплата за обраний варіант (невказані варіанти - без доплати)"""
+    field: str
+    fees: Dict[str, int]
+
+
+UNIT_RULES = (
+    UnitRule("people", included=4, unit_price=100),
+    UnitRule("animals", included=1, unit_price=100),
+)
+
+OPTION_RULES = (
+    OptionRule("zone", {"both": 500}),
+    OptionRule("bg", {"white": 100, "black": 100, "red": 100}),
+)
+
+# Вибір, якщо послуги ще не обрані
+DEFAULT_OPTIONS = {"people": 4, "zone": "light", "animals": 0, "bg": "none"}
+
+# Колонки Booking для кожного поля правил
+BOOKING_COLUMNS = {
+    "people": "people_count",
+    "zone": "zone_choice",
+    "animals": "animals_count",
+    "bg": "background_choice",
+}
+
+
+def unit_surcharge(rule: UnitRule, count: int) -> int:
+    """Доплата за count одиниць"""
+    return max(count - rule.included, 0) * rule.unit_price
+
+
+def unit_rule(field: str) -> UnitRule:
+    """Правило доплати за одиниці поля field"""
+    for rule in UNIT_RULES:
+        if rule.field == field:
+            return rule
+    raise KeyError(field)
+
+
+def option_fees(field: str) -> Dict[str, int]:
+    """Варіанти поля field з доплатою"""
+    for rule in OPTION_RULES:
+        if rule.field == field:
+            return rule.fees
+    return {}
+
+
+def option_fee(field: str, choice: str) -> int:
+    """Доплата за варіант choice поля field"""
+    return option_fees(field).get(choice, 0)
+
+
+def calculate_price(people: int, zone: str, animals: int, bg: str) -> int:
+    """Ціна одного бронювання"""
+    return quote_batch([{"people": people, "zone": zone, "animals": animals, "bg": bg}])[0]
+
+
+def quote_batch(items: Sequence[dict]) -> List[int]:
+    """
+    Ціни для багатьох комбінацій послуг.
+
+    Рахується по колонках: кожне правило проходить одним циклом по всій
+    пачці, а не всі правила для кожної комбінації окремо.
+    """
+    prices = [BASE_PRICE] * len(items)
+    for rule in UNIT_RULES:
+        included, unit_price = rule.included, rule.unit_price
+        column = [item.get(rule.field, DEFAULT_OPTIONS[rule.field]) for item in items]
+        prices = [
+            price + (count - included) * unit_price if count > included else price
+            for price, count in zip(prices, column)
+        ]
+    for rule in OPTION_RULES:
+        fees = rule.fees
+        column = [item.get(rule.field, DEFAULT_OPTIONS[rule.field]) for item in items]
+        prices = [price + fees.get(choice, 0) for price, choice in zip(prices, column)]
+    return prices
+
+
+def price_expression(model):
+    """SQL-вираз ціни з колонок бронювання (для UPDATE ... SET total_price)"""
+    expression = BASE_PRICE
+    for rule in UNIT_RULES:
+        count = func.coalesce(getattr(model, BOOKING_COLUMNS[rule.field]), DEFAULT_OPTIONS[rule.field])
+        expression = expression + case(
+            (count > rule.included, (count - rule.included) * rule.unit_price),
+            else_=0
+        )
+    for rule in OPTION_RULES:
+        column = getattr(model, BOOKING_COLUMNS[rule.field])
+        expression = expression + case(
+            *((column == choice, fee) for choice, fee in rule.fees.items()),
+            else_=0
+        )
+    return expression
+
+
+def rules_table() -> dict:
+    """Правила у вигляді для клієнта (сайт показує доплати з них)"""
+    return {
+        "base_price": BASE_PRICE,
+        "units": [
+            {"field": rule.field, "included": rule.included, "unit_price": rule.unit_price}
+            for rule in UNIT_RULES
+        ],
+        "options": [{"field": rule.field, "fees": rule.fees} for rule in OPTION_RULES],
+    }
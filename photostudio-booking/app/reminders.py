@@ -0,0 +1,315 @@
+"""
+Нагадування клієнтам перед зйомкою
+
+Черга нагадувань - min-heap (час нагадування, дата, година) у пам'яті. Вона
+один раз заповнюється з bookings при старті, а далі оновлюється слухачем
+availability_cache: нове бронювання додає слот, скасування прибирає його.
+Воркер спить до найближчого нагадування (таблиця не опитується), забирає
+все, що настало, і відправляє пачкою через TelegramNotifier: клієнтам - в
+їхні чати бота, адмінам - одне зведення.
+
+Бронювання позначаються reminded_at одним UPDATE ... WHERE reminded_at IS
+NULL перед відправкою, тому рестарт або кілька процесів не надішлють
+нагадування двічі, а скасоване в іншому процесі (бот у режимі polling)
+просто не потрапить у пачку. Якщо відправка клієнту не вдалась, reminded_at
+знімається і нагадування ставиться в чергу ще раз (до REMINDER_MAX_ATTEMPTS
+спроб). Процес, що впав між позначкою і відправкою, нагадування втрачає
+(at-most-once).
+
+Час бронювання - місцевий час студії (STUDIO_TZ), тому "зараз" теж
+рахується в ньому, а не в часовому поясі сервера.
+"""
+import asyncio
+import heapq
+import logging
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select, update, tuple_
+
+from . import models
+from .database import AsyncSessionLocal
+from .telegram_service import telegram_notifier
+
+logger = logging.getLogger(__name__)
+
+# За скільки годин до початку нагадувати
+REMINDER_HOURS_BEFORE = float(os.getenv("REMINDER_HOURS_BEFORE", "24"))
+REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "100"))
+# Нагадування, що настануть протягом стількох секунд, їдуть тією ж пачкою
+REMINDER_BATCH_WINDOW = float(os.getenv("REMINDER_BATCH_WINDOW", "60"))
+# Повтор, якщо нагадування клієнту не доставлено
+REMINDER_RETRY_SECONDS = float(os.getenv("REMINDER_RETRY_SECONDS", "300"))
+REMINDER_MAX_ATTEMPTS = int(os.getenv("REMINDER_MAX_ATTEMPTS", "3"))
+
+# Часовий пояс студії: у ньому записані дата і година бронювань
+STUDIO_TZ = ZoneInfo(os.getenv("STUDIO_TZ", "Europe/Kyiv"))
+
+# Навіть без змін прокидатись хоча б раз на годину (переведення годинника)
+MAX_SLEEP_SECONDS = 3600
+
+Slot = Tuple[date, int]
+
+
+def studio_now() -> datetime:
+    """Поточний місцевий час студії (naive, як booking_date + booking_hour)"""
+    return datetime.now(STUDIO_TZ).replace(tzinfo=None)
+
+
+class ReminderScheduler:
+    """Черга нагадувань за часом і воркер, що відправляє їх пачками"""
+
+    def __init__(
+        self,
+        hours_before: float = REMINDER_HOURS_BEFORE,
+        batch_size: int = REMINDER_BATCH_SIZE,
+        batch_window: float = REMINDER_BATCH_WINDOW,
+        retry_delay: float = REMINDER_RETRY_SECONDS,
+        max_attempts: int = REMINDER_MAX_ATTEMPTS,
+        session_factory=AsyncSessionLocal,
+        notifier=telegram_notifier
+    ):
+        self.before = timedelta(hours=hours_before)
+        self.batch_size = batch_size
+        self.window = timedelta(seconds=batch_window)
+        self.retry_delay = timedelta(seconds=retry_delay)
+        self.max_attempts = max_attempts
+        self.session_factory = session_factory
+        self.notifier = notifier
+        self._heap: List[Tuple[datetime, date, int]] = []
+        # Актуальний час для кожного слота; запис heap без пари тут - скасований
+        self._due: Dict[Slot, datetime] = {}
+        # Невдалі спроби по слотах, що чекають повтору
+        self._attempts: Dict[Slot, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.scheduled = 0
+        self.cancelled = 0
+        self.batches = 0
+        self.claimed = 0
+        self.delivered = 0
+        self.skipped = 0
+        self.retried = 0
+        self.failed = 0
+
+    def reminder_time(self, booking_date: date, booking_hour: int) -> datetime:
+        """Коли нагадати про слот (місцевий час студії)"""
+        return datetime.combine(booking_date, time(booking_hour)) - self.before
+
+    async def start(self) -> None:
+        """Заповнити чергу з БД і запустити воркер у поточному event loop"""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        await self.load()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def load(self) -> None:
+        """Майбутні активні бронювання без нагадування (індекс uq_bookings_active_slot)"""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(models.Booking.booking_date, models.Booking.booking_hour).where(
+                    models.Booking.booking_date >= studio_now().date(),
+                    models.active_status_filter(),
+                    models.Booking.reminded_at.is_(None)
+                )
+            )
+            for booking_date, booking_hour in result.all():
+                self.schedule(booking_date, booking_hour)
+        logger.info(f"⏰ Нагадувань у черзі: {len(self._due)}")
+
+    def slot_changed(self, booking_date: date, booking_hour: int, booked: bool) -> None:
+        """Слухач availability_cache; можна викликати з будь-якого потоку"""
+        if self._loop is None:
+            return
+        apply = self.schedule if booked else self.cancel
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            apply(booking_date, booking_hour)
+        else:
+            self._loop.call_soon_threadsafe(apply, booking_date, booking_hour)
+
+    def schedule(self, booking_date: date, booking_hour: int) -> None:
+        """Додати нагадування про слот (минулі слоти пропускаються)"""
+        if datetime.combine(booking_date, time(booking_hour)) <= studio_now():
+            return
+        self._push((booking_date, booking_hour), self.reminder_time(booking_date, booking_hour))
+        self.scheduled += 1
+
+    def _push(self, slot: Slot, due: datetime) -> None:
+        self._due[slot] = due
+        heapq.heappush(self._heap, (due, slot[0], slot[1]))
+        # Нове найраніше нагадування - воркер має прокинутись раніше
+        if self._heap[0][0] == due and self._wake is not None:
+            self._wake.set()
+
+    def cancel(self, booking_date: date, booking_hour: int) -> None:
+        """Прибрати нагадування (запис у heap відкидається, коли дійде черга)"""
+        self._attempts.pop((booking_date, booking_hour), None)
+        if self._due.pop((booking_date, booking_hour), None) is None:
+            return
+        self.cancelled += 1
+        # Перебудувати heap, якщо в ньому переважають скасовані записи
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self._heap = [(due, slot[0], slot[1]) for slot, due in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_due(self, now: datetime) -> List[Slot]:
+        """Слоти, нагадування про які настали (і ті, що настануть протягом window)"""
+        batch = []
+        if not self._heap or self._heap[0][0] > now:
+            return batch
+        limit = now + self.window
+        while self._heap and self._heap[0][0] <= limit and len(batch) < self.batch_size:
+            due, booking_date, booking_hour = heapq.heappop(self._heap)
+            slot = (booking_date, booking_hour)
+            if self._due.get(slot) != due:
+                continue
+            del self._due[slot]
+            batch.append(slot)
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            now = studio_now()
+            batch = self._pop_due(now)
+            if batch:
+                try:
+                    await self._deliver(batch)
+                except Exception as e:
+                    logger.error(f"❌ Нагадування: помилка пачки з {len(batch)}: {e}")
+                continue
+
+            timeout = MAX_SLEEP_SECONDS
+            if self._heap:
+                timeout = min(max((self._heap[0][0] - now).total_seconds(), 0), MAX_SLEEP_SECONDS)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _deliver(self, batch: List[Slot]) -> None:
+        """Позначити бронювання слотів пачки і відправити нагадування"""
+        self.batches += 1
+        # Лічильник спроб лишиться тільки у слотів, що підуть на повтор
+        attempts = {slot: self._attempts.pop(slot) for slot in batch if slot in self._attempts}
+        async with self.session_factory() as db:
+            # Забрати тільки ще активні і не нагадані (інший процес міг випередити)
+            result = await db.execute(
+                update(models.Booking)
+                .where(
+                    tuple_(models.Booking.booking_date, models.Booking.booking_hour).in_(batch),
+                    models.active_status_filter(),
+                    models.Booking.reminded_at.is_(None)
+                )
+                .values(reminded_at=datetime.utcnow())
+                .returning(models.Booking.id)
+                .execution_options(synchronize_session=False)
+            )
+            booking_ids = result.scalars().all()
+            await db.commit()
+            self.skipped += len(batch) - len(booking_ids)
+            if not booking_ids:
+                return
+
+            bookings = (await db.scalars(
+                select(models.Booking)
+                .where(models.Booking.id.in_(booking_ids))
+                .order_by(models.Booking.booking_date, models.Booking.booking_hour)
+            )).all()
+            reminders = [
+                {
+                    "booking_id": booking.id,
+                    "booking_date": booking.booking_date,
+                    "booking_hour": booking.booking_hour,
+                    "chat_id": booking.telegram_user_id,
+                    "client_name": booking.client.name,
+                    "client_phone": booking.client.phone,
+                }
+                for booking in bookings
+            ]
+
+        self.claimed += len(reminders)
+        try:
+            results = await self.notifier.send_booking_reminders(reminders)
+        except Exception as e:
+            logger.error(f"❌ Нагадування: помилка відправки пачки з {len(reminders)}: {e}")
+            await self._retry(reminders, attempts)
+            return
+
+        failed_chats = {result.chat_id for result in results if not result.ok}
+        self.delivered += len(results) - len(failed_chats)
+        failed = [item for item in reminders if item["chat_id"] in failed_chats]
+        if failed:
+            await self._retry(failed, attempts)
+        logger.info(f"⏰ Нагадування: пачка з {len(reminders)} бронювань, не доставлено {len(failed)}")
+
+    async def _retry(self, failed: List[dict], attempts: Dict[Slot, int]) -> None:
+        """Зняти reminded_at з недоставлених і поставити їх у чергу ще раз"""
+        now = studio_now()
+        retry = []
+        for item in failed:
+            slot = (item["booking_date"], item["booking_hour"])
+            made = attempts.get(slot, 0) + 1
+            due = now + self.retry_delay
+            if made >= self.max_attempts or due >= datetime.combine(slot[0], time(slot[1])):
+                # Здаємось: reminded_at лишається, щоб рестарт не слав знову
+                self.failed += 1
+                logger.error(f"❌ Нагадування #{item['booking_id']}: не доставлено після {made} спроб")
+                continue
+            self._attempts[slot] = made
+            retry.append((item["booking_id"], slot, due))
+        if not retry:
+            return
+
+        async with self.session_factory() as db:
+            await db.execute(
+                update(models.Booking)
+                .where(models.Booking.id.in_([booking_id for booking_id, _, _ in retry]))
+                .values(reminded_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        for _, slot, due in retry:
+            self._push(slot, due)
+        self.retried += len(retry)
+
+    def stats(self) -> dict:
+        """Розмір черги, найближче нагадування і лічильники"""
+        next_due = min(self._due.values()) if self._due else None
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "queued": len(self._due),
+            "heap_size": len(self._heap),
+            "next_due": next_due.isoformat() if next_due else None,
+            "hours_before": self.before.total_seconds() / 3600,
+            "scheduled": self.scheduled,
+            "cancelled": self.cancelled,
+            "batches": self.batches,
+            "claimed": self.claimed,
+            "delivered": self.delivered,
+            "skipped": self.skipped,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+
+# Глобальний екземпляр
+reminder_scheduler = ReminderScheduler()
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from datetime import timedelta
+from sqlalchemy import select, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import models, schemas
 from ..database import get_db
@@ -15,7 +16,7 @@ from ..security import (
     verify_token,
     get_current_user,
     get_current_active_user,
-    ACCESS_TOKEN_EXPIRE_MINUTES
+    invalidate_user_tokens
 )
 from ..email_service import send_verification_email, send_password_reset_email
 
@@ -25,19 +26,23 @@ router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 async def register(
     user_data: schemas.UserCreate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Реєстрація нового користувача"""
     
-    # Перевірити чи email вже використовується
-    if db.query(models.User).filter(models.User.email == user_data.email).first():
+    # Email і username перевіряються одним запитом (обидва по унікальному індексу)
+    taken = (await db.execute(
+        select(models.User.email, models.User.username).where(or_(
+            models.User.email == user_data.email,
+            models.User.username == user_data.username
+        ))
+    )).all()
+    if any(row.email == user_data.email for row in taken):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Користувач з таким email вже існує"
         )
-    
-    # Перевірити чи username вже використовується
-    if db.query(models.User).filter(models.User.username == user_data.username).first():
+    if taken:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Користувач з таким username вже існує"
@@ -47,13 +52,20 @@ async def register(
     new_user = models.User(
         email=user_data.email,
         username=user_data.username,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await get_password_hash(user_data.password),
         role=models.UserRole.CLIENT  # За замовчуванням всі клієнти
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Паралельна реєстрація з тим самим email/username
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Користувач з таким email або username вже існує"
+        )
     
     # Відправити email для верифікації
     verification_token = create_email_verification_token(new_user.email)
@@ -69,13 +81,13 @@ async def register(
 @router.post("/login", response_model=schemas.TokenResponse)
 async def login(
     user_credentials: schemas.UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Вхід користувача"""
     
-    user = db.query(models.User).filter(models.User.email == user_credentials.email).first()
+    user = await db.scalar(select(models.User).where(models.User.email == user_credentials.email))
     
-    if not user or not verify_password(user_credentials.password, user.password_hash):
+    if not user or not await verify_password(user_credentials.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Невірний email або пароль",
@@ -101,7 +113,7 @@ async def login(
 @router.post("/refresh", response_model=schemas.TokenResponse)
 async def refresh_token(
     token_data: schemas.TokenRefresh,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Оновити access token використовуючи refresh token"""
     
@@ -113,17 +125,18 @@ async def refresh_token(
             detail="Невірний refresh token"
         )
     
-    user = db.query(models.User).filter(models.User.email == email).first()
+    # Потрібен лише прапорець is_active - без завантаження всього рядка
+    is_active = await db.scalar(select(models.User.is_active).where(models.User.email == email))
     
-    if not user or not user.is_active:
+    if not is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Користувач не знайдений або деактивований"
         )
     
     # Створити нові токени
-    access_token = create_access_token(data={"sub": user.email})
-    refresh_token = create_refresh_token(data={"sub": user.email})
+    access_token = create_access_token(data={"sub": email})
+    refresh_token = create_refresh_token(data={"sub": email})
     
     return {
         "access_token": access_token,
@@ -132,7 +145,7 @@ async def refresh_token(
     }
 
 @router.get("/verify-email")
-async def verify_email(token: str, db: Session = Depends(get_db)):
+async def verify_email(token: str, db: AsyncSession = Depends(get_db)):
     """Підтвердити email користувача"""
     
     email = verify_token(token, "email_verification")
@@ -143,7 +156,7 @@ async def verify_email(token: str, db: Session = Depends(get_db)):
             detail="Невірний або прострочений токен"
         )
     
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = await db.scalar(select(models.User).where(models.User.email == email))
     
     if not user:
         raise HTTPException(
@@ -155,7 +168,8 @@ async def verify_email(token: str, db: Session = Depends(get_db)):
         return {"message": "Email вже підтверджено"}
     
     user.is_verified = True
-    db.commit()
+    await db.commit()
+    invalidate_user_tokens(user.email)
     
     return {"message": "Email успішно підтверджено! Тепер ви можете увійти в систему."}
 
@@ -163,11 +177,11 @@ async def verify_email(token: str, db: Session = Depends(get_db)):
 async def resend_verification(
     email: schemas.EmailStr,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Повторно відправити email для верифікації"""
     
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = await db.scalar(select(models.User).where(models.User.email == email))
     
     if not user:
         # Не розкривати чи існує користувач
@@ -193,11 +207,11 @@ async def resend_verification(
 async def forgot_password(
     email: schemas.EmailStr,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Запит на скидання пароля"""
     
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = await db.scalar(select(models.User).where(models.User.email == email))
     
     # Не розкривати чи існує користувач
     if user:
@@ -214,7 +228,7 @@ async def forgot_password(
 @router.post("/reset-password")
 async def reset_password(
     reset_data: schemas.PasswordReset,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Скинути пароль за допомогою токена"""
     
@@ -226,7 +240,7 @@ async def reset_password(
             detail="Невірний або прострочений токен"
         )
     
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = await db.scalar(select(models.User).where(models.User.email == email))
     
     if not user:
         raise HTTPException(
@@ -234,8 +248,9 @@ async def reset_password(
             detail="Користувач не знайдений"
         )
     
-    user.password_hash = get_password_hash(reset_data.new_password)
-    db.commit()
+    user.password_hash = await get_password_hash(reset_data.new_password)
+    await db.commit()
+    invalidate_user_tokens(user.email)
     
     return {"message": "Пароль успішно змінено"}
 
@@ -243,18 +258,19 @@ async def reset_password(
 async def change_password(
     password_data: schemas.PasswordChange,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Змінити пароль (потрібна аутентифікація)"""
     
-    if not verify_password(password_data.old_password, current_user.password_hash):
+    if not await verify_password(password_data.old_password, current_user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Невірний старий пароль"
         )
     
-    current_user.password_hash = get_password_hash(password_data.new_password)
-    db.commit()
+    current_user.password_hash = await get_password_hash(password_data.new_password)
+    await db.commit()
+    invalidate_user_tokens(current_user.email)
     
     return {"message": "Пароль успішно змінено"}
 
@@ -267,16 +283,17 @@ async def get_current_user_info(current_user: models.User = Depends(get_current_
 async def update_current_user(
     user_update: schemas.UserUpdate,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Оновити профіль поточного користувача"""
     
+    old_email = current_user.email
     if user_update.username:
         # Перевірити чи username вже використовується
-        existing = db.query(models.User).filter(
+        existing = await db.scalar(select(models.User.id).where(
             models.User.username == user_update.username,
             models.User.id != current_user.id
-        ).first()
+        ))
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -286,10 +303,10 @@ async def update_current_user(
     
     if user_update.email:
         # Перевірити чи email вже використовується
-        existing = db.query(models.User).filter(
+        existing = await db.scalar(select(models.User.id).where(
             models.User.email == user_update.email,
             models.User.id != current_user.id
-        ).first()
+        ))
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -298,7 +315,7 @@ async def update_current_user(
         current_user.email = user_update.email
         current_user.is_verified = False  # Потрібна повторна верифікація
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    invalidate_user_tokens(old_email)
     
     return current_user
@@ -0,0 +1,96 @@
+"""
+Telegram webhook: апдейти бота приходять у FastAPI замість long polling
+"""
+import hashlib
+import logging
+import os
+import secrets
+from typing import Optional
+from urllib.parse import urlparse
+
+from fastapi import APIRouter, Header, HTTPException, Request, status
+from telegram import Update
+
+from ..bot_state import flow_states
+
+logger = logging.getLogger(__name__)
+
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL") or os.getenv("WEBSITE_URL", "")
+WEBHOOK_PATH = "/api/telegram/webhook"
+
+# Однаковий для всіх воркерів uvicorn: з env або похідний від токена бота
+WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET") or hashlib.sha256(
+    f"webhook:{os.getenv('BOT_TOKEN', '')}".encode()
+).hexdigest()
+
+router = APIRouter(prefix="/api/telegram", tags=["Telegram"])
+
+# Application з bot.py (тільки в режимі webhook)
+_application = None
+
+
+def webhook_url() -> Optional[str]:
+    """Адреса для set_webhook або None, якщо WEBHOOK_BASE_URL - не https-адреса"""
+    base = urlparse(WEBHOOK_BASE_URL)
+    if base.scheme != "https" or not base.netloc:
+        return None
+    return WEBHOOK_BASE_URL.rstrip("/") + WEBHOOK_PATH
+
+
+def webhook_enabled() -> bool:
+    """BOT_MODE=webhook з коректною адресою; інакше бот працює через polling"""
+    if BOT_MODE != "webhook":
+        return False
+    if webhook_url() is None:
+        logger.error(
+            f"❌ BOT_MODE=webhook, але WEBHOOK_BASE_URL={WEBHOOK_BASE_URL!r} - не публічна https-адреса. "
+            "Webhook не реєструється, бот працює через polling"
+        )
+        return False
+    return True
+
+
+async def start_webhook() -> None:
+    """Запустити Application бота в процесі веб-сервісу і зареєструвати webhook"""
+    global _application
+    import bot  # bot.py в корені проєкту
+
+    application = bot.build_application(webhook=True)
+    await application.initialize()
+    await application.start()
+    await application.bot.set_webhook(
+        url=webhook_url(),
+        secret_token=WEBHOOK_SECRET,
+        allowed_updates=bot.ALLOWED_UPDATES
+    )
+    _application = application
+    logger.info(f"✅ Telegram webhook: {webhook_url()}")
+
+
+async def stop_webhook() -> None:
+    """Зупинити Application бота (webhook лишається зареєстрованим)"""
+    global _application
+    if _application is not None:
+        await _application.stop()
+        await _application.shutdown()
+        _application = None
+        # Дописати стан діалогів, накопичений з останнього flush
+        await flow_states.close()
+
+
+@router.post("/webhook")
+async def telegram_webhook(
+    request: Request,
+    x_telegram_bot_api_secret_token: str = Header(None)
+):
+    """Прийняти апдейт від Telegram і передати його хендлерам бота"""
+    if _application is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Webhook вимкнено")
+
+    if not secrets.compare_digest(x_telegram_bot_api_secret_token or "", WEBHOOK_SECRET):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Невірний секрет")
+
+    update = Update.de_json(await request.json(), _application.bot)
+    await _application.update_queue.put(update)
+    return {"ok": True}
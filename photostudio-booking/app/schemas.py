@@ -1,6 +1,11 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, EmailStr, Field, validator
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Optional, List, Literal
+
+from .models import UserRole
+
+# Скільки годин можна забронювати одним запитом
+MAX_BULK_SLOTS = 24
 
 class ClientBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
@@ -28,6 +33,63 @@ class BookingCreate(BaseModel):
             raise ValueError('Не можна бронювати дату в минулому')
         return v
 
+class BookingSlots(BaseModel):
+    """Години на одну дату: список hours або діапазон [start_hour, end_hour)"""
+    booking_date: date
+    hours: Optional[List[int]] = None
+    start_hour: Optional[int] = Field(None, ge=0, le=23)
+    end_hour: Optional[int] = Field(None, ge=1, le=24)
+    
+    @validator('booking_date')
+    def date_not_in_past(cls, v):
+        if v < date.today():
+            raise ValueError('Не можна бронювати дату в минулому')
+        return v
+    
+    @validator('hours', each_item=True)
+    def hour_in_day(cls, v):
+        if not 0 <= v <= 23:
+            raise ValueError('Година повинна бути від 0 до 23')
+        return v
+    
+    def slot_hours(self) -> List[int]:
+        """Години цієї дати (відсортовані, без повторів)"""
+        if self.hours is not None:
+            return sorted(set(self.hours))
+        return list(range(self.start_hour, self.end_hour))
+
+class BulkBookingCreate(BaseModel):
+    """Кілька годин (на одній або кількох датах) одним бронюванням"""
+    name: str = Field(..., min_length=1, max_length=100)
+    phone: str = Field(..., min_length=10, max_length=20)
+    slots: List[BookingSlots] = Field(..., min_length=1, max_length=31)
+    
+    @validator('slots')
+    def valid_slots(cls, slots):
+        seen = set()
+        total = 0
+        for item in slots:
+            if (item.hours is None) == (item.start_hour is None or item.end_hour is None):
+                raise ValueError('Вкажіть або hours, або start_hour і end_hour')
+            hours = item.slot_hours()
+            if not hours:
+                raise ValueError('Порожній набір годин')
+            if item.booking_date in seen:
+                raise ValueError('Кожна дата має бути вказана один раз')
+            seen.add(item.booking_date)
+            total += len(hours)
+        if total > MAX_BULK_SLOTS:
+            raise ValueError(f'Не більше {MAX_BULK_SLOTS} годин за раз')
+        return slots
+    
+    def all_slots(self) -> List[tuple]:
+        """Пари (дата, година) у порядку дат і годин"""
+        return [
+            (item.booking_date, hour)
+            for item in sorted(self.slots, key=lambda item: item.booking_date)
+            for hour in item.slot_hours()
+        ]
+
 class BookingResponse(BaseModel):
     id: int
     booking_date: date
@@ -68,3 +130,62 @@ class AdminDayStatusResponse(BaseModel):
     has_bookings: bool
     bookings: List[BookingDetailResponse]
 
+# Pricing schemas
+class ServiceOptions(BaseModel):
+    """Комбінація додаткових послуг"""
+    people: int = Field(4, ge=1, le=20)
+    zone: Literal["light", "dark", "both"] = "light"
+    animals: int = Field(0, ge=0, le=10)
+    bg: Literal["none", "white", "black", "red"] = "none"
+
+class QuoteRequest(BaseModel):
+    items: List[ServiceOptions] = Field(..., min_length=1, max_length=500)
+
+class QuoteResponse(BaseModel):
+    prices: List[int]
+
+class PriceRecomputeResponse(BaseModel):
+    """Результат масового перерахунку total_price"""
+    updated: int
+
+# User auth schemas
+class UserCreate(BaseModel):
+    email: EmailStr
+    username: str = Field(..., min_length=3, max_length=50, pattern=r"^[A-Za-z0-9_.-]+$")
+    password: str = Field(..., min_length=8, max_length=72)
+
+class UserLogin(BaseModel):
+    email: EmailStr
+    password: str = Field(..., max_length=72)
+
+class UserUpdate(BaseModel):
+    email: Optional[EmailStr] = None
+    username: Optional[str] = Field(None, min_length=3, max_length=50, pattern=r"^[A-Za-z0-9_.-]+$")
+
+class UserResponse(BaseModel):
+    id: int
+    email: EmailStr
+    username: str
+    role: UserRole
+    is_active: bool
+    is_verified: bool
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class TokenResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
+class PasswordReset(BaseModel):
+    token: str
+    new_password: str = Field(..., min_length=8, max_length=72)
+
+class PasswordChange(BaseModel):
+    old_password: str = Field(..., max_length=72)
+    new_password: str = Field(..., min_length=8, max_length=72)
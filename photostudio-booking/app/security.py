@@ -1,20 +1,33 @@
+import asyncio
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 from dotenv import load_dotenv
 
 from . import models
 from .database import get_db
+from .token_cache import token_cache
 
 load_dotenv()
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing. Вартість bcrypt (2^rounds ітерацій); старі хеші з іншою
+# вартістю перевіряються як і раніше
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt відпускає GIL, тому потоки рахують паралельно і не блокують event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Скільки операцій може чекати в черзі; решта отримує 503
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
 
 # JWT settings
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-please-change-in-production")
@@ -24,13 +37,72 @@ REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Перевірити пароль"""
-    return pwd_context.verify(plain_password, hashed_password)
+class PasswordHasher:
+    """bcrypt в обмеженому пулі потоків з метриками черги"""
+    
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.pending = 0  # в черзі + виконуються
+        self.max_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.work_seconds = 0.0
+    
+    async def run(self, func, *args):
+        """Виконати func(*args) в пулі; 503 якщо черга переповнена"""
+        if self.pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Сервер перевантажений, спробуйте ще раз",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        self.max_pending = max(self.max_pending, self.pending)
+        queued_at = time.perf_counter()
+        
+        def timed():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self.wait_seconds += started - queued_at
+                self.work_seconds += time.perf_counter() - started
+        
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+    
+    def stats(self) -> dict:
+        """Глибина черги і середній час очікування/роботи (мс)"""
+        done = self.completed or 1
+        return {
+            "workers": self.workers,
+            "rounds": BCRYPT_ROUNDS,
+            "pending": self.pending,
+            "queued": max(self.pending - self.workers, 0),
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_seconds / done * 1000, 1),
+            "avg_work_ms": round(self.work_seconds / done * 1000, 1),
+        }
 
-def get_password_hash(password: str) -> str:
-    """Захешувати пароль"""
-    return pwd_context.hash(password)
+# Глобальний екземпляр
+password_hasher = PasswordHasher()
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Перевірити пароль (в пулі bcrypt)"""
+    return await password_hasher.run(pwd_context.verify, plain_password, hashed_password)
+
+async def get_password_hash(password: str) -> str:
+    """Захешувати пароль (в пулі bcrypt)"""
+    return await password_hasher.run(pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Створити access token"""
@@ -71,22 +143,19 @@ def verify_token(token: str, token_type: str) -> Optional[str]:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
-        exp: int = payload.get("exp")
         t_type: str = payload.get("type")
         
+        # exp перевіряє jwt.decode (прострочений токен -> JWTError)
         if email is None or t_type != token_type:
             return None
         
-        if datetime.utcnow() > datetime.fromtimestamp(exp):
-            return None
-            
         return email
     except JWTError:
         return None
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> models.User:
     """Отримати поточного користувача з токена"""
     credentials_exception = HTTPException(
@@ -95,6 +164,11 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    # Токен вже перевіряли: без декодування і без SELECT
+    cached = token_cache.get(token)
+    if cached is not None and cached.claims.get("type") == "access":
+        return await db.merge(cached.principal, load=False)
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -105,7 +179,7 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = await db.scalar(select(models.User).where(models.User.email == email))
     if user is None:
         raise credentials_exception
     
@@ -115,8 +189,26 @@ async def get_current_user(
             detail="Користувач деактивований"
         )
     
+    token_cache.put(token, payload, _detached_copy(user), subject=email)
     return user
 
+def _detached_copy(user: models.User) -> models.User:
+    """
+    Копія користувача для кешу, не прив'язана до сесії.
+    
+    При влучанні в кеш її підключає до сесії запиту db.merge(load=False)
+    без запиту в БД, а зміни в запиті не зачіпають саму копію.
+    """
+    copy = models.User(**{
+        attr.key: getattr(user, attr.key) for attr in inspect(models.User).column_attrs
+    })
+    make_transient_to_detached(copy)
+    return copy
+
+def invalidate_user_tokens(email: str) -> None:
+    """Забути кешовані токени користувача (пароль, email, верифікація, деактивація)"""
+    token_cache.invalidate_subject(email)
+
 async def get_current_active_user(
     current_user: models.User = Depends(get_current_user)
 ) -> models.User:
@@ -128,8 +220,8 @@ async def get_current_active_user(
         )
     return current_user
 
-async def require_role(required_roles: list[models.UserRole]):
-    """Decorator для перевірки ролі користувача"""
+def require_role(required_roles: list[models.UserRole]):
+    """Залежність для перевірки ролі: Depends(require_role([models.UserRole.ADMIN]))"""
     async def role_checker(current_user: models.User = Depends(get_current_active_user)):
         if current_user.role not in required_roles:
             raise HTTPException(
@@ -0,0 +1,237 @@
+"""
+Збірка і роздача статики: стиснення gzip/brotli та fingerprint-імена
+
+Збірка виносить inline CSS/JS зі сторінок у файли з хешем вмісту в імені
+(/assets/index.3f2a9c1b7d4e.js), тому їх можна кешувати назавжди
+(immutable). Кожен файл зберігається в трьох варіантах (як є, .gz, .br);
+сервер віддає найкращий з підтримуваних клієнтом за Accept-Encoding без
+стиснення на льоту. Сторінки кешуються з ревалідацією по ETag.
+
+Збирається при старті; запити лише читають готові файли з пам'яті. Для
+розробки STATIC_AUTORELOAD=true перезбирає змінені сторінки в пулі потоків.
+
+Збірка вручну: python -m app.static_assets
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+
+try:
+    import brotli
+except ImportError:  # без brotli віддаємо тільки gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Перевіряти і перезбирати змінені сторінки на запитах (тільки для розробки)
+STATIC_AUTORELOAD = os.getenv("STATIC_AUTORELOAD", "false").lower() in ("1", "true", "yes")
+
+STATIC_DIR = "static"
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+PAGES = ("index.html", "admin.html")
+ASSETS_URL = "/assets/"
+
+PAGE_CACHE_CONTROL = "no-cache"
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Для text/* charset=utf-8 дописує Starlette
+MEDIA_TYPES = {
+    ".html": "text/html",
+    ".css": "text/css",
+    ".js": "application/javascript; charset=utf-8",
+}
+
+# Розширення файлу для кожного кодування, у порядку переваги
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_STYLE_RE = re.compile(r"<style>(.*?)</style>", re.S)
+_SCRIPT_RE = re.compile(r"<script>(.*?)</script>", re.S)
+
+
+def fingerprint(content: bytes) -> str:
+    """Короткий хеш вмісту для імені файлу та ETag"""
+    return hashlib.sha256(content).hexdigest()[:12]
+
+
+def _write_variants(path: str, content: bytes) -> None:
+    """Записати файл і його стиснені варіанти"""
+    with open(path, "wb") as f:
+        f.write(content)
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(content, quality=11))
+
+
+def build(static_dir: str = STATIC_DIR, dist_dir: str = DIST_DIR) -> dict:
+    """Зібрати сторінки в dist_dir; повертає manifest"""
+    os.makedirs(dist_dir, exist_ok=True)
+    manifest = {"pages": {}, "assets": []}
+
+    for page in PAGES:
+        with open(os.path.join(static_dir, page), encoding="utf-8") as f:
+            html = f.read()
+        stem = page.rsplit(".", 1)[0]
+
+        def extract(pattern, extension, tag):
+            nonlocal html
+            match = pattern.search(html)
+            if match is None:
+                return
+            content = match.group(1).strip().encode()
+            name = f"{stem}.{fingerprint(content)}{extension}"
+            _write_variants(os.path.join(dist_dir, name), content)
+            manifest["assets"].append(name)
+            html = html[:match.start()] + tag.format(url=ASSETS_URL + name) + html[match.end():]
+
+        extract(_STYLE_RE, ".css", '<link rel="stylesheet" href="{url}">')
+        extract(_SCRIPT_RE, ".js", '<script src="{url}"></script>')
+
+        _write_variants(os.path.join(dist_dir, page), html.encode())
+        manifest["pages"][page] = os.stat(os.path.join(static_dir, page)).st_mtime_ns
+
+    with open(os.path.join(dist_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    logger.info(f"📦 Статику зібрано: {', '.join(manifest['assets'])}")
+    return manifest
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    """Кодування з Accept-Encoding (без тих, що мають q=0)"""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class _Asset:
+    __slots__ = ("media_type", "etag", "variants")
+
+    def __init__(self, media_type: str, etag: str, variants: Dict[str, bytes]):
+        self.media_type = media_type
+        self.etag = etag
+        self.variants = variants  # кодування -> байти ("identity" - без стиснення)
+
+
+class StaticAssets:
+    """Зібрана статика в пам'яті з вибором кодування"""
+
+    def __init__(self, static_dir: str = STATIC_DIR, dist_dir: str = DIST_DIR, autoreload: bool = STATIC_AUTORELOAD):
+        self.static_dir = static_dir
+        self.dist_dir = dist_dir
+        self.autoreload = autoreload
+        self._files: Dict[str, _Asset] = {}
+        self._source_mtimes: Dict[str, int] = {}
+        # mtime сторінок, з якими збірка впала: не повторювати, поки їх не змінять
+        self._failed_mtimes: Optional[Dict[str, int]] = None
+        self._reloading = threading.Lock()
+
+    def _current_mtimes(self) -> Dict[str, int]:
+        mtimes = {}
+        for page in PAGES:
+            try:
+                mtimes[page] = os.stat(os.path.join(self.static_dir, page)).st_mtime_ns
+            except OSError:
+                mtimes[page] = 0
+        return mtimes
+
+    def load(self) -> None:
+        """Прочитати dist (і перезібрати, якщо сторінки змінились)"""
+        try:
+            self._load()
+        except Exception:
+            self._failed_mtimes = self._current_mtimes()
+            raise
+        self._failed_mtimes = None
+
+    def _load(self) -> None:
+        manifest_path = os.path.join(self.dist_dir, "manifest.json")
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            self._source_mtimes = manifest["pages"]
+        except (OSError, ValueError, KeyError):
+            self._source_mtimes = {}
+        if self._current_mtimes() != self._source_mtimes:
+            manifest = build(self.static_dir, self.dist_dir)
+            self._source_mtimes = manifest["pages"]
+
+        files = {}
+        for name in [*manifest["pages"], *manifest["assets"]]:
+            path = os.path.join(self.dist_dir, name)
+            with open(path, "rb") as f:
+                variants = {"identity": f.read()}
+            for encoding, extension in ENCODINGS:
+                if os.path.exists(path + extension):
+                    with open(path + extension, "rb") as f:
+                        variants[encoding] = f.read()
+            media_type = MEDIA_TYPES[os.path.splitext(name)[1]]
+            files[name] = _Asset(media_type, fingerprint(variants["identity"]), variants)
+        self._files = files
+
+    def reload_if_changed(self) -> None:
+        """Перезібрати змінені сторінки; помилка лише логується (сторінки віддаються як є)"""
+        if not self._reloading.acquire(blocking=False):
+            return  # вже перезбирає інший запит
+        try:
+            mtimes = self._current_mtimes()
+            if mtimes in (self._source_mtimes, self._failed_mtimes):
+                return
+            try:
+                self.load()
+            except Exception as e:
+                logger.error(f"⚠️ Не вдалося перезібрати статику: {e}")
+        finally:
+            self._reloading.release()
+
+    async def refresh(self) -> None:
+        """STATIC_AUTORELOAD: перевірка і збірка в пулі потоків, не в event loop"""
+        if self.autoreload:
+            await run_in_threadpool(self.reload_if_changed)
+
+    def response(self, name: str, request: Request, immutable: bool = False) -> Optional[Response]:
+        """Відповідь з найкращим варіантом файлу (None - такого файлу немає)"""
+        asset = self._files.get(name)
+        if asset is None:
+            return None
+
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        encoding = next(
+            (encoding for encoding, _ in ENCODINGS if encoding in accepted and encoding in asset.variants),
+            "identity"
+        )
+        # Сильний ETag - окремий для кожного кодування
+        etag = f'"{asset.etag}-{encoding}"'
+        headers = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": ASSET_CACHE_CONTROL if immutable else PAGE_CACHE_CONTROL,
+        }
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in {tag.strip() for tag in if_none_match.split(",")}:
+            return Response(status_code=304, headers=headers)
+        return Response(asset.variants[encoding], media_type=asset.media_type, headers=headers)
+
+
+# Глобальний екземпляр
+static_assets = StaticAssets()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    build()
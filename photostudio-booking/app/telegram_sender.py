@@ -0,0 +1,197 @@
+"""
+Спільний відправник Telegram повідомлень для веб-сервісу і бота
+
+Розсилає адмінам паралельно, дотримуючись лімітів Telegram (token bucket на
+бота загалом і на кожен чат), коректно обробляє RetryAfter і рахує затримку
+доставки. Бакети чатів, що вже відпочили, витісняються (LRU), тож нагадування
+клієнтам не накопичують стан по кожному чату назавжди.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, List, Optional
+
+from telegram.error import RetryAfter, TelegramError
+
+logger = logging.getLogger(__name__)
+
+# Telegram: ~30 повідомлень/с на бота, не частіше 1/с в один чат
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25"))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+# Скільки бакетів чатів тримати; зайві витісняються, коли вже повні і без черги
+TELEGRAM_CHAT_BUCKETS = int(os.getenv("TELEGRAM_CHAT_BUCKETS", "1000"))
+RETRY_AFTER_ATTEMPTS = 3
+
+
+class TokenBucket:
+    """Async token bucket: rate токенів/с, не більше capacity накопичених"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Дочекатися одного токена (черга FIFO)"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Не видавати токени найближчі seconds секунд (після RetryAfter)"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def idle(self) -> bool:
+        """Ніхто не чекає і бакет уже повний - нічим не відрізняється від нового"""
+        now = time.monotonic()
+        return (
+            not self._lock.locked()
+            and now >= self.blocked_until
+            and self.tokens + (now - self.updated) * self.rate >= self.capacity
+        )
+
+
+@dataclass
+class SendResult:
+    """Результат відправки одному отримувачу"""
+    chat_id: int
+    ok: bool
+    latency: float  # секунди, разом з очікуванням лімітів
+    error: Optional[str] = None
+
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    return retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+
+
+class TelegramSender:
+    """Паралельна розсилка з rate limit'ами Telegram"""
+
+    def __init__(
+        self,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        chat_rate: float = TELEGRAM_CHAT_RATE,
+        max_chats: int = TELEGRAM_CHAT_BUCKETS
+    ):
+        self.chat_rate = chat_rate
+        self.max_chats = max_chats
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats: "OrderedDict[int, TokenBucket]" = OrderedDict()
+        self.sent = 0
+        self.errors = 0
+        self.retry_after_hits = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._total_latency = 0.0
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is not None:
+            self._chats.move_to_end(chat_id)
+            return bucket
+        bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, 1)
+        self._evict_idle()
+        return bucket
+
+    def _evict_idle(self) -> None:
+        """Витіснити найстаріші бакети понад max_chats (зайняті лишаються)"""
+        excess = len(self._chats) - self.max_chats
+        if excess <= 0:
+            return
+        idle = []
+        for chat_id, bucket in self._chats.items():
+            if bucket.idle():
+                idle.append(chat_id)
+                if len(idle) == excess:
+                    break
+        for chat_id in idle:
+            del self._chats[chat_id]
+
+    async def call(self, chat_id: int, method: Callable[[], Awaitable]) -> SendResult:
+        """
+        Виконати один API-виклик для чату з урахуванням лімітів.
+
+        method - рівно один запит до Bot API: він бере один токен, і після
+        RetryAfter повторюється тільки він. Кілька повідомлень в один чат -
+        кілька викликів call.
+        """
+        started = time.perf_counter()
+        chat_bucket = self._chat_bucket(chat_id)
+        error = None
+        for _ in range(RETRY_AFTER_ATTEMPTS):
+            await chat_bucket.acquire()
+            await self._global.acquire()
+            try:
+                await method()
+                error = None
+                break
+            except RetryAfter as e:
+                delay = _retry_after_seconds(e)
+                self.retry_after_hits += 1
+                # Flood wait стосується всього бота: решта чатів теж чекає
+                chat_bucket.pause(delay)
+                self._global.pause(delay)
+                error = f"RetryAfter {delay}s"
+                logger.warning(f"⏳ Telegram просить зачекати {delay}s (чат {chat_id})")
+            except TelegramError as e:
+                error = str(e)
+                break
+
+        latency = time.perf_counter() - started
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self._total_latency += latency
+        if error is None:
+            self.sent += 1
+            logger.info(f"✅ Повідомлення відправлено в чат {chat_id} за {latency * 1000:.0f} мс")
+        else:
+            self.errors += 1
+            logger.error(f"❌ Помилка відправки в чат {chat_id}: {error}")
+        return SendResult(chat_id=chat_id, ok=error is None, latency=latency, error=error)
+
+    async def fan_out(self, chat_ids: Iterable[int], method: Callable[[int], Awaitable]) -> List[SendResult]:
+        """Виконати method(chat_id) - один API-виклик - для всіх чатів паралельно"""
+        return list(await asyncio.gather(*(
+            self.call(chat_id, lambda chat_id=chat_id: method(chat_id))
+            for chat_id in chat_ids
+        )))
+
+    async def broadcast(self, bot, chat_ids: Iterable[int], text: str, **kwargs) -> List[SendResult]:
+        """Відправити текст у всі чати паралельно"""
+        return await self.fan_out(
+            chat_ids,
+            lambda chat_id: bot.send_message(chat_id=chat_id, text=text, **kwargs)
+        )
+
+    def stats(self) -> dict:
+        """Лічильники і затримки (мс) загалом, без ID чатів"""
+        calls = self.sent + self.errors
+        return {
+            "sent": self.sent,
+            "errors": self.errors,
+            "retry_after_hits": self.retry_after_hits,
+            "chats_tracked": len(self._chats),
+            "last_latency_ms": round(self.last_latency * 1000, 1),
+            "avg_latency_ms": round(self._total_latency / calls * 1000, 1) if calls else 0.0,
+            "max_latency_ms": round(self.max_latency * 1000, 1),
+        }
+
+
+# Глобальний екземпляр
+telegram_sender = TelegramSender()
@@ -4,10 +4,15 @@ Telegram Bot Service для CLIQUE Photostudio
 """
 import os
 import logging
-from typing import Optional
+from typing import List, Optional
 from telegram import Bot
 from telegram.error import TelegramError
-from datetime import datetime
+
+from .messages import (
+    render_new_booking, render_new_bookings, render_booking_cancelled,
+    render_reminder, render_reminders_digest
+)
+from .telegram_sender import SendResult, telegram_sender
 
 # Налаштування логування
 logging.basicConfig(level=logging.INFO)
@@ -53,55 +58,35 @@ class TelegramNotifier:
             logger.warning("Telegram бот не налаштований або немає адмінів для сповіщень")
             return False
         
-        # Форматування дати
-        try:
-            date_obj = datetime.strptime(booking_date, "%Y-%m-%d")
-            formatted_date = date_obj.strftime("%d %B %Y")
-            month_names = {
-                "January": "січня", "February": "лютого", "March": "березня",
-                "April": "квітня", "May": "травня", "June": "червня",
-                "July": "липня", "August": "серпня", "September": "вересня",
-                "October": "жовтня", "November": "листопада", "December": "грудня"
-            }
-            for eng, ukr in month_names.items():
-                formatted_date = formatted_date.replace(eng, ukr)
-        except:
-            formatted_date = booking_date
-        
-        # Форматування часу
-        time_range = f"{booking_hour:02d}:00 - {booking_hour+1:02d}:00"
-        
-        # Повідомлення
-        message = f"""
-🎉 <b>Нове бронювання!</b>
-
-📅 <b>Дата:</b> {formatted_date}
-🕐 <b>Час:</b> {time_range}
-
-👤 <b>Клієнт:</b> {client_name}
-📞 <b>Телефон:</b> <code>{client_phone}</code>
-
-🆔 Бронювання #{booking_id}
-
-💼 <b>CLIQUE Photostudio</b>
-"""
+        message = render_new_booking(client_name, client_phone, booking_date, booking_hour, booking_id)
         
-        success_count = 0
+        # Відправити всім адмінам паралельно
+        results = await telegram_sender.broadcast(
+            self.bot, self.admin_chat_ids, message, parse_mode="HTML"
+        )
+        return any(result.ok for result in results)
+    
+    async def send_new_bookings_notification(
+        self,
+        client_name: str,
+        client_phone: str,
+        slots: List[list],
+        booking_ids: List[int],
+        booking_id: int
+    ) -> bool:
+        """Відправити одне сповіщення про бронювання кількох годин"""
         
-        # Відправити всім адмінам
-        for chat_id in self.admin_chat_ids:
-            try:
-                await self.bot.send_message(
-                    chat_id=chat_id,
-                    text=message,
-                    parse_mode="HTML"
-                )
-                success_count += 1
-                logger.info(f"✅ Повідомлення відправлено адміну {chat_id}")
-            except TelegramError as e:
-                logger.error(f"❌ Помилка відправки адміну {chat_id}: {e}")
-        
-        return success_count > 0
+        if not self.bot or not self.admin_chat_ids:
+            logger.warning("Telegram бот не налаштований або немає адмінів для сповіщень")
+            return False
+        
+        message = render_new_bookings(client_name, client_phone, slots, booking_ids)
+        
+        # Відправити всім адмінам паралельно
+        results = await telegram_sender.broadcast(
+            self.bot, self.admin_chat_ids, message, parse_mode="HTML"
+        )
+        return any(result.ok for result in results)
     
     async def send_booking_cancelled_notification(
         self,
@@ -115,51 +100,40 @@ class TelegramNotifier:
         if not self.bot or not self.admin_chat_ids:
             return False
         
-        # Форматування дати
-        try:
-            date_obj = datetime.strptime(booking_date, "%Y-%m-%d")
-            formatted_date = date_obj.strftime("%d %B %Y")
-            month_names = {
-                "January": "січня", "February": "лютого", "March": "березня",
-                "April": "квітня", "May": "травня", "June": "червня",
-                "July": "липня", "August": "серпня", "September": "вересня",
-                "October": "жовтня", "November": "листопада", "December": "грудня"
-            }
-            for eng, ukr in month_names.items():
-                formatted_date = formatted_date.replace(eng, ukr)
-        except:
-            formatted_date = booking_date
-        
-        time_range = f"{booking_hour:02d}:00 - {booking_hour+1:02d}:00"
-        
-        message = f"""
-❌ <b>Бронювання скасовано</b>
-
-📅 <b>Дата:</b> {formatted_date}
-🕐 <b>Час:</b> {time_range}
-
-👤 <b>Клієнт:</b> {client_name}
-
-🆔 Бронювання #{booking_id}
-
-💼 <b>CLIQUE Photostudio</b>
-"""
+        message = render_booking_cancelled(client_name, booking_date, booking_hour, booking_id)
+        
+        # Відправити всім адмінам паралельно
+        results = await telegram_sender.broadcast(
+            self.bot, self.admin_chat_ids, message, parse_mode="HTML"
+        )
+        return any(result.ok for result in results)
+    
+    async def send_booking_reminders(self, reminders: List[dict]) -> List[SendResult]:
+        """
+        Нагадування пачкою: клієнтам - по одному повідомленню на чат (усі
+        його години разом), адмінам - одне зведення. Повертає результати
+        відправки клієнтам, по одному на чат.
+        """
+        if not self.bot or not reminders:
+            return []
         
-        success_count = 0
+        slots_by_chat = {}
+        for item in reminders:
+            if item["chat_id"]:
+                slots_by_chat.setdefault(item["chat_id"], []).append((item["booking_date"], item["booking_hour"]))
         
-        for chat_id in self.admin_chat_ids:
-            try:
-                await self.bot.send_message(
-                    chat_id=chat_id,
-                    text=message,
-                    parse_mode="HTML"
-                )
-                success_count += 1
-                logger.info(f"✅ Сповіщення про скасування відправлено адміну {chat_id}")
-            except TelegramError as e:
-                logger.error(f"❌ Помилка відправки адміну {chat_id}: {e}")
-        
-        return success_count > 0
+        # Клієнтам паралельно, в межах лімітів Telegram
+        results = await telegram_sender.fan_out(
+            slots_by_chat,
+            lambda chat_id: self.bot.send_message(
+                chat_id=chat_id, text=render_reminder(slots_by_chat[chat_id]), parse_mode="HTML"
+            )
+        )
+        if self.admin_chat_ids:
+            await telegram_sender.broadcast(
+                self.bot, self.admin_chat_ids, render_reminders_digest(reminders), parse_mode="HTML"
+            )
+        return results
     
     async def send_test_message(self, chat_id: int) -> bool:
         """Відправити тестове повідомлення"""
@@ -0,0 +1,117 @@
+"""
+Кеш перевірених JWT: повторні запити з тим самим токеном не декодують і не
+перевіряють підпис заново і не шукають користувача в БД
+
+Ключ - SHA-256 токена (сам токен у пам'яті не зберігається). Запис живе
+не довше TOKEN_CACHE_TTL і не довше за exp токена; записи користувача
+видаляються при зміні пароля, email або деактивації.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "60"))
+
+
+class _Entry:
+    __slots__ = ("claims", "principal", "subject", "expires_at")
+
+    def __init__(self, claims: dict, principal: Any, subject: Optional[str], expires_at: float):
+        self.claims = claims
+        self.principal = principal
+        self.subject = subject
+        self.expires_at = expires_at
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+class TokenCache:
+    """Обмежений LRU-кеш з TTL: digest токена -> (claims, principal)"""
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, ttl: float = TOKEN_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, _Entry]" = OrderedDict()
+        self._by_subject: Dict[str, Set[bytes]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[_Entry]:
+        """Запис для токена або None (промах, протерміновано)"""
+        digest = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry.expires_at <= time.time():
+                self._remove(digest)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry
+
+    def put(self, token: str, claims: dict, principal: Any = None, subject: Optional[str] = None) -> None:
+        """Запам'ятати перевірений токен (до exp з claims, не довше ttl)"""
+        expires_at = time.time() + self.ttl
+        exp = claims.get("exp")
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        digest = token_digest(token)
+        with self._lock:
+            self._remove(digest)
+            self._entries[digest] = _Entry(claims, principal, subject, expires_at)
+            if subject is not None:
+                self._by_subject.setdefault(subject, set()).add(digest)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_subject(self, subject: str) -> None:
+        """Забути всі токени користувача (пароль, email, деактивація)"""
+        with self._lock:
+            for digest in list(self._by_subject.get(subject, ())):
+                self._remove(digest)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_subject.clear()
+
+    def _remove(self, digest: bytes) -> None:
+        entry = self._entries.pop(digest, None)
+        if entry is not None and entry.subject is not None:
+            digests = self._by_subject.get(entry.subject)
+            if digests is not None:
+                digests.discard(digest)
+                if not digests:
+                    del self._by_subject[entry.subject]
+
+    def stats(self) -> dict:
+        """Лічильники влучань/промахів"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+        }
+
+
+# Глобальний екземпляр
+token_cache = TokenCache()
@@ -0,0 +1,91 @@
+"""
+Пропускна здатність спискових ендпоінтів без і з FAST_JSON (orjson)
+
+Заповнює тимчасову SQLite бронюваннями, проганяє кожен ендпоінт через
+TestClient у звичайному режимі і з FAST_JSON, перевіряє, що тіла відповідей
+побайтово однакові, і друкує запитів/с для обох режимів.
+
+    python -m benchmarks.bench_fast_json [--bookings 500] [--requests 200]
+"""
+import os
+import tempfile
+
+# До імпорту app: engine створюється з DATABASE_URL при імпорті
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.pop("BOT_TOKEN", None)
+os.environ.pop("TELEGRAM_ADMIN_CHAT_IDS", None)
+
+import argparse
+import logging
+import time
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+from app import fastjson, models
+from app.availability import availability_cache
+from app.database import AsyncSessionLocal
+from app.main import app
+
+
+async def seed(count: int, start: date) -> None:
+    """По клієнту на бронювання, 10 годин на день починаючи зі start"""
+    async with AsyncSessionLocal() as db:
+        for i in range(count):
+            client = models.Client(name=f"Клієнт {i}", phone=f"050{i:07d}")
+            db.add(models.Booking(
+                client=client,
+                booking_date=start + timedelta(days=i // 10),
+                booking_hour=9 + i % 10
+            ))
+        await db.commit()
+
+
+def measure(client: TestClient, url: str, headers: dict, requests: int):
+    """(запитів/с, тіло останньої відповіді)"""
+    availability_cache.clear()
+    response = client.get(url, headers=headers)  # прогрів і кеш місяця
+    assert response.status_code == 200, response.text
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(url, headers=headers)
+    return requests / (time.perf_counter() - started), response.content
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bookings", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=200, help="запитів на ендпоінт і режим")
+    args = parser.parse_args()
+    # Без рядка логу на кожен запит TestClient
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if fastjson.orjson is None:
+        raise SystemExit("orjson не встановлено - FAST_JSON нічого не змінить")
+
+    start = date.today().replace(day=1) + timedelta(days=40)
+    end = start + timedelta(days=args.bookings // 10)
+    with TestClient(app) as client:
+        client.portal.call(seed, args.bookings, start)
+        token = client.post(
+            "/api/admin/login", json={"password": os.getenv("ADMIN_PASSWORD", "admin123")}
+        ).json()["access_token"]
+        admin = {"Authorization": f"Bearer {token}"}
+        endpoints = [
+            (f"/api/bookings/?start_date={start}&end_date={end}", {}),
+            (f"/api/admin/bookings/?start_date={start}&end_date={end}", admin),
+            ("/api/clients/", {}),
+            (f"/api/calendar/{start.year}/{start.month}", {}),
+        ]
+
+        print(f"{args.bookings} бронювань, {args.requests} запитів на ендпоінт")
+        for url, headers in endpoints:
+            fastjson.FAST_JSON = False
+            slow, slow_body = measure(client, url, headers, args.requests)
+            fastjson.FAST_JSON = True
+            fast, fast_body = measure(client, url, headers, args.requests)
+            same = "однакові" if slow_body == fast_body else "РІЗНІ"
+            print(f"  {url.split('?')[0]:<26} {slow:>8.0f} -> {fast:>8.0f} req/s (x{fast / slow:.1f}), тіла {same}")
+
+
+if __name__ == "__main__":
+    main()
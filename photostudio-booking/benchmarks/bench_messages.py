@@ -0,0 +1,95 @@
+"""
+Мікробенчмарк рендерингу сповіщень (app/messages)
+
+Порівнює старий шлях (strptime + strftime + заміна англійських назв місяців
+на кожне повідомлення) з кешованим форматуванням дат і готовими шаблонами.
+Спершу перевіряє, що обидва дають однаковий текст.
+
+    python -m benchmarks.bench_messages [--number 100000] [--dates 365]
+"""
+import argparse
+import timeit
+from datetime import date, datetime, timedelta
+
+from app import messages
+
+MONTH_NAMES = {
+    "January": "січня", "February": "лютого", "March": "березня",
+    "April": "квітня", "May": "травня", "June": "червня",
+    "July": "липня", "August": "серпня", "September": "вересня",
+    "October": "жовтня", "November": "листопада", "December": "грудня"
+}
+
+
+def legacy_format_date(booking_date: str) -> str:
+    """Дата так, як її форматував TelegramNotifier раніше"""
+    try:
+        formatted_date = datetime.strptime(booking_date, "%Y-%m-%d").strftime("%d %B %Y")
+    except ValueError:
+        return booking_date
+    for eng, ukr in MONTH_NAMES.items():
+        formatted_date = formatted_date.replace(eng, ukr)
+    return formatted_date
+
+
+def legacy_new_booking(client_name, client_phone, booking_date, booking_hour, booking_id) -> str:
+    """Сповіщення про нове бронювання так, як його будував TelegramNotifier раніше"""
+    formatted_date = legacy_format_date(booking_date)
+    time_range = f"{booking_hour:02d}:00 - {booking_hour + 1:02d}:00"
+    return f"""
+🎉 <b>Нове бронювання!</b>
+
+📅 <b>Дата:</b> {formatted_date}
+🕐 <b>Час:</b> {time_range}
+
+👤 <b>Клієнт:</b> {client_name}
+📞 <b>Телефон:</b> <code>{client_phone}</code>
+
+🆔 Бронювання #{booking_id}
+
+💼 <b>CLIQUE Photostudio</b>
+"""
+
+
+def _rate(func, args_list, number: int) -> float:
+    """Викликів за секунду; аргументи беруться по колу з args_list"""
+    size = len(args_list)
+    counter = iter(range(number))
+
+    def step():
+        args = args_list[next(counter) % size]
+        func(*args)
+
+    return number / timeit.timeit(step, number=number)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=100_000, help="скільки повідомлень рендерити")
+    parser.add_argument("--dates", type=int, default=365, help="скільки різних дат у вибірці")
+    args = parser.parse_args()
+
+    start = date(2026, 1, 1)
+    samples = [
+        ("Олена", "+380501234567", str(start + timedelta(days=i % args.dates)), 9 + i % 10, i)
+        for i in range(args.dates * 10)
+    ]
+    for sample in samples:
+        assert messages.render_new_booking(*sample) == legacy_new_booking(*sample), sample
+
+    legacy = _rate(legacy_new_booking, samples, args.number)
+    messages.format_date_long.cache_clear()
+    cached = _rate(messages.render_new_booking, samples, args.number)
+    dates = [(sample[2],) for sample in samples]
+    dates_legacy = _rate(legacy_format_date, dates, args.number)
+    dates_cached = _rate(messages.format_date_long, dates, args.number)
+
+    print(f"{args.number} повідомлень, {args.dates} різних дат")
+    print(f"  сповіщення, старий шлях:    {legacy:>12,.0f} /с")
+    print(f"  сповіщення, app.messages:   {cached:>12,.0f} /с  (x{cached / legacy:.1f})")
+    print(f"  дата, strptime + replace:   {dates_legacy:>12,.0f} /с")
+    print(f"  дата, format_date_long:     {dates_cached:>12,.0f} /с  (x{dates_cached / dates_legacy:.1f})")
+
+
+if __name__ == "__main__":
+    main()
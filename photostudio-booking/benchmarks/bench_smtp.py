@@ -0,0 +1,104 @@
+"""
+Відправка email: з'єднання на кожен лист проти SmtpPool
+
+Піднімає локальний приймач aiosmtpd (requirements-dev.txt), відправляє
+листи спершу старим способом - нове SMTP-з'єднання на кожен лист, - потім
+через SmtpPool, і друкує листів/с, кількість з'єднань і час рендеру шаблону.
+
+    python -m benchmarks.bench_smtp [--emails 3000] [--single 200] [--pool-size 2]
+"""
+import argparse
+import asyncio
+import socket
+import time
+
+import aiosmtplib
+from aiosmtpd.controller import Controller
+
+from app import email_service
+from app.email_service import SmtpPool, build_message, render
+
+
+class Sink:
+    """Приймач, що тільки рахує листи"""
+
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _messages(count: int) -> list:
+    html = render("booking_confirmation.html", booking={"date": "17.10.2026", "time": "10:00 - 11:00"})
+    return [build_message(f"client{i}@example.com", "Підтвердження бронювання", html) for i in range(count)]
+
+
+async def send_one_per_connection(messages: list) -> float:
+    """Як до пулу: connect/send/quit на кожен лист"""
+    started = time.perf_counter()
+    for message in messages:
+        await aiosmtplib.send(
+            message, hostname=email_service.MAIL_SERVER, port=email_service.MAIL_PORT, start_tls=False
+        )
+    return time.perf_counter() - started
+
+
+async def send_pooled(pool: SmtpPool, messages: list) -> float:
+    started = time.perf_counter()
+    results = await pool.send_many(messages)
+    await pool.close()
+    elapsed = time.perf_counter() - started
+    errors = sum(result is not None for result in results)
+    if errors:
+        print(f"  помилок: {errors}")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--emails", type=int, default=3000, help="листів через SmtpPool")
+    parser.add_argument("--single", type=int, default=200, help="листів по з'єднанню на кожен")
+    parser.add_argument("--pool-size", type=int, default=email_service.MAIL_POOL_SIZE)
+    args = parser.parse_args()
+
+    sink = Sink()
+    controller = Controller(sink, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    # Налаштування SMTP модуль читає з оточення при імпорті
+    email_service.MAIL_SERVER = "127.0.0.1"
+    email_service.MAIL_PORT = controller.port
+    email_service.MAIL_STARTTLS = False
+    email_service.MAIL_SSL_TLS = False
+    email_service.MAIL_USERNAME = ""
+    try:
+        elapsed = asyncio.run(send_one_per_connection(_messages(args.single)))
+        print(f"з'єднання на лист: {args.single / elapsed:>8.0f} листів/с ({args.single} з'єднань)")
+
+        pool = SmtpPool(size=args.pool_size)
+        elapsed = asyncio.run(send_pooled(pool, _messages(args.emails)))
+        stats = pool.stats()
+        print(
+            f"SmtpPool x{args.pool_size}:     {args.emails / elapsed:>8.0f} листів/с "
+            f"({stats['connections']} з'єднань, {stats['batches']} пачок, помилок {stats['failed']})"
+        )
+        print(f"отримано приймачем: {sink.received}")
+    finally:
+        controller.stop()
+
+    number = 2000
+    started = time.perf_counter()
+    for _ in range(number):
+        render("verification.html", username="Олена", url="http://localhost:8000/verify-email?token=x")
+    print(f"рендер шаблону: {(time.perf_counter() - started) / number * 1e6:.0f} мкс")
+
+
+if __name__ == "__main__":
+    main()
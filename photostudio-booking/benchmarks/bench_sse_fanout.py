@@ -0,0 +1,85 @@
+"""
+Бенчмарк розсилки live-оновлень (app/live) у межах процесу
+
+N підписників читають потоки AvailabilityFeed.subscribe так само, як SSE-
+роут; publish() розсилає events змін слотів. Міряється загальний час, поки
+кожен підписник не отримає всі події, і час самого publish().
+
+    python -m benchmarks.bench_sse_fanout [--subscribers 1000 5000] [--events 50]
+"""
+import argparse
+import asyncio
+import time
+from datetime import date
+
+from app.live import AvailabilityFeed
+
+MONTH = (2026, 12)
+
+
+async def _consume(stream, events: int) -> int:
+    """Читати кадри, поки не прийдуть усі events подій (або resync)"""
+    received = 0
+    async for frame in stream:
+        if frame.startswith(b"event: resync"):
+            break
+        if frame.startswith(b"id: "):
+            received += 1
+            if received == events:
+                break
+    await stream.aclose()
+    return received
+
+
+async def run(subscribers: int, events: int) -> dict:
+    feed = AvailabilityFeed(heartbeat=60)
+    streams = []
+    for i in range(subscribers):
+        # Кожен десятий - адмінка, підписана на всі місяці
+        stream = feed.subscribe(None if i % 10 == 0 else MONTH)
+        await stream.__anext__()  # retry: - підписник зареєстрований
+        streams.append(stream)
+    consumers = [asyncio.create_task(_consume(stream, events)) for stream in streams]
+    await asyncio.sleep(0)
+
+    publish_seconds = 0.0
+    started = time.perf_counter()
+    for i in range(events):
+        publish_started = time.perf_counter()
+        feed.publish(date(*MONTH, 1 + i % 28), 9 + i % 10, i % 2 == 0)
+        publish_seconds += time.perf_counter() - publish_started
+        # Дати підписникам забрати подію, як між реальними бронюваннями
+        await asyncio.sleep(0)
+    received = await asyncio.gather(*consumers)
+    elapsed = time.perf_counter() - started
+
+    deliveries = sum(received)
+    return {
+        "subscribers": subscribers,
+        "deliveries": deliveries,
+        "complete": sum(count == events for count in received),
+        "dropped": feed.dropped,
+        "seconds": elapsed,
+        "per_second": deliveries / elapsed,
+        "publish_ms": publish_seconds / events * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--events", type=int, default=50)
+    args = parser.parse_args()
+
+    for subscribers in args.subscribers:
+        result = asyncio.run(run(subscribers, args.events))
+        print(
+            f"{result['subscribers']:>6} підписників: {result['deliveries']} доставок за "
+            f"{result['seconds']:.2f} с ({result['per_second']:,.0f}/с), "
+            f"publish {result['publish_ms']:.2f} мс/подію, "
+            f"отримали все {result['complete']}, відключено {result['dropped']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Навантажувальний тест авторизації користувачів проти запущеного сервера
+
+Реєструє (або перевикористовує) тестового користувача, потім паралельно
+шле login (bcrypt), refresh і /me і друкує req/s, p50/p95 і коди відповідей.
+Сервер запускається окремо, наприклад:
+
+    uvicorn app.main:app --port 8765
+    python -m benchmarks.load_auth --url http://127.0.0.1:8765 [--requests 1000] [--concurrency 50] [--logins 60]
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import Awaitable, Callable
+
+import httpx
+
+USER = {"email": "load@example.com", "username": "load", "password": "secret123"}
+
+
+async def load(name: str, make: Callable[[], Awaitable[httpx.Response]], requests: int, concurrency: int) -> None:
+    """Виконати requests запитів не більше concurrency одночасно"""
+    latencies = []
+    codes = Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await make()
+            latencies.append(time.perf_counter() - started)
+            codes[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000
+    print(f"  {name:<8} {requests / elapsed:>8.1f} req/s  p50 {p50:>6.0f} мс  p95 {p95:>6.0f} мс  {dict(codes)}")
+
+
+async def run(url: str, requests: int, concurrency: int, logins: int) -> None:
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        # 400 - користувач вже є з попереднього запуску
+        await client.post("/api/auth/register", json=USER)
+        credentials = {"email": USER["email"], "password": USER["password"]}
+        response = await client.post("/api/auth/login", json=credentials)
+        response.raise_for_status()
+        tokens = response.json()
+        bearer = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+        print(f"{url}: login {logins}, refresh і /me по {requests} запитів, паралельно {concurrency}")
+        await load("login", lambda: client.post("/api/auth/login", json=credentials), logins, concurrency)
+        await load(
+            "refresh",
+            lambda: client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}),
+            requests, concurrency
+        )
+        await load("me", lambda: client.get("/api/auth/me", headers=bearer), requests, concurrency)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=1000, help="запитів refresh і /me")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=60, help="запитів login (кожен - bcrypt)")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.requests, args.concurrency, args.logins))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,20 @@ Telegram bot with additional services system
 import os
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
-from datetime import datetime
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app.database import SessionLocal
-from app.models import Booking, Client
+from sqlalchemy import select
+from app.database import AsyncSessionLocal
+from app.models import Booking
+from app.availability import availability_cache, ACTIVE_STATUSES
+from app.telegram_sender import telegram_sender
+from app.bot_state import flow_states, FlowState, Step, PerUserUpdateProcessor
+from app.messages import (
+    format_date_short, format_slot, option_label, render_admin_card, render_animals_prompt, render_bg_prompt,
+    render_people_prompt, render_services, render_zone_prompt, telegram_contact
+)
+from app.pricing import BASE_PRICE, DEFAULT_OPTIONS, calculate_price, unit_rule, unit_surcharge
+from app.routers.telegram import webhook_enabled
 
 # Bot config
 BOT_TOKEN = os.getenv("BOT_TOKEN")
@@ -38,8 +47,14 @@ STUDIO_RULES = os.getenv("STUDIO_RULES", """
 WEBSITE_URL = os.getenv("WEBSITE_URL", "http://192.168.88.26:8000")
 INSTAGRAM_URL = os.getenv("INSTAGRAM_URL", "https://instagram.com/clique_studio")
 
+# Скільки апдейтів обробляти одночасно (апдейти одного користувача - по черзі)
+BOT_CONCURRENT_UPDATES = int(os.getenv("BOT_CONCURRENT_UPDATES", "32"))
+
+# Тільки типи апдейтів, які ми обробляємо (повідомлення і кнопки)
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
+
 def get_db():
-    return SessionLocal()
+    return AsyncSessionLocal()
 
 def get_main_keyboard():
     """Постійна клавіатура з сайтом та Instagram (завжди)"""
@@ -61,32 +76,8 @@ def remove_keyboard():
     return ReplyKeyboardRemove()
 
 async def notify_admins(context, message):
-    for admin_id in ADMIN_IDS:
-        try:
-            await context.bot.send_message(chat_id=admin_id, text=message, parse_mode='HTML')
-        except: pass
-
-def calculate_price(people, zone, animals, bg):
-    price = 1000
-    if people > 4: price += (people - 4) * 100
-    if zone == 'both': price += 500
-    if animals > 1: price += (animals - 1) * 100
-    if bg != 'none': price += 100
-    return price
-
-def format_services(people, zone, animals, bg, price):
-    zones = {'light': 'Світла', 'dark': 'Темна', 'both': 'Обидві (+500₴)'}
-    bgs = {'none': 'Без фону', 'white': 'Білий (+100₴)', 'black': 'Чорний (+100₴)', 'red': 'Червоний (+100₴)'}
-    p_txt = f"До 4 осіб" if people <= 4 else f"{people} осіб (+{(people-4)*100}₴)"
-    a_txt = "Немає" if animals == 0 else (f"1 тварина" if animals == 1 else f"{animals} (+{(animals-1)*100}₴)")
-    return f"""📋 <b>Обрані послуги:</b>
-
-👥 Людей: {p_txt}
-📸 Зона: {zones.get(zone, zone)}
-🐾 Тварини: {a_txt}
-🎨 Фон: {bgs.get(bg, bg)}
-
-💰 <b>Сума: {price} грн</b>"""
+    """Розіслати повідомлення всім адмінам паралельно (помилки логуються в sender)"""
+    return await telegram_sender.broadcast(context.bot, ADMIN_IDS, message, parse_mode='HTML')
 
 async def start(update, context):
     user_id = update.effective_user.id
@@ -104,26 +95,25 @@ async def start(update, context):
 
 async def handle_booking(update, context, booking_id):
     user_id = update.effective_user.id
-    username = update.effective_user.username or "без username"
     db = get_db()
     try:
-        booking = db.query(Booking).filter(Booking.id == int(booking_id)).first()
+        booking = await db.get(Booking, int(booking_id))
         if not booking:
             await update.message.reply_text("❌ Бронювання не знайдено")
             return
-        client = db.query(Client).filter(Client.id == booking.client_id).first()
+        client = booking.client
         if booking.status in ['confirmed', 'paid']:
-            await update.message.reply_text(f"✅ Вже підтверджено!\n📅 {booking.booking_date.strftime('%d.%m.%Y')} {booking.booking_hour}:00")
+            await update.message.reply_text(f"✅ Вже підтверджено!\n📅 {format_slot(booking.booking_date, booking.booking_hour)}")
             return
         booking.telegram_user_id = user_id
-        db.commit()
+        await db.commit()
         
         text = f"""{STUDIO_RULES}
 
 ━━━━━━━━━━━━━━━━
 
 📅 <b>Бронювання:</b>
-Дата: {booking.booking_date.strftime('%d.%m.%Y')}
+Дата: {format_date_short(booking.booking_date)}
 Час: {booking.booking_hour}:00
 Ім'я: {client.name}
 Телефон: {client.phone}
@@ -156,12 +146,14 @@ async def handle_booking(update, context, booking_id):
         )
         
         booking.confirmation_message_id = sent.message_id
-        db.commit()
+        await db.commit()
         
-        tg_info = f"@{username}" if username != "без username" else f"ID: {user_id}"
-        await notify_admins(context, f"📬 <b>Нове бронювання</b>\n\nID: #{booking_id}\n👤 {client.name}\n📞 {client.phone}\n💬 {tg_info}\n📅 {booking.booking_date.strftime('%d.%m.%Y')} {booking.booking_hour}:00")
+        await notify_admins(context, render_admin_card(
+            "📬 <b>Нове бронювання</b>", booking_id, client.name, client.phone,
+            telegram_contact(user_id, update.effective_user.username), booking.booking_date, booking.booking_hour
+        ))
     finally:
-        db.close()
+        await db.close()
 
 async def button_callback(update: Update, context):
     query = update.callback_query
@@ -189,38 +181,39 @@ async def button_callback(update: Update, context):
         if len(parts) >= 5:
             date_str = parts[3]  # YYYYMMDD
             hour = parts[4]
-            # Форматуємо дату
-            from datetime import datetime
-            date_obj = datetime.strptime(date_str, '%Y%m%d')
-            formatted_date = date_obj.strftime('%d.%m.%Y')
-            purpose = f"Бронювання {formatted_date} {hour}:00"
+            purpose = f"Бронювання {format_slot(date_str, int(hour))}"
             await query.answer(f"📝 Призначення: {purpose}", show_alert=True)
 
 
 async def start_services(query, context, booking_id):
-    context.user_data['booking_id'] = booking_id
-    context.user_data['people'] = 4
-    context.user_data['zone'] = None
-    context.user_data['animals'] = 0
-    context.user_data['bg'] = None
+    flow_states.save(query.from_user.id, FlowState(booking_id=int(booking_id)))
     
     try:
         await query.edit_message_reply_markup(reply_markup=None)
         await query.edit_message_text(query.message.text + "\n\n✅ <b>ПІДТВЕРДЖЕНО</b>", parse_mode='HTML')
     except: pass
     
-    keyboard = [[InlineKeyboardButton("👥 До 4", callback_data="people_up4")],
+    included = unit_rule("people").included
+    keyboard = [[InlineKeyboardButton(f"👥 До {included}", callback_data="people_up4")],
                 [InlineKeyboardButton("👥 Більше", callback_data="people_more")]]
-    await context.bot.send_message(query.message.chat_id, "<b>1/4: Кількість людей</b>\n\nДо 4 - без доплат\nБільше - 100₴/особа", reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    await context.bot.send_message(query.message.chat_id, render_people_prompt(), reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
 
 async def handle_people(query, context):
+    state = await flow_states.get(query.from_user.id)
+    if not state:
+        await query.answer("❌ Спочатку підтвердіть бронювання")
+        return
+    included = unit_rule("people").included
     if query.data == "people_up4":
-        context.user_data['people'] = 4
-        await query.answer("✅ До 4 осіб")
+        state.people = included
+        state.step = Step.ZONE
+        flow_states.save(query.from_user.id, state)
+        await query.answer(f"✅ До {included} осіб")
         await ask_zone(query, context)
     else:
-        await query.edit_message_text("👥 Введіть кількість (5-20):", parse_mode='HTML')
-        context.user_data['waiting'] = 'people'
+        await query.edit_message_text(f"👥 Введіть кількість ({included + 1}-20):", parse_mode='HTML')
+        state.step = Step.PEOPLE_INPUT
+        flow_states.save(query.from_user.id, state)
 
 async def handle_text(update, context):
     text = update.message.text.strip()
@@ -252,27 +245,32 @@ async def handle_text(update, context):
         )
         return
     
-    if 'waiting' not in context.user_data: return
-    waiting = context.user_data['waiting']
+    user_id = update.effective_user.id
+    state = await flow_states.get(user_id)
+    if not state or state.step not in Step.TEXT_INPUT: return
     try:
         num = int(text)
-        if waiting == 'people':
-            if num < 5 or num > 20:
-                await update.message.reply_text("❌ Від 5 до 20")
+        if state.step == Step.PEOPLE_INPUT:
+            rule = unit_rule("people")
+            if num <= rule.included or num > 20:
+                await update.message.reply_text(f"❌ Від {rule.included + 1} до 20")
                 return
-            context.user_data['people'] = num
-            await update.message.reply_text(f"✅ {num} осіб (+{(num-4)*100}₴)")
-            del context.user_data['waiting']
+            state.people = num
+            state.step = Step.ZONE
+            flow_states.save(user_id, state)
+            await update.message.reply_text(f"✅ {num} осіб (+{unit_surcharge(rule, num)}₴)")
             class FQ: 
                 def __init__(self, m): self.message = m
             await ask_zone(FQ(update.message), context)
-        elif waiting == 'animals':
-            if num < 2 or num > 10:
-                await update.message.reply_text("❌ Від 2 до 10")
+        else:
+            rule = unit_rule("animals")
+            if num <= rule.included or num > 10:
+                await update.message.reply_text(f"❌ Від {rule.included + 1} до 10")
                 return
-            context.user_data['animals'] = num
-            await update.message.reply_text(f"✅ {num} тварини (+{(num-1)*100}₴)")
-            del context.user_data['waiting']
+            state.animals = num
+            state.step = Step.BG
+            flow_states.save(user_id, state)
+            await update.message.reply_text(f"✅ {num} тварини (+{unit_surcharge(rule, num)}₴)")
             class FQ:
                 def __init__(self, m): self.message = m
             await ask_bg(FQ(update.message), context)
@@ -280,14 +278,20 @@ async def handle_text(update, context):
         await update.message.reply_text("❌ Введіть число")
 
 async def ask_zone(query, context):
-    keyboard = [[InlineKeyboardButton("☀️ Світла", callback_data="zone_light")],
-                [InlineKeyboardButton("🌙 Темна", callback_data="zone_dark")],
-                [InlineKeyboardButton("✨ Обидві (+500₴)", callback_data="zone_both")]]
-    await context.bot.send_message(query.message.chat_id, "<b>2/4: Фотозона</b>\n\nОбидві - доплата 500₴", reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    keyboard = [[InlineKeyboardButton(f"☀️ {option_label('zone', 'light')}", callback_data="zone_light")],
+                [InlineKeyboardButton(f"🌙 {option_label('zone', 'dark')}", callback_data="zone_dark")],
+                [InlineKeyboardButton(f"✨ {option_label('zone', 'both')}", callback_data="zone_both")]]
+    await context.bot.send_message(query.message.chat_id, render_zone_prompt(), reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
 
 async def handle_zone(query, context):
     choice = query.data.replace("zone_", "")
-    context.user_data['zone'] = choice
+    state = await flow_states.get(query.from_user.id)
+    if not state:
+        await query.answer("❌ Спочатку підтвердіть бронювання")
+        return
+    state.zone = choice
+    state.step = Step.ANIMALS
+    flow_states.save(query.from_user.id, state)
     names = {'light': 'Світла', 'dark': 'Темна', 'both': 'Обидві'}
     await query.answer(f"✅ {names[choice]}")
     await ask_animals(query, context)
@@ -296,58 +300,72 @@ async def ask_animals(query, context):
     keyboard = [[InlineKeyboardButton("🚫 Немає", callback_data="animals_none")],
                 [InlineKeyboardButton("🐾 1 тварина", callback_data="animals_one")],
                 [InlineKeyboardButton("🐾🐾 Більше", callback_data="animals_more")]]
-    await context.bot.send_message(query.message.chat_id, "<b>3/4: Тварини</b>\n\n1 - безкоштовно\nБільше - 100₴/тварина", reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    await context.bot.send_message(query.message.chat_id, render_animals_prompt(), reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
 
 async def handle_animals(query, context):
+    state = await flow_states.get(query.from_user.id)
+    if not state:
+        await query.answer("❌ Спочатку підтвердіть бронювання")
+        return
     if query.data == "animals_none":
-        context.user_data['animals'] = 0
+        state.animals = 0
+        state.step = Step.BG
+        flow_states.save(query.from_user.id, state)
         await query.answer("✅ Без тварин")
         await ask_bg(query, context)
     elif query.data == "animals_one":
-        context.user_data['animals'] = 1
+        state.animals = 1
+        state.step = Step.BG
+        flow_states.save(query.from_user.id, state)
         await query.answer("✅ 1 тварина")
         await ask_bg(query, context)
     else:
-        await query.edit_message_text("🐾 Введіть кількість (2-10):", parse_mode='HTML')
-        context.user_data['waiting'] = 'animals'
+        await query.edit_message_text(f"🐾 Введіть кількість ({unit_rule('animals').included + 1}-10):", parse_mode='HTML')
+        state.step = Step.ANIMALS_INPUT
+        flow_states.save(query.from_user.id, state)
 
 async def ask_bg(query, context):
-    keyboard = [[InlineKeyboardButton("🚫 Без фону", callback_data="bg_none")],
-                [InlineKeyboardButton("⚪ Білий (+100₴)", callback_data="bg_white")],
-                [InlineKeyboardButton("⚫ Чорний (+100₴)", callback_data="bg_black")],
-                [InlineKeyboardButton("🔴 Червоний (+100₴)", callback_data="bg_red")]]
-    await context.bot.send_message(query.message.chat_id, "<b>4/4: Фон</b>\n\nБудь-який - 100₴", reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    keyboard = [[InlineKeyboardButton(f"🚫 {option_label('bg', 'none')}", callback_data="bg_none")],
+                [InlineKeyboardButton(f"⚪ {option_label('bg', 'white')}", callback_data="bg_white")],
+                [InlineKeyboardButton(f"⚫ {option_label('bg', 'black')}", callback_data="bg_black")],
+                [InlineKeyboardButton(f"🔴 {option_label('bg', 'red')}", callback_data="bg_red")]]
+    await context.bot.send_message(query.message.chat_id, render_bg_prompt(), reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
 
 async def handle_bg(query, context):
     choice = query.data.replace("bg_", "")
-    context.user_data['bg'] = choice
-    await finalize(query, context)
-
-async def finalize(query, context):
-    bid = context.user_data.get('booking_id')
-    people = context.user_data.get('people', 4)
-    zone = context.user_data.get('zone', 'light')
-    animals = context.user_data.get('animals', 0)
-    bg = context.user_data.get('bg', 'none')
+    state = await flow_states.get(query.from_user.id)
+    if not state:
+        await query.answer("❌ Спочатку підтвердіть бронювання")
+        return
+    state.bg = choice
+    await finalize(query, context, state)
+
+async def finalize(query, context, state):
+    bid = state.booking_id
+    people = state.people
+    zone = state.zone or 'light'
+    animals = state.animals
+    bg = state.bg or 'none'
     price = calculate_price(people, zone, animals, bg)
     
     db = get_db()
     try:
-        booking = db.query(Booking).filter(Booking.id == int(bid)).first()
-        client = db.query(Client).filter(Client.id == booking.client_id).first()
+        booking = await db.get(Booking, int(bid))
+        client = booking.client
         booking.status = "confirmed"
         booking.people_count = people
         booking.zone_choice = zone
         booking.animals_count = animals
         booking.background_choice = bg
         booking.total_price = price
-        db.commit()
+        await db.commit()
+        flow_states.clear(query.from_user.id)
         
-        summary = format_services(people, zone, animals, bg, price)
+        summary = render_services(people, zone, animals, bg, price)
         
         card_number = "UA833052990000026002000123966"  # Без пробілів для копіювання
         card_display = "UA833052990000026002000123966"  # З пробілами для читабельності
-        purpose = f"Бронювання {booking.booking_date.strftime('%d.%m.%Y')} {booking.booking_hour}:00"
+        purpose = f"Бронювання {format_slot(booking.booking_date, booking.booking_hour)}"
         
         payment = f"""✅ <b>Підтверджено!</b>
 
@@ -386,11 +404,13 @@ async def finalize(query, context):
             "• 🌐 Сайт • 📸 Instagram"
         )
         
-        username = query.from_user.username
-        tg = f"@{username}" if username else f"ID: {query.from_user.id}"
-        await notify_admins(context, f"✅ <b>Підтверджено</b>\n\nID: #{bid}\n👤 {client.name}\n📞 {client.phone}\n💬 {tg}\n📅 {booking.booking_date.strftime('%d.%m.%Y')} {booking.booking_hour}:00\n\n{summary}\n\n⏳ Чекаємо оплату...")
+        tg = telegram_contact(query.from_user.id, query.from_user.username)
+        await notify_admins(context, render_admin_card(
+            "✅ <b>Підтверджено</b>", bid, client.name, client.phone, tg,
+            booking.booking_date, booking.booking_hour, f"\n\n{summary}\n\n⏳ Чекаємо оплату..."
+        ))
     finally:
-        db.close()
+        await db.close()
 
 async def handle_cancel_button(update, context):
     """Handle cancel button from persistent keyboard"""
@@ -399,10 +419,10 @@ async def handle_cancel_button(update, context):
     
     try:
         # Знайти активне бронювання користувача
-        booking = db.query(Booking).filter(
+        booking = await db.scalar(select(Booking).where(
             Booking.telegram_user_id == user_id,
             Booking.status.in_(['pending', 'confirmed'])
-        ).first()
+        ).limit(1))
         
         if not booking:
             await update.message.reply_text(
@@ -412,7 +432,7 @@ async def handle_cancel_button(update, context):
             return
         
         # Отримати інфо про клієнта
-        client = db.query(Client).filter(Client.id == booking.client_id).first()
+        client = booking.client
         
         # Зберегти інфо
         booking_id = booking.id
@@ -422,50 +442,47 @@ async def handle_cancel_button(update, context):
         booking_hour = booking.booking_hour
         
         # Видалити з БД
-        db.delete(booking)
-        db.commit()
+        await db.delete(booking)
+        await db.commit()
+        availability_cache.remove_booking(booking_date, booking_hour)
         
         # Повернути основні кнопки (без скасування)
         await update.message.reply_text(
             "❌ <b>Бронювання скасовано!</b>\n\n"
-            f"📅 {booking_date.strftime('%d.%m.%Y')} о {booking_hour}:00\n\n"
+            f"📅 {format_date_short(booking_date)} о {booking_hour}:00\n\n"
             "Якщо передумаєте - створіть нове бронювання на сайті.",
             reply_markup=get_main_keyboard(),
             parse_mode='HTML'
         )
         
-        # Очистити user_data
-        context.user_data.clear()
+        # Завершити діалог вибору послуг
+        flow_states.clear(user_id)
         
         # Сповістити адмінів
-        username = update.effective_user.username
-        tg = f"@{username}" if username else f"ID: {user_id}"
-        await notify_admins(
-            context,
-            f"❌ <b>Бронювання скасовано клієнтом</b>\n\n"
-            f"ID: #{booking_id}\n"
-            f"👤 {client_name}\n"
-            f"📞 {client_phone}\n"
-            f"💬 {tg}\n"
-            f"📅 {booking_date.strftime('%d.%m.%Y')} {booking_hour}:00\n\n"
-            f"⚠️ Скасовано через постійну кнопку"
-        )
+        tg = telegram_contact(user_id, update.effective_user.username)
+        await notify_admins(context, render_admin_card(
+            "❌ <b>Бронювання скасовано клієнтом</b>", booking_id, client_name, client_phone, tg,
+            booking_date, booking_hour, "\n\n⚠️ Скасовано через постійну кнопку"
+        ))
     
     finally:
-        db.close()
+        await db.close()
 
 async def cancel_booking(query, context, bid):
     db = get_db()
     try:
-        booking = db.query(Booking).filter(Booking.id == int(bid)).first()
+        booking = await db.get(Booking, int(bid))
         if not booking:
             await query.answer("❌ Не знайдено")
             return
-        client = db.query(Client).filter(Client.id == booking.client_id).first()
+        client = booking.client
         name, phone = client.name, client.phone
         date, hour = booking.booking_date, booking.booking_hour
-        db.delete(booking)
-        db.commit()
+        frees_slot = booking.status in ACTIVE_STATUSES
+        await db.delete(booking)
+        await db.commit()
+        if frees_slot:
+            availability_cache.remove_booking(date, hour)
         try:
             await query.edit_message_reply_markup(reply_markup=None)
             await query.edit_message_text(query.message.text + "\n\n❌ <b>СКАСОВАНО</b>", parse_mode='HTML')
@@ -477,24 +494,23 @@ async def cancel_booking(query, context, bid):
             reply_markup=get_main_keyboard()
         )
         
-        # Очистити user_data
-        context.user_data.clear()
+        # Завершити діалог вибору послуг
+        flow_states.clear(query.from_user.id)
         
-        username = query.from_user.username
-        tg = f"@{username}" if username else f"ID: {query.from_user.id}"
-        await notify_admins(context, f"❌ <b>Скасовано</b>\n\nID: #{bid}\n👤 {name}\n📞 {phone}\n💬 {tg}\n📅 {date.strftime('%d.%m.%Y')} {hour}:00")
+        tg = telegram_contact(query.from_user.id, query.from_user.username)
+        await notify_admins(context, render_admin_card("❌ <b>Скасовано</b>", bid, name, phone, tg, date, hour))
     finally:
-        db.close()
+        await db.close()
 
 async def handle_photo(update, context):
     user_id = update.effective_user.id
     db = get_db()
     try:
-        booking = db.query(Booking).filter(Booking.telegram_user_id == user_id, Booking.status == 'confirmed').first()
+        booking = await db.scalar(select(Booking).where(Booking.telegram_user_id == user_id, Booking.status == 'confirmed').limit(1))
         if booking:
-            client = db.query(Client).filter(Client.id == booking.client_id).first()
+            client = booking.client
             booking.status = "paid"
-            db.commit()
+            await db.commit()
             
             # Повернути основні кнопки після оплати
             await update.message.reply_text(
@@ -503,27 +519,42 @@ async def handle_photo(update, context):
                 reply_markup=get_main_keyboard()
             )
             
-            # Очистити user_data
-            context.user_data.clear()
+            # Завершити діалог вибору послуг
+            flow_states.clear(user_id)
             
             services = ""
-            if booking.total_price and booking.total_price > 1000:
-                services = f"\n\n{format_services(booking.people_count or 4, booking.zone_choice or 'light', booking.animals_count or 0, booking.background_choice or 'none', booking.total_price)}"
+            if booking.total_price and booking.total_price > BASE_PRICE:
+                services = "\n\n" + render_services(
+                    booking.people_count or DEFAULT_OPTIONS["people"],
+                    booking.zone_choice or DEFAULT_OPTIONS["zone"],
+                    booking.animals_count or DEFAULT_OPTIONS["animals"],
+                    booking.background_choice or DEFAULT_OPTIONS["bg"],
+                    booking.total_price
+                )
             
-            username = update.effective_user.username
-            tg = f"@{username}" if username else f"ID: {user_id}"
-            for admin_id in ADMIN_IDS:
-                try:
-                    await context.bot.forward_message(admin_id, update.message.chat_id, update.message.message_id)
-                    await context.bot.send_message(admin_id, f"💰 <b>Квитанція</b>\n\nID: #{booking.id}\n👤 {client.name}\n📞 {client.phone}\n💬 {tg}\n📅 {booking.booking_date.strftime('%d.%m.%Y')} {booking.booking_hour}:00{services}\n\n❗️ Перевірте!", parse_mode='HTML')
-                except: pass
+            tg = telegram_contact(user_id, update.effective_user.username)
+            receipt = render_admin_card(
+                "💰 <b>Квитанція</b>", booking.id, client.name, client.phone, tg,
+                booking.booking_date, booking.booking_hour, f"{services}\n\n❗️ Перевірте!"
+            )
+            
+            # Фото, потім картка: кожен виклик окремо бере ліміт і окремо
+            # повторюється після RetryAfter (фото не пересилається двічі)
+            await telegram_sender.fan_out(
+                ADMIN_IDS,
+                lambda admin_id: context.bot.forward_message(admin_id, update.message.chat_id, update.message.message_id)
+            )
+            await telegram_sender.fan_out(
+                ADMIN_IDS,
+                lambda admin_id: context.bot.send_message(admin_id, receipt, parse_mode='HTML')
+            )
         else:
             await update.message.reply_text(
                 "ℹ️ Спочатку створіть бронювання на сайті",
                 reply_markup=get_main_keyboard()
             )
     finally:
-        db.close()
+        await db.close()
 
 async def help_cmd(update, context):
     await update.message.reply_text(
@@ -532,15 +563,31 @@ async def help_cmd(update, context):
         reply_markup=get_main_keyboard()
     )
 
-def main():
-    app = Application.builder().token(BOT_TOKEN).build()
+def build_application(webhook: bool = False):
+    """Application з усіма хендлерами (polling або webhook через FastAPI)"""
+    builder = Application.builder().token(BOT_TOKEN).concurrent_updates(PerUserUpdateProcessor(BOT_CONCURRENT_UPDATES))
+    if webhook:
+        # Апдейти кладе в update_queue FastAPI-роут, Updater не потрібен
+        builder = builder.updater(None)
+    else:
+        # Дописати стан діалогів перед зупинкою polling
+        builder = builder.post_shutdown(lambda app: flow_states.close())
+    app = builder.build()
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("help", help_cmd))
     app.add_handler(CallbackQueryHandler(button_callback))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text))
     app.add_handler(MessageHandler(filters.PHOTO, handle_photo))
+    return app
+
+def main():
+    # Без коректного WEBHOOK_BASE_URL веб-сервіс webhook не вмикає - тоді polling тут
+    if webhook_enabled():
+        print("🤖 BOT_MODE=webhook: апдейти обробляє веб-сервіс, polling не запускається")
+        return
+    app = build_application()
     print(f"🤖 Bot started! Admins: {ADMIN_IDS}")
-    app.run_polling(allowed_updates=Update.ALL_TYPES)
+    app.run_polling(allowed_updates=ALLOWED_UPDATES)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,16 @@
+-- Migration: Partial unique index for active booking slots
+-- Date: 2026-10-17
+-- Description: Only active bookings (pending, confirmed, paid) occupy a slot.
+-- Replaces unique_booking_slot so cancelled rows no longer block the hour,
+-- and gives calendar/day lookups an index search on (booking_date, booking_hour).
+
+-- Build the new index first so the slot stays protected during the migration
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_bookings_active_slot
+ON bookings (booking_date, booking_hour)
+WHERE status IN ('pending', 'confirmed', 'paid');
+
+-- Old constraint covered cancelled rows too
+ALTER TABLE bookings DROP CONSTRAINT IF EXISTS unique_booking_slot;
+
+-- Refresh planner statistics
+ANALYZE bookings;
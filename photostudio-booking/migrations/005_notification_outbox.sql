@@ -0,0 +1,22 @@
+-- Migration: Durable outbox for Telegram notifications
+-- Date: 2026-10-17
+-- Description: Notifications are written in the same transaction as the booking
+-- change and delivered by a worker in the web process (retries with backoff).
+
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id SERIAL PRIMARY KEY,
+    kind VARCHAR(30) NOT NULL,
+    booking_id INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT now(),
+    sent_at TIMESTAMP,
+    -- One notification of each kind per booking
+    CONSTRAINT uq_outbox_kind_booking UNIQUE (kind, booking_id)
+);
+
+-- Worker picks due rows by (status, next_attempt_at)
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON notification_outbox (status, next_attempt_at);
@@ -0,0 +1,15 @@
+-- Migration: Persistent bot dialog state
+-- Date: 2026-10-17
+-- Description: The bot keeps the service-selection step per user in a compact
+-- row instead of in-process user_data, so a restart does not lose the dialog.
+
+CREATE TABLE IF NOT EXISTS bot_flow_states (
+    user_id BIGINT PRIMARY KEY,
+    booking_id INTEGER NOT NULL,
+    step SMALLINT NOT NULL,
+    people SMALLINT NOT NULL DEFAULT 4,
+    zone VARCHAR(10),
+    animals SMALLINT NOT NULL DEFAULT 0,
+    bg VARCHAR(10),
+    updated_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+);
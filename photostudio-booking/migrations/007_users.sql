@@ -0,0 +1,24 @@
+-- Migration: User accounts
+-- Date: 2026-10-17
+-- Description: Accounts for the /api/auth router. Email and username are
+-- unique; the unique indexes also serve login/refresh lookups by email.
+
+DO $$ BEGIN
+    CREATE TYPE user_role AS ENUM ('client', 'admin');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END $$;
+
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    email VARCHAR(255) NOT NULL,
+    username VARCHAR(50) NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    role user_role NOT NULL DEFAULT 'client',
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    is_verified BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT now()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_users_username ON users (username);
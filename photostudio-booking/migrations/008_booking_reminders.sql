@@ -0,0 +1,6 @@
+-- Migration: Booking reminders
+-- Date: 2026-10-17
+-- Description: The reminder scheduler marks each booking once its reminder
+-- is claimed for sending, so restarts and parallel workers never send it twice.
+
+ALTER TABLE bookings ADD COLUMN IF NOT EXISTS reminded_at TIMESTAMP;
@@ -0,0 +1,109 @@
+"""
+Спільні фікстури: застосунок на тимчасовій SQLite, без Telegram і SMTP
+"""
+import os
+import tempfile
+
+# До імпорту app: engine створюється з DATABASE_URL при імпорті, а static/
+# шукається відносно робочої директорії
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ.pop("BOT_TOKEN", None)
+os.environ.pop("TELEGRAM_ADMIN_CHAT_IDS", None)
+
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import models
+from app.availability import availability_cache
+from app.database import engine, AsyncSessionLocal
+from app.main import app
+from app.token_cache import token_cache
+
+
+async def _reset_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+
+
+@pytest.fixture
+def client():
+    """TestClient на чистій БД і порожніх кешах"""
+    with TestClient(app) as c:
+        c.portal.call(_reset_db)
+        availability_cache.clear()
+        token_cache.clear()
+        yield c
+        # З'єднання aiosqlite прив'язані до event loop цього TestClient
+        c.portal.call(engine.dispose)
+
+
+@pytest.fixture
+def admin_headers(client):
+    token = client.post("/api/admin/login", json={"password": os.getenv("ADMIN_PASSWORD", "admin123")}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def run(client):
+    """Виконати корутину в event loop застосунку"""
+    def run(func, *args):
+        return client.portal.call(func, *args)
+    return run
+
+
+def slots(count: int, start: date = None, hours=range(9, 19)):
+    """count слотів (дата, година) поспіль, починаючи з завтра"""
+    start = start or date.today() + timedelta(days=1)
+    hours = list(hours)
+    return [(start + timedelta(days=i // len(hours)), hours[i % len(hours)]) for i in range(count)]
+
+
+async def seed_bookings(slot_list, status: str = "pending") -> list:
+    """По окремому клієнту на кожне бронювання (найгірший випадок для N+1)"""
+    async with AsyncSessionLocal() as db:
+        bookings = []
+        for i, (booking_date, booking_hour) in enumerate(slot_list):
+            client = models.Client(name=f"Client {i}", phone=f"050{i:07d}")
+            booking = models.Booking(client=client, booking_date=booking_date, booking_hour=booking_hour, status=status)
+            db.add(booking)
+            bookings.append(booking)
+        await db.commit()
+        return [booking.id for booking in bookings]
+
+
+class QueryCounter:
+    """Лічильник SQL-запитів через before_cursor_execute (з параметрами - для EXPLAIN)"""
+
+    def __init__(self):
+        self.statements = []
+        self.parameters = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        self.parameters.append(parameters)
+
+    def __enter__(self):
+        self.statements = []
+        self.parameters = []
+        event.listen(engine.sync_engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine.sync_engine, "before_cursor_execute", self._record)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def selects(self, table: str) -> list:
+        """(SQL, параметри) SELECT-запитів до table"""
+        return [
+            (statement, parameters)
+            for statement, parameters in zip(self.statements, self.parameters)
+            if statement.lstrip().upper().startswith("SELECT") and f"FROM {table}" in statement
+        ]
@@ -0,0 +1,86 @@
+"""
+Запити зайнятості шукають по частковому індексу uq_bookings_active_slot, а
+скасоване бронювання не блокує слот
+
+Індекс не покриває запит: status у ключ не входить (інакше зламалась би
+унікальність слота), тому SQLite дочитує рядки таблиці за знайденими
+записами - SEARCH ... USING INDEX, а не COVERING INDEX.
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import update
+
+from app import models
+from app.availability import availability_cache
+from app.database import AsyncSessionLocal, engine
+
+from .conftest import QueryCounter, seed_bookings, slots
+
+INDEX_SEARCH = "SEARCH bookings USING INDEX uq_bookings_active_slot"
+
+
+async def _query_plan(statement: str, parameters) -> str:
+    async with engine.connect() as conn:
+        rows = (await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def _booking_selects(queries: QueryCounter) -> list:
+    selects = queries.selects("bookings")
+    assert selects, queries.statements
+    return selects
+
+
+def _booking(name="Test Client", phone="0501234567", **fields) -> dict:
+    return {"name": name, "phone": phone, **fields}
+
+
+def test_month_and_day_queries_use_active_slot_index(client, run):
+    first = date.today() + timedelta(days=40)
+    run(seed_bookings, slots(30, start=first))
+
+    with QueryCounter() as month_queries:
+        assert client.get(f"/api/calendar/{first.year}/{first.month}").status_code == 200
+    availability_cache.clear()
+    with QueryCounter() as day_queries:
+        assert client.get(f"/api/day/{first}").status_code == 200
+
+    for statement, parameters in _booking_selects(month_queries) + _booking_selects(day_queries):
+        assert INDEX_SEARCH in run(_query_plan, statement, parameters)
+
+
+def test_duplicate_slot_query_uses_active_slot_index(client, run):
+    booking_date, booking_hour = slots(1)[0]
+    run(seed_bookings, [(booking_date, booking_hour)])
+
+    with QueryCounter() as queries:
+        response = client.post("/api/bookings/bulk", json=_booking(
+            slots=[{"booking_date": str(booking_date), "hours": [booking_hour, booking_hour + 1]}]
+        ))
+    assert response.status_code == 400
+
+    for statement, parameters in _booking_selects(queries):
+        assert INDEX_SEARCH in run(_query_plan, statement, parameters)
+
+
+async def _cancel(booking_id: int) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(models.Booking).where(models.Booking.id == booking_id).values(status="cancelled")
+        )
+        await db.commit()
+
+
+def test_cancelled_slot_can_be_booked_again(client, run):
+    booking_date, booking_hour = slots(1)[0]
+    slot = {"booking_date": str(booking_date), "booking_hour": booking_hour}
+
+    first = client.post("/api/bookings/", json=_booking(**slot))
+    assert first.status_code == 201
+    # Поки бронювання активне, слот зайнятий
+    assert client.post("/api/bookings/", json=_booking(phone="0507654321", **slot)).status_code == 400
+
+    run(_cancel, first.json()["id"])
+    again = client.post("/api/bookings/", json=_booking(phone="0507654321", **slot))
+    assert again.status_code == 201
+    assert again.json()["id"] != first.json()["id"]
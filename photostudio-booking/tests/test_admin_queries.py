@@ -0,0 +1,39 @@
+"""
+Кількість SQL-запитів адмінських списків не залежить від кількості бронювань
+(клієнт завантажується JOIN'ом, без N+1)
+"""
+import pytest
+
+from .conftest import QueryCounter, seed_bookings, slots
+
+
+def _query_counts(client, run, headers, count):
+    booking_slots = slots(count)
+    run(seed_bookings, booking_slots)
+    first, last = booking_slots[0][0], booking_slots[-1][0]
+    range_params = {"start_date": str(first), "end_date": str(last)}
+
+    counts = {}
+    with QueryCounter() as queries:
+        response = client.get("/api/admin/bookings/", params=range_params, headers=headers)
+    assert response.status_code == 200 and len(response.json()) == count
+    counts["admin_bookings"] = queries.count
+
+    with QueryCounter() as queries:
+        response = client.get("/api/bookings/", params=range_params)
+    assert response.status_code == 200 and len(response.json()) == count
+    counts["bookings"] = queries.count
+
+    with QueryCounter() as queries:
+        response = client.get(f"/api/admin/day/{first}", headers=headers)
+    assert response.status_code == 200
+    assert all(slot["client_name"] for slot in response.json()["bookings"] if slot["is_booked"])
+    counts["admin_day"] = queries.count
+    return counts
+
+
+@pytest.mark.parametrize("count", [5, 500])
+def test_query_count_is_constant(client, run, admin_headers, count):
+    counts = _query_counts(client, run, admin_headers, count)
+    # Один SELECT з JOIN clients на ендпоінт, скільки б не було бронювань
+    assert counts == {"admin_bookings": 1, "bookings": 1, "admin_day": 1}
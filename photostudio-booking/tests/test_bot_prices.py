@@ -0,0 +1,29 @@
+"""
+Ціни в кроках бота беруться з правил app.pricing, а не з літералів
+"""
+from app import messages, pricing
+from app.pricing import OptionRule, UnitRule
+
+
+def test_prompts_follow_pricing_rules(monkeypatch):
+    monkeypatch.setattr(pricing, "UNIT_RULES", (
+        UnitRule("people", included=6, unit_price=150),
+        UnitRule("animals", included=2, unit_price=50),
+    ))
+    monkeypatch.setattr(pricing, "OPTION_RULES", (
+        OptionRule("zone", {"both": 700}),
+        OptionRule("bg", {"white": 100, "red": 200}),
+    ))
+
+    assert "До 6 - без доплат\nБільше - 150₴/особа" in messages.render_people_prompt()
+    assert "Обидві - доплата 700₴" in messages.render_zone_prompt()
+    assert "2 - безкоштовно\nБільше - 50₴/тварина" in messages.render_animals_prompt()
+    assert "Білий - 100₴\nЧервоний - 200₴" in messages.render_bg_prompt()
+    assert messages.option_label("zone", "both") == "Обидві (+700₴)"
+    assert messages.option_label("bg", "black") == "Чорний"
+    assert "8 осіб (+300₴)" in messages.render_services(8, "light", 0, "none", 1300)
+
+
+def test_default_prompts_match_current_prices():
+    assert messages.render_bg_prompt().endswith("Будь-який - 100₴")
+    assert messages.option_label("bg", "white") == "Білий (+100₴)"
@@ -0,0 +1,98 @@
+"""
+SmtpPool проти локального SMTP-приймача aiosmtpd: усі листи доходять,
+з'єднання перевикористовуються, шаблони екрануються
+"""
+import asyncio
+import socket
+from email import message_from_bytes
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app import email_service
+from app.email_service import SmtpPool, build_message
+
+
+class Sink:
+    """Приймач, що запам'ятовує листи"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(message_from_bytes(envelope.content))
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    handler = Sink()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    # Налаштування SMTP читаються при імпорті модуля
+    monkeypatch.setattr(email_service, "MAIL_SERVER", "127.0.0.1")
+    monkeypatch.setattr(email_service, "MAIL_PORT", controller.port)
+    monkeypatch.setattr(email_service, "MAIL_STARTTLS", False)
+    monkeypatch.setattr(email_service, "MAIL_SSL_TLS", False)
+    monkeypatch.setattr(email_service, "MAIL_USERNAME", "")
+    yield handler
+    controller.stop()
+
+
+def test_pool_delivers_everything_over_few_connections(sink):
+    pool = SmtpPool(size=2, batch_size=50, max_per_connection=50)
+    messages = [build_message(f"client{i}@example.com", f"Лист {i}", f"<p>{i}</p>") for i in range(120)]
+
+    async def send():
+        results = await pool.send_many(messages)
+        await pool.close()
+        return results
+
+    results = asyncio.run(send())
+
+    assert results == [None] * len(messages)
+    assert sorted(message["To"] for message in sink.messages) == sorted(message["To"] for message in messages)
+    stats = pool.stats()
+    assert (stats["sent"], stats["failed"]) == (120, 0)
+    # Не з'єднання на лист: 120 листів по <= 50 на з'єднання двома воркерами
+    assert 3 <= stats["connections"] <= 4
+
+
+def test_template_email_is_escaped(sink, monkeypatch):
+    pool = SmtpPool(size=1)
+    monkeypatch.setattr(email_service, "mail_pool", pool)
+
+    async def send():
+        await email_service.send_verification_email("user@example.com", "token123", "<b>Олена</b>")
+        await pool.close()
+
+    asyncio.run(send())
+
+    message, = sink.messages
+    html = message.get_payload(decode=True).decode(message.get_content_charset())
+    assert "token123" in html
+    assert "&lt;b&gt;Олена&lt;/b&gt;" in html and "<b>Олена</b>" not in html
+
+
+def test_unreachable_server_fails_every_message(monkeypatch):
+    monkeypatch.setattr(email_service, "MAIL_SERVER", "127.0.0.1")
+    monkeypatch.setattr(email_service, "MAIL_PORT", _free_port())
+    monkeypatch.setattr(email_service, "MAIL_STARTTLS", False)
+    monkeypatch.setattr(email_service, "MAIL_TIMEOUT", 2)
+    pool = SmtpPool(size=1)
+
+    async def send():
+        results = await pool.send_many([build_message("a@example.com", "x", "<p>x</p>")] * 3)
+        await pool.close()
+        return results
+
+    results = asyncio.run(send())
+
+    assert all(isinstance(result, Exception) for result in results)
+    assert pool.stats()["failed"] == 3
@@ -0,0 +1,47 @@
+"""
+Переп'єднання до потоку доступності з Last-Event-ID
+"""
+from datetime import date
+
+from app.live import _RESYNC, AvailabilityFeed
+
+MONTH = (2026, 10)
+
+
+def _feed(events: int, replay_size: int = 256) -> AvailabilityFeed:
+    feed = AvailabilityFeed(replay_size=replay_size)
+    for hour in range(events):
+        feed.publish(date(2026, 10, 17), 9 + hour % 10, booked=True)
+    return feed
+
+
+def _ids(frames: list) -> list:
+    return [frame.split(b"\n", 1)[0].decode().removeprefix("id: ") for frame in frames]
+
+
+def test_missed_events_are_replayed():
+    feed = _feed(5)
+
+    frames = feed._replay(MONTH, f"{feed.epoch}-2")
+
+    assert _ids(frames) == [f"{feed.epoch}-{n}" for n in (3, 4, 5)]
+    assert feed._replay(MONTH, f"{feed.epoch}-5") == []
+    assert feed._replay((2026, 11), f"{feed.epoch}-2") == []
+
+
+def test_id_from_restarted_process_resyncs():
+    before_restart = _feed(50)
+    feed = _feed(3)
+
+    # Лічильник після рестарту менший за ID клієнта - або просто інший epoch
+    assert feed._replay(MONTH, f"{before_restart.epoch}-50") == [_RESYNC]
+    assert feed._replay(MONTH, f"{before_restart.epoch}-1") == [_RESYNC]
+    assert feed._replay(MONTH, f"{feed.epoch}-50") == [_RESYNC]
+    assert feed._replay(MONTH, "50") == [_RESYNC]
+
+
+def test_evicted_history_resyncs():
+    feed = _feed(10, replay_size=4)
+
+    assert feed._replay(MONTH, f"{feed.epoch}-3") == [_RESYNC]
+    assert _ids(feed._replay(MONTH, f"{feed.epoch}-6")) == [f"{feed.epoch}-{n}" for n in (7, 8, 9, 10)]
@@ -0,0 +1,206 @@
+"""
+Outbox: доставка через фейковий Bot, повтори з backoff, dead-letter і lease
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from telegram.error import NetworkError
+
+from app import models, outbox, telegram_service
+from app.database import AsyncSessionLocal
+from app.outbox import OutboxWorker, enqueue_notification, retry_delay
+from app.telegram_sender import TelegramSender
+from app.telegram_service import TelegramNotifier
+
+from .conftest import slots
+
+ADMIN_CHAT_ID = 101
+
+
+class FakeBot:
+    """Bot, що перші fail викликів падає з NetworkError"""
+
+    def __init__(self, fail: int = 0):
+        self.fail = fail
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.fail:
+            self.fail -= 1
+            raise NetworkError("connection reset")
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def notifier(monkeypatch):
+    # Без лімітів Telegram, щоб повтори не чекали секунду на чат
+    monkeypatch.setattr(telegram_service, "telegram_sender", TelegramSender(1000, 1000))
+    notifier = TelegramNotifier()
+    notifier.bot = FakeBot()
+    notifier.admin_chat_ids = [ADMIN_CHAT_ID]
+    return notifier
+
+
+def _worker(notifier, **kwargs) -> OutboxWorker:
+    return OutboxWorker({"new_booking": notifier.send_new_booking_notification}, **kwargs)
+
+
+async def _enqueue(booking_id: int = 1) -> None:
+    async with AsyncSessionLocal() as db:
+        await enqueue_notification(
+            db, "new_booking", booking_id,
+            client_name="Test Client", client_phone="0501234567",
+            booking_date="2030-01-01", booking_hour=10
+        )
+        await db.commit()
+
+
+async def _rows() -> list:
+    async with AsyncSessionLocal() as db:
+        return (await db.scalars(
+            select(models.NotificationOutbox).order_by(models.NotificationOutbox.id)
+        )).all()
+
+
+async def _make_due() -> None:
+    """Перемотати час: усі pending-рядки вже настали"""
+    async with AsyncSessionLocal() as db:
+        for row in (await db.scalars(select(models.NotificationOutbox))).all():
+            row.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        await db.commit()
+
+
+async def _claim_and_deliver(worker: OutboxWorker) -> int:
+    """Один прохід worker'а: забрати due-рядки і доставити"""
+    batch = await worker._claim()
+    semaphore = asyncio.Semaphore(worker.concurrency)
+    for row in batch:
+        await worker._deliver(semaphore, *row)
+    return len(batch)
+
+
+def test_delivered_on_first_attempt(client, run, notifier):
+    worker = _worker(notifier)
+    run(_enqueue)
+
+    assert run(_claim_and_deliver, worker) == 1
+    row, = run(_rows)
+    assert (row.status, row.attempts, row.last_error) == ("sent", 1, None)
+    assert row.sent_at is not None
+    assert [chat_id for chat_id, _ in notifier.bot.sent] == [ADMIN_CHAT_ID]
+    # Відправлений рядок більше не забирається
+    assert run(_claim_and_deliver, worker) == 0
+
+
+def test_failed_send_is_retried_with_backoff(client, run, notifier):
+    notifier.bot.fail = 2
+    worker = _worker(notifier)
+    run(_enqueue)
+
+    delays = []
+    for attempt in (1, 2):
+        before = datetime.utcnow()
+        assert run(_claim_and_deliver, worker) == 1
+        row, = run(_rows)
+        assert (row.status, row.attempts) == ("pending", attempt)
+        assert row.last_error
+        delays.append((row.next_attempt_at - before).total_seconds())
+        # До next_attempt_at рядок не забирається
+        assert run(_claim_and_deliver, worker) == 0
+        run(_make_due)
+
+    assert 0 < delays[0] < delays[1]
+    assert run(_claim_and_deliver, worker) == 1
+    row, = run(_rows)
+    assert (row.status, row.attempts, row.last_error) == ("sent", 3, None)
+    assert (worker.retried, worker.sent) == (2, 1)
+
+
+def test_gives_up_after_max_attempts(client, run, notifier):
+    notifier.bot.fail = 100
+    worker = _worker(notifier, max_attempts=3)
+    run(_enqueue)
+
+    for _ in range(3):
+        assert run(_claim_and_deliver, worker) == 1
+        run(_make_due)
+
+    row, = run(_rows)
+    assert (row.status, row.attempts) == ("failed", 3)
+    assert row.last_error
+    assert worker.failed == 1
+    # Dead-letter: рядок лишається в таблиці, але більше не забирається
+    assert run(_claim_and_deliver, worker) == 0
+
+
+def test_claimed_row_is_leased(client, run, notifier):
+    worker, other = _worker(notifier), _worker(notifier)
+    run(_enqueue)
+
+    claimed = run(worker._claim)
+    assert len(claimed) == 1
+    row, = run(_rows)
+    assert row.next_attempt_at > datetime.utcnow() + timedelta(seconds=outbox.LEASE_SECONDS - 5)
+    # Поки lease не минув, інший worker рядок не бачить
+    assert run(other._claim) == []
+
+    # Worker "впав" - після lease рядок забирає інший
+    run(_make_due)
+    assert run(_claim_and_deliver, other) == 1
+    assert run(_rows)[0].status == "sent"
+
+
+def test_claim_skips_rows_locked_by_other_workers(notifier):
+    # SQLite не знає FOR UPDATE; на PostgreSQL запит має пропускати чужі рядки
+    query = _worker(notifier)._due_query(datetime.utcnow())
+    assert "FOR UPDATE SKIP LOCKED" in str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_retry_delay_grows_and_is_capped():
+    assert 1.6 <= retry_delay(1) <= 2.4
+    assert 6.4 <= retry_delay(3) <= 9.6
+    assert retry_delay(30) <= outbox.RETRY_MAX_SECONDS * 1.2
+
+
+def test_new_booking_after_deleting_newest_is_notified(client, run, admin_headers):
+    (first_date, first_hour), (second_date, second_hour) = slots(2)
+    first = client.post("/api/bookings/", json={
+        "name": "First", "phone": "0501111111",
+        "booking_date": str(first_date), "booking_hour": first_hour
+    }).json()
+    assert client.delete(f"/api/bookings/{first['id']}", headers=admin_headers).status_code == 204
+
+    second = client.post("/api/bookings/", json={
+        "name": "Second", "phone": "0502222222",
+        "booking_date": str(second_date), "booking_hour": second_hour
+    }).json()
+    # Id видаленого бронювання не використовується повторно
+    assert second["id"] != first["id"]
+
+    new_booking = {row.booking_id: row for row in run(_rows) if row.kind == "new_booking"}
+    assert set(new_booking) == {first["id"], second["id"]}
+    assert '"Second"' in new_booking[second["id"]].payload
+
+
+def test_bulk_booking_after_deleting_newest_is_notified(client, run, admin_headers):
+    booking_date = slots(1)[0][0]
+    first = client.post("/api/bookings/bulk", json={
+        "name": "First", "phone": "0501111111",
+        "slots": [{"booking_date": str(booking_date), "hours": [10, 11]}]
+    }).json()
+    for booking in first:
+        assert client.delete(f"/api/bookings/{booking['id']}", headers=admin_headers).status_code == 204
+
+    second = client.post("/api/bookings/bulk", json={
+        "name": "Second", "phone": "0502222222",
+        "slots": [{"booking_date": str(booking_date), "hours": [10, 11]}]
+    }).json()
+    assert not {booking["id"] for booking in first} & {booking["id"] for booking in second}
+
+    # Ключ сповіщення групи - id її першого бронювання
+    new_bookings = {row.booking_id: row for row in run(_rows) if row.kind == "new_bookings"}
+    assert set(new_bookings) == {first[0]["id"], second[0]["id"]}
+    assert '"Second"' in new_bookings[second[0]["id"]].payload
@@ -0,0 +1,124 @@
+"""
+Нагадування: час студії (STUDIO_TZ) і повтор недоставлених
+"""
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy import select
+
+from app import models, reminders
+from app.database import AsyncSessionLocal
+from app.reminders import ReminderScheduler
+from app.telegram_sender import SendResult
+
+CHAT_ID = 555
+
+
+class FakeNotifier:
+    """Перші fail відправок клієнту не доходять; raises - падає вся пачка"""
+
+    def __init__(self, fail: int = 0, raises: bool = False):
+        self.fail = fail
+        self.raises = raises
+        self.batches = []
+
+    async def send_booking_reminders(self, items):
+        self.batches.append([item["booking_id"] for item in items])
+        if self.raises:
+            raise RuntimeError("telegram down")
+        chats = {item["chat_id"] for item in items if item["chat_id"]}
+        results = [SendResult(chat_id=chat_id, ok=not self.fail, latency=0.0) for chat_id in chats]
+        self.fail = max(self.fail - 1, 0)
+        return results
+
+
+async def _seed(slot) -> int:
+    async with AsyncSessionLocal() as db:
+        booking = models.Booking(
+            client=models.Client(name="Client", phone="0501234567"),
+            booking_date=slot[0], booking_hour=slot[1], telegram_user_id=CHAT_ID
+        )
+        db.add(booking)
+        await db.commit()
+        return booking.id
+
+
+async def _reminded_at(booking_id: int):
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(models.Booking.reminded_at).where(models.Booking.id == booking_id))
+
+
+async def _deliver_due(scheduler: ReminderScheduler) -> list:
+    """Один прохід воркера, ніби настав час усіх нагадувань у черзі"""
+    batch = scheduler._pop_due(reminders.studio_now() + timedelta(days=30))
+    if batch:
+        await scheduler._deliver(batch)
+    return batch
+
+
+@pytest.fixture
+def slot():
+    return (date.today() + timedelta(days=3), 10)
+
+
+@pytest.mark.parametrize("zone, scheduled", [("Etc/GMT-14", 0), ("Etc/GMT+12", 1)])
+def test_now_is_taken_in_studio_time_zone(monkeypatch, zone, scheduled):
+    monkeypatch.setattr(reminders, "STUDIO_TZ", ZoneInfo(zone))
+    # Через дві години за UTC: у UTC+14 вже минуло, в UTC-12 ще попереду
+    soon = datetime.utcnow() + timedelta(hours=2)
+    scheduler = ReminderScheduler()
+
+    scheduler.schedule(soon.date(), soon.hour)
+
+    assert scheduler.stats()["queued"] == scheduled
+
+
+def test_failed_reminder_is_retried(client, run, slot):
+    booking_id = run(_seed, slot)
+    notifier = FakeNotifier(fail=1)
+    scheduler = ReminderScheduler(notifier=notifier, retry_delay=60, max_attempts=3)
+    scheduler.schedule(*slot)
+
+    assert run(_deliver_due, scheduler) == [slot]
+
+    # Не дійшло: позначку знято, слот знову в черзі через retry_delay
+    assert run(_reminded_at, booking_id) is None
+    stats = scheduler.stats()
+    assert (stats["queued"], stats["retried"], stats["delivered"]) == (1, 1, 0)
+    due = datetime.fromisoformat(stats["next_due"]) - reminders.studio_now()
+    assert timedelta(seconds=50) < due <= timedelta(seconds=60)
+
+    assert run(_deliver_due, scheduler) == [slot]
+
+    assert run(_reminded_at, booking_id) is not None
+    stats = scheduler.stats()
+    assert (stats["queued"], stats["delivered"], stats["failed"]) == (0, 1, 0)
+    assert notifier.batches == [[booking_id], [booking_id]]
+
+
+def test_gives_up_after_max_attempts(client, run, slot):
+    booking_id = run(_seed, slot)
+    scheduler = ReminderScheduler(notifier=FakeNotifier(fail=100), max_attempts=2)
+    scheduler.schedule(*slot)
+
+    assert run(_deliver_due, scheduler) == [slot]
+    assert run(_deliver_due, scheduler) == [slot]
+    assert run(_deliver_due, scheduler) == []
+
+    stats = scheduler.stats()
+    assert (stats["retried"], stats["failed"], stats["queued"]) == (1, 1, 0)
+    # Позначка лишається - після рестарту нагадування не шлеться знову
+    assert run(_reminded_at, booking_id) is not None
+
+
+def test_notifier_error_releases_the_batch(client, run, slot):
+    booking_id = run(_seed, slot)
+    scheduler = ReminderScheduler(notifier=FakeNotifier(raises=True))
+    scheduler.schedule(*slot)
+
+    assert run(_deliver_due, scheduler) == [slot]
+
+    assert run(_reminded_at, booking_id) is None
+    stats = scheduler.stats()
+    assert (stats["retried"], stats["queued"]) == (1, 1)
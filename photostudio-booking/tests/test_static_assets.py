@@ -0,0 +1,53 @@
+"""
+Статика: збірка лише при старті, а невдала збірка не ламає сторінки
+"""
+import os
+
+import pytest
+
+from app import main, static_assets
+from app.static_assets import StaticAssets
+
+
+@pytest.fixture
+def broken_build(monkeypatch, tmp_path):
+    """Порожній dist і збірка, що завжди падає"""
+    calls = []
+
+    def build(*args):
+        calls.append(args)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(static_assets, "build", build)
+    assets = StaticAssets(dist_dir=str(tmp_path / "dist"), autoreload=True)
+    monkeypatch.setattr(main, "static_assets", assets)
+    return assets, calls
+
+
+def test_failed_build_falls_back_to_plain_pages(broken_build, client):
+    _, calls = broken_build
+    # Збірку вже спробував startup-хук застосунку
+    assert len(calls) == 1
+
+    for _ in range(3):
+        for url, page in (("/", "index.html"), ("/admin", "admin.html")):
+            response = client.get(url)
+            assert response.status_code == 200
+            assert "content-encoding" not in response.headers
+            with open(os.path.join("static", page), "rb") as f:
+                assert response.content == f.read()
+
+    # Невдала збірка запам'ятовується, а не повторюється на кожен запит
+    assert len(calls) == 1
+
+
+def test_pages_are_not_checked_without_autoreload(monkeypatch, client):
+    assets = StaticAssets()
+    assets.load()
+    monkeypatch.setattr(assets, "_current_mtimes", lambda: pytest.fail("stat на запиті"))
+    monkeypatch.setattr(main, "static_assets", assets)
+
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
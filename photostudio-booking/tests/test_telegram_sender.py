@@ -0,0 +1,116 @@
+"""
+TelegramSender: кожен API-виклик бере свій токен ліміту і повторюється окремо
+"""
+import asyncio
+import time
+
+from telegram.error import RetryAfter
+
+from app.telegram_sender import TelegramSender
+
+
+class FakeBot:
+    """Bot, що на перший send_message відповідає RetryAfter"""
+
+    def __init__(self):
+        self.forwarded = []
+        self.sent = []
+        self.retry_after = True
+
+    async def forward_message(self, chat_id, from_chat_id, message_id):
+        self.forwarded.append((chat_id, message_id))
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.retry_after:
+            self.retry_after = False
+            raise RetryAfter(0)
+        self.sent.append((chat_id, text))
+
+
+async def _send_receipt(sender: TelegramSender, bot: FakeBot, chat_ids) -> list:
+    # Як handle_photo у bot.py: фото, потім картка
+    forwarded = await sender.fan_out(chat_ids, lambda chat_id: bot.forward_message(chat_id, 1, 42))
+    sent = await sender.fan_out(chat_ids, lambda chat_id: bot.send_message(chat_id, "receipt"))
+    return forwarded + sent
+
+
+def test_retry_after_repeats_only_the_failed_call():
+    sender, bot = TelegramSender(global_rate=1000, chat_rate=1000), FakeBot()
+
+    results = asyncio.run(_send_receipt(sender, bot, [101]))
+
+    assert all(result.ok for result in results)
+    assert bot.forwarded == [(101, 42)]
+    assert bot.sent == [(101, "receipt")]
+    assert sender.retry_after_hits == 1
+
+
+def test_each_call_takes_its_own_chat_token():
+    chat_rate = 20
+    sender, bot = TelegramSender(global_rate=1000, chat_rate=chat_rate), FakeBot()
+    bot.retry_after = False
+
+    started = time.monotonic()
+    asyncio.run(_send_receipt(sender, bot, [101, 102]))
+    elapsed = time.monotonic() - started
+
+    # Два повідомлення в чат - два токени: друге чекає 1/chat_rate, чати паралельно
+    assert 1 / chat_rate * 0.9 <= elapsed < 3 / chat_rate
+    assert sender.sent == 4
+
+
+class FloodBot:
+    """Bot, що перший запит у чат 101 відхиляє з RetryAfter(retry_after)"""
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        self.sent_at = {}
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if chat_id == 101 and self.retry_after:
+            retry_after, self.retry_after = self.retry_after, 0
+            raise RetryAfter(retry_after)
+        self.sent_at[chat_id] = time.monotonic()
+
+
+def test_retry_after_pauses_other_chats():
+    sender, bot = TelegramSender(global_rate=1000, chat_rate=1000), FloodBot(retry_after=1)
+
+    started = time.monotonic()
+    results = asyncio.run(sender.broadcast(bot, [101, 102, 103], "text"))
+
+    assert all(result.ok for result in results)
+    # 429 в одному чаті зупиняє всю розсилку бота на retry_after
+    assert all(sent_at - started >= 0.9 for sent_at in bot.sent_at.values())
+    assert sender.retry_after_hits == 1
+
+
+def test_idle_chat_buckets_are_evicted():
+    sender, bot = TelegramSender(global_rate=1000, chat_rate=1000, max_chats=10), FakeBot()
+    bot.retry_after = False
+
+    async def remind():
+        # Нагадування клієнтам: кожен чат - один раз
+        for start in range(0, 100, 20):
+            await sender.broadcast(bot, range(start, start + 20), "reminder")
+            await asyncio.sleep(0.01)
+
+    asyncio.run(remind())
+
+    assert len(bot.sent) == 100
+    assert len(sender._chats) <= 20
+    stats = sender.stats()
+    assert stats["chats_tracked"] == len(sender._chats)
+    # Тільки агрегати - ID клієнтських чатів у статистиці немає
+    assert all(not isinstance(value, dict) for value in stats.values())
+    assert stats["max_latency_ms"] >= stats["avg_latency_ms"] >= 0
+
+
+def test_busy_chat_bucket_is_kept():
+    sender = TelegramSender(global_rate=1000, chat_rate=1, max_chats=1)
+    busy = sender._chat_bucket(1)
+    busy.tokens = 0  # щойно відправили - наступне повідомлення через секунду
+
+    sender._chat_bucket(2)
+
+    assert sender._chat_bucket(1) is busy
@@ -0,0 +1,43 @@
+"""
+Webhook вмикається тільки з публічною https-адресою, інакше - polling
+"""
+import pytest
+
+from app.routers import telegram as telegram_webhook
+
+
+@pytest.mark.parametrize("base_url, url", [
+    ("https://studio.example.com", "https://studio.example.com/api/telegram/webhook"),
+    ("https://studio.example.com/", "https://studio.example.com/api/telegram/webhook"),
+    ("", None),
+    ("/telegram", None),
+    ("http://192.168.88.26:8000", None),
+    ("https://", None),
+])
+def test_webhook_requires_https_base_url(monkeypatch, base_url, url):
+    monkeypatch.setattr(telegram_webhook, "BOT_MODE", "webhook")
+    monkeypatch.setattr(telegram_webhook, "WEBHOOK_BASE_URL", base_url)
+
+    assert telegram_webhook.webhook_url() == url
+    assert telegram_webhook.webhook_enabled() is (url is not None)
+
+
+def test_polling_mode_never_enables_webhook(monkeypatch):
+    monkeypatch.setattr(telegram_webhook, "BOT_MODE", "polling")
+    monkeypatch.setattr(telegram_webhook, "WEBHOOK_BASE_URL", "https://studio.example.com")
+
+    assert not telegram_webhook.webhook_enabled()
+
+
+def test_invalid_url_does_not_start_webhook_on_startup(monkeypatch, client):
+    # client уже пройшов startup; перевіряємо сам хук із кривою адресою
+    monkeypatch.setattr(telegram_webhook, "BOT_MODE", "webhook")
+    monkeypatch.setattr(telegram_webhook, "WEBHOOK_BASE_URL", "")
+    started = []
+    monkeypatch.setattr(telegram_webhook, "start_webhook", lambda: started.append(True))
+
+    from app.main import start_telegram_webhook
+    client.portal.call(start_telegram_webhook)
+
+    assert started == []
+    assert client.post("/api/telegram/webhook", json={}).status_code == 404